@@ -1,19 +1,40 @@
 # app.py - Complete working version with all routes including full loans functionality
 from flask import Flask, app, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_session import Session
-import os
 from datetime import datetime
 import requests
+from config import Config
+from utils.gateway import gateway
+from utils.resolver import resolver
+from utils.batch import fetch_for_accounts
+from utils.loan_index import loan_index
+from utils.auth import get_cache_scope
+from utils.proxy import stream_proxy
+from utils.concurrency import gather, request_executor
+from utils.warm_cache import warm_cache
+from utils.loader import entity_loader
+from utils.pagination import iter_rows
+from utils.json_stream import iter_items
+from utils.repository import (
+    AccountRepository, ContactRepository, LoanRepository, AssetRepository, CaseRepository, NotFound, Unauthorized
+)
 from routes.auth import auth_bp
 from routes.admin import admin_bp
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     app = Flask(__name__)
 
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
-    app.config['SESSION_TYPE'] = 'filesystem'
-    app.config['FASTAPI_BASE_URL'] = os.environ.get('FASTAPI_BASE_URL', 'http://127.0.0.1:8000')
+    app.config.from_object(Config)
+
+    # Share one pooled keep-alive client for every backend call
+    gateway.init_app(app)
+
+    # Start with the shared cache entries the previous process left behind
+    warm_cache.init_app(app)
     
     # Register the auth blueprint
     app.register_blueprint(auth_bp)
@@ -186,87 +207,55 @@ def create_app():
             skip = (page - 1) * per_page
             
             # Get access token from session
-            access_token = session.get('access_token')
-            if not access_token:
+            if not session.get('access_token'):
                 flash('Authentication required', 'error')
                 return redirect(url_for('auth.login'))
             
-            # Prepare API request headers
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Build query parameters for FastAPI
-            params = {
-                'skip': skip,
-                'limit': per_page
-            }
-            
-            # Add filters if they exist
-            if search:
-                params['search'] = search
-            if account_type:
-                params['account_type'] = account_type
-            if status:
-                params['status'] = status
-            
             # Call FastAPI backend
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.get(
-                f"{fastapi_url}/api/accounts/",
-                headers=headers,
-                params=params,
-                timeout=10
+            accounts_page = AccountRepository.for_request().list(
+                skip=skip, limit=per_page, search=search, account_type=account_type, status=status
             )
+            print(f"Successfully fetched {len(accounts_page)} accounts from FastAPI")
             
-            if response.status_code == 200:
-                data = response.json()
-                accounts = data.get('items', [])
-                total = data.get('total', 0)
-                
-                # Calculate pagination info
-                total_pages = (total + per_page - 1) // per_page
-                has_prev = page > 1
-                has_next = page < total_pages
-                
-                print(f"Successfully fetched {len(accounts)} accounts from FastAPI")
-                
-                return render_template('accounts/index.html', 
-                                    accounts=accounts,
-                                    search=search,
-                                    account_type=account_type,
-                                    status=status,
-                                    page=page,
-                                    per_page=per_page,
-                                    total=total,
-                                    total_pages=total_pages,
-                                    has_prev=has_prev,
-                                    has_next=has_next)
-            
-            elif response.status_code == 401:
-                flash('Session expired. Please log in again.', 'error')
-                return redirect(url_for('auth.login'))
-            
-            else:
-                print(f"FastAPI error: {response.status_code} - {response.text}")
-                flash('Error loading accounts. Please try again.', 'error')
-                return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+            return render_template('accounts/index.html', 
+                                accounts=accounts_page.items,
+                                search=search,
+                                account_type=account_type,
+                                status=status,
+                                page=page,
+                                per_page=per_page,
+                                total=accounts_page.total,
+                                total_pages=accounts_page.total_pages,
+                                has_prev=accounts_page.has_prev,
+                                has_next=accounts_page.has_next)
+        
+        except Unauthorized:
+            flash('Session expired. Please log in again.', 'error')
+            return redirect(url_for('auth.login'))
+        
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Accounts list failed: {e}")
+            flash('Error loading accounts. Please try again.', 'error')
+            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                                   page=1, total=0, total_pages=1)
         
         except requests.exceptions.ConnectionError:
-            print("Could not connect to FastAPI backend")
+            logger.error("Could not connect to FastAPI backend")
             flash('Backend service unavailable. Please try again later.', 'error')
-            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                                   page=1, total=0, total_pages=1)
         
         except requests.exceptions.Timeout:
-            print("FastAPI request timed out")
+            logger.error("FastAPI request timed out")
             flash('Request timed out. Please try again.', 'error')
-            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                                   page=1, total=0, total_pages=1)
         
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            logger.exception(f"Unexpected error loading accounts: {e}")
             flash('An unexpected error occurred. Please try again.', 'error')
-            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                                   page=1, total=0, total_pages=1)
 
     @app.route('/accounts/new')
     def accounts_new():
@@ -311,7 +300,7 @@ def create_app():
             
             # Call FastAPI backend
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.post(
+            response = gateway.post(
                 f"{fastapi_url}/api/accounts/",
                 headers=headers,
                 json=account_data,
@@ -345,11 +334,13 @@ def create_app():
             
             print(f"🔍 Loading account details for ID: {account_id}")
             
-            # Load account details
-            account_response = requests.get(
-                f"{fastapi_url}/api/accounts/{account_id}",
-                headers=headers,
-                timeout=10
+            # Load the account and its related data together - none of the calls depend on another
+            account_response, contact_data, loan_data, asset_data, case_data = gather(
+                lambda: gateway.get(f"{fastapi_url}/api/accounts/{account_id}", headers=headers, timeout=10),
+                lambda: resolver.fetch('account.contacts', fastapi_url, headers, account_id),
+                lambda: resolver.fetch('account.loans', fastapi_url, headers, account_id),
+                lambda: resolver.fetch('account.assets', fastapi_url, headers, account_id),
+                lambda: resolver.fetch('account.cases', fastapi_url, headers, account_id),
             )
             
             if account_response.status_code != 200:
@@ -366,74 +357,17 @@ def create_app():
             assets = []
             cases = []
             
-            # Load related data with multiple endpoint attempts
-            # Try to load contacts
-            contact_endpoints = [
-                f"/api/contacts/?account_id={account_id}",
-                f"/api/contacts?account_id={account_id}",
-                f"/api/accounts/{account_id}/contacts"
-            ]
-            
-            for endpoint in contact_endpoints:
-                try:
-                    contact_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if contact_response.status_code == 200:
-                        contact_data = contact_response.json()
-                        contacts = contact_data.get('items', contact_data) if isinstance(contact_data, dict) else contact_data
-                        break
-                except:
-                    continue
+            if contact_data is not None:
+                contacts = contact_data.get('items', contact_data) if isinstance(contact_data, dict) else contact_data
             
-            # Try to load loans
-            loan_endpoints = [
-                f"/api/loans/?account_id={account_id}",
-                f"/api/loans?account_id={account_id}",
-                f"/api/accounts/{account_id}/loans"
-            ]
+            if loan_data is not None:
+                loans = loan_data.get('items', loan_data) if isinstance(loan_data, dict) else loan_data
             
-            for endpoint in loan_endpoints:
-                try:
-                    loan_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if loan_response.status_code == 200:
-                        loan_data = loan_response.json()
-                        loans = loan_data.get('items', loan_data) if isinstance(loan_data, dict) else loan_data
-                        break
-                except:
-                    continue
-            
-            # Try to load assets
-            asset_endpoints = [
-                f"/api/assets/?account_id={account_id}",
-                f"/api/assets?account_id={account_id}",
-                f"/api/accounts/{account_id}/assets"
-            ]
-            
-            for endpoint in asset_endpoints:
-                try:
-                    asset_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if asset_response.status_code == 200:
-                        asset_data = asset_response.json()
-                        assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
-                        break
-                except:
-                    continue
+            if asset_data is not None:
+                assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
 
-            # Try to load cases
-            case_endpoints = [
-                f"/api/cases/?account_id={account_id}",
-                f"/api/cases?account_id={account_id}",
-                f"/api/accounts/{account_id}/cases"
-            ]
-
-            for endpoint in case_endpoints:
-                try:
-                    case_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if case_response.status_code == 200:
-                        case_data = case_response.json()
-                        cases = case_data.get('items', case_data) if isinstance(case_data, dict) else case_data
-                        break
-                except:
-                    continue
+            if case_data is not None:
+                cases = case_data.get('items', case_data) if isinstance(case_data, dict) else case_data
             
             print(f"📊 Final data summary for account {account_id}:")
             print(f"   - Account: {account.get('account_name', 'Unknown')}")
@@ -466,7 +400,7 @@ def create_app():
             headers = {'Authorization': f'Bearer {access_token}'}
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.get(
+            response = gateway.get(
                 f"{fastapi_url}/api/accounts/{account_id}",
                 headers=headers,
                 timeout=10
@@ -516,7 +450,7 @@ def create_app():
             }
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.put(
+            response = gateway.put(
                 f"{fastapi_url}/api/accounts/{account_id}",
                 headers=headers,
                 json=account_data,
@@ -588,10 +522,14 @@ def create_app():
             if financial_institution and financial_institution.strip():
                 params['financial_institution'] = financial_institution.strip()
             
+            # The dropdown comes from the shared reference-data cache and doesn't depend on
+            # the loans query, so a cold load runs at the same time
+            institutions_future = request_executor().submit(LoanRepository(fastapi_url, headers).financial_institutions)
+            
             print(f"🔍 DEBUG: Making loans API call with params: {params}")
             
             # Fetch loans from FastAPI with timeout
-            response = requests.get(
+            response = gateway.get(
                 f"{fastapi_url}/api/loans/", 
                 headers=headers, 
                 params=params,
@@ -640,23 +578,8 @@ def create_app():
                     loans = []
                     total = 0
             
-            # Fetch financial institutions for filter dropdown
-            try:
-                print("🔍 DEBUG: Fetching financial institutions...")
-                institutions_response = requests.get(
-                    f"{fastapi_url}/api/loans/financial-institutions",
-                    headers=headers,
-                    timeout=10
-                )
-                if institutions_response.status_code == 200:
-                    financial_institutions = institutions_response.json() or []
-                    print(f"🔍 DEBUG: Got {len(financial_institutions)} financial institutions")
-                else:
-                    print(f"⚠️ Financial institutions API error: {institutions_response.status_code}")
-                    financial_institutions = []
-            except Exception as fi_error:
-                print(f"⚠️ Error loading financial institutions: {str(fi_error)}")
-                financial_institutions = []
+            # Collect the financial institutions for the filter dropdown (fetched alongside the loans)
+            financial_institutions = institutions_future.result()
             
             # Calculate pagination
             if total > 0:
@@ -727,8 +650,8 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Load accounts and contacts for dropdowns
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
-            contacts_response = requests.get(f"{fastapi_url}/api/contacts/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            contacts_response = gateway.get(f"{fastapi_url}/api/contacts/", headers=headers)
             
             accounts = []
             contacts = []
@@ -786,7 +709,7 @@ def create_app():
             loan_data = {k: v for k, v in loan_data.items() if v is not None and v != ''}
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.post(
+            response = gateway.post(
                 f"{fastapi_url}/api/loans/",
                 headers=headers,
                 json=loan_data,
@@ -798,6 +721,7 @@ def create_app():
                 return redirect(url_for('auth.login'))
             
             if response.status_code in [200, 201]:
+                loan_index.upsert(response, scope=get_cache_scope())
                 flash('Loan created successfully!', 'success')
                 return redirect(url_for('loans_index'))
             else:
@@ -826,20 +750,26 @@ def create_app():
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
-            # 1. Fetch main loan data from the API
-            response = requests.get(f"{fastapi_url}/api/loans/{loan_id}", headers=headers, timeout=10)
+            def fetch_for_loan(kind):
+                try:
+                    resp = gateway.get(f"{fastapi_url}/api/{kind}/?loan_id={loan_id}", headers=headers, timeout=5)
+                    if resp.status_code == 200:
+                        data = resp.json()
+                        return data.get('items', data) if isinstance(data, dict) else data
+                except requests.RequestException as e:
+                    print(f"Warning: Could not fetch {kind} for loan {loan_id}: {e}")
+                return []
             
-            if response.status_code == 401:
-                session.clear()
-                return redirect(url_for('auth.login'))
-            elif response.status_code == 404:
+            # Assets and cases only need the loan id, so start them alongside the loan itself
+            executor = request_executor()
+            assets_future = executor.submit(fetch_for_loan, 'assets')
+            cases_future = executor.submit(fetch_for_loan, 'cases')
+            
+            # 1. Fetch main loan data from the API
+            loan = LoanRepository(fastapi_url, headers).get(loan_id)
+            if loan is None:
                 flash('Loan not found', 'error')
                 return redirect(url_for('loans_index'))
-            elif response.status_code != 200:
-                flash(f'Error loading loan details: {response.text}', 'error')
-                return redirect(url_for('loans_index'))
-            
-            loan = response.json()
 
             # 2. PERFORM ALL CALCULATIONS IN PYTHON FOR TYPE SAFETY
             original_amount = float(loan.get('loan_amount', 0) or 0)
@@ -862,52 +792,19 @@ def create_app():
             loan['amount_paid'] = amount_paid
             loan['progress_percent'] = progress_percent
             loan['total_due'] = total_due
-            
-            # 3. Initialize placeholders for related data
-            account, primary_contact, secondary_contact = None, None, None
-            assets, cases = [], []
 
-            # 4. Fetch related data based on IDs from the loan object
-            if loan.get('account_id'):
-                try:
-                    acc_resp = requests.get(f"{fastapi_url}/api/accounts/{loan['account_id']}", headers=headers, timeout=5)
-                    if acc_resp.status_code == 200:
-                        account = acc_resp.json()
-                except requests.RequestException as e:
-                    print(f"Warning: Could not fetch account {loan['account_id']}: {e}")
-
-            contact_id_to_fetch = loan.get('primary_contact') or loan.get('contact_id')
-            if contact_id_to_fetch:
-                try:
-                    pc_resp = requests.get(f"{fastapi_url}/api/contacts/{contact_id_to_fetch}", headers=headers, timeout=5)
-                    if pc_resp.status_code == 200:
-                        primary_contact = pc_resp.json()
-                except requests.RequestException as e:
-                    print(f"Warning: Could not fetch primary contact {contact_id_to_fetch}: {e}")
+            # 3. Fetch related records named by the loan, one batched call per collection
+            loader = entity_loader(fastapi_url, headers)
+            pending = [
+                loader.load('accounts', loan.get('account_id')),
+                loader.load('contacts', loan.get('primary_contact') or loan.get('contact_id')),
+                loader.load('contacts', loan.get('secondary_contact')),
+            ]
+            account, primary_contact, secondary_contact = [record.get() for record in pending]
             
-            if loan.get('secondary_contact'):
-                try:
-                    sc_resp = requests.get(f"{fastapi_url}/api/contacts/{loan['secondary_contact']}", headers=headers, timeout=5)
-                    if sc_resp.status_code == 200:
-                        secondary_contact = sc_resp.json()
-                except requests.RequestException as e:
-                    print(f"Warning: Could not fetch secondary contact {loan['secondary_contact']}: {e}")
-
-            try:
-                assets_resp = requests.get(f"{fastapi_url}/api/assets/?loan_id={loan_id}", headers=headers, timeout=5)
-                if assets_resp.status_code == 200:
-                    assets_data = assets_resp.json()
-                    assets = assets_data.get('items', assets_data) if isinstance(assets_data, dict) else assets_data
-            except requests.RequestException as e:
-                print(f"Warning: Could not fetch assets for loan {loan_id}: {e}")
-
-            try:
-                cases_resp = requests.get(f"{fastapi_url}/api/cases/?loan_id={loan_id}", headers=headers, timeout=5)
-                if cases_resp.status_code == 200:
-                    cases_data = cases_resp.json()
-                    cases = cases_data.get('items', cases_data) if isinstance(cases_data, dict) else cases_data
-            except requests.RequestException as e:
-                print(f"Warning: Could not fetch cases for loan {loan_id}: {e}")
+            # 4. Collect the assets and cases started earlier
+            assets = assets_future.result()
+            cases = cases_future.result()
 
             # 5. Render the template with all the fetched data
             return render_template('loans/detail.html', 
@@ -918,6 +815,12 @@ def create_app():
                                    assets=assets or [],
                                    cases=cases or [])
 
+        except Unauthorized:
+            session.clear()
+            return redirect(url_for('auth.login'))
+        except requests.HTTPError as e:
+            flash(f'Error loading loan details: {e.response.text}', 'error')
+            return redirect(url_for('loans_index'))
         except requests.RequestException as e:
             flash(f'Error connecting to backend: {e}', 'error')
             return redirect(url_for('loans_index'))
@@ -943,7 +846,7 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Fetch loan details
-            response = requests.get(f"{fastapi_url}/api/loans/{loan_id}", headers=headers)
+            response = gateway.get(f"{fastapi_url}/api/loans/{loan_id}", headers=headers)
             
             if response.status_code == 401:
                 session.clear()
@@ -958,8 +861,8 @@ def create_app():
             loan = response.json()
             
             # Load accounts and contacts for dropdowns
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
-            contacts_response = requests.get(f"{fastapi_url}/api/contacts/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            contacts_response = gateway.get(f"{fastapi_url}/api/contacts/", headers=headers)
             
             accounts = []
             contacts = []
@@ -1017,7 +920,7 @@ def create_app():
             loan_data = {k: v for k, v in loan_data.items() if v is not None and v != ''}
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.put(
+            response = gateway.put(
                 f"{fastapi_url}/api/loans/{loan_id}",
                 headers=headers,
                 json=loan_data,
@@ -1031,6 +934,7 @@ def create_app():
                 flash('Loan not found', 'error')
                 return redirect(url_for('loans_index'))
             elif response.status_code == 200:
+                loan_index.upsert(response, scope=get_cache_scope())
                 flash('Loan updated successfully!', 'success')
                 return redirect(url_for('loans_detail', loan_id=loan_id))
             else:
@@ -1057,7 +961,7 @@ def create_app():
                 return redirect(url_for('auth.login'))
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.delete(f"{fastapi_url}/api/loans/{loan_id}", headers=headers)
+            response = gateway.delete(f"{fastapi_url}/api/loans/{loan_id}", headers=headers)
             
             if response.status_code == 401:
                 session.clear()
@@ -1066,6 +970,7 @@ def create_app():
                 flash('Loan not found', 'error')
                 return redirect(url_for('loans_index'))
             elif response.status_code == 200:
+                loan_index.discard(loan_id)
                 flash('Loan deleted successfully!', 'success')
                 return redirect(url_for('loans_index'))
             else:
@@ -1106,95 +1011,28 @@ def create_app():
                 flash('Authentication required', 'error')
                 return redirect(url_for('auth.login'))
 
-            # Build query parameters for the API request
-            params = {
-                'skip': (page - 1) * per_page,
-                'limit': per_page
-            }
-            
             # Add search parameter - make sure it's properly formatted
             if search:
-                params['search'] = search
                 print(f"🔍 Searching contacts for: '{search}'")
             
             # Add contact type filter
             if contact_type:
-                params['contact_type'] = contact_type
                 print(f"🏷️ Filtering by contact type: '{contact_type}'")
 
             # Call the FastAPI backend to get contacts
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            api_url = f"{fastapi_url}/api/contacts/"
-            
-            print(f"📡 Making API call to: {api_url}")
-            print(f"📋 With parameters: {params}")
-            
-            response = requests.get(
-                api_url,
-                headers=headers,
-                params=params,
-                timeout=15  # Increased timeout
-            )
-
-            print(f"📊 API Response Status: {response.status_code}")
-
-            # Handle the API response
-            if response.status_code == 200:
-                data = response.json()
-                print(f"📄 Response data type: {type(data)}")
-                
-                # Handle both paginated response and direct list response
-                if isinstance(data, dict):
-                    # Paginated response format
-                    contacts = data.get('items', [])
-                    total = data.get('total', len(contacts))
-                    print(f"📋 Paginated response: {len(contacts)} contacts, {total} total")
-                elif isinstance(data, list):
-                    # Direct list response format
-                    contacts = data
-                    total = len(contacts)
-                    print(f"📋 Direct list response: {len(contacts)} contacts")
-                else:
-                    # Fallback
-                    contacts = []
-                    total = 0
-                    print("❌ Unexpected response format")
-                
-                # Debug: Show first few contacts if search was performed
-                if search and contacts:
-                    print(f"🔍 Search results preview:")
-                    for i, contact in enumerate(contacts[:3]):
-                        name = f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip()
-                        print(f"  {i+1}. {name} (ID: {contact.get('id')})")
-                
-                # Calculate pagination info
-                total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-                has_prev = page > 1
-                has_next = page < total_pages
-                
-                print(f"✅ Successfully fetched {len(contacts)} of {total} contacts from FastAPI")
-
-                return render_template('contacts/index.html',
-                                    contacts=contacts,
-                                    search=search,
-                                    contact_type=contact_type,
-                                    page=page,
-                                    per_page=per_page,
-                                    total=total,
-                                    total_pages=total_pages,
-                                    has_prev=has_prev,
-                                    has_next=has_next)
-
-            elif response.status_code == 401:
+            try:
+                contacts_page = ContactRepository(app.config['FASTAPI_BASE_URL'], headers).list(
+                    skip=(page - 1) * per_page, limit=per_page, search=search, contact_type=contact_type
+                )
+            except Unauthorized:
                 flash('Session expired. Please log in again.', 'error')
                 return redirect(url_for('auth.login'))
-
-            else:
+            except requests.HTTPError as e:
                 try:
-                    error_detail = response.json().get('detail', response.text)
+                    error_detail = e.response.json().get('detail', e.response.text)
                 except:
-                    error_detail = response.text
-                print(f"❌ FastAPI error (contacts): {response.status_code} - {error_detail}")
+                    error_detail = e.response.text
+                print(f"❌ FastAPI error (contacts): {e.response.status_code} - {error_detail}")
                 flash(f'Error loading contacts: {error_detail}', 'error')
                 return render_template('contacts/index.html', 
                                     contacts=[], 
@@ -1206,6 +1044,29 @@ def create_app():
                                     has_prev=False,
                                     has_next=False)
 
+            contacts = contacts_page.items
+            total = contacts_page.total
+            
+            # Debug: Show first few contacts if search was performed
+            if search and contacts:
+                print(f"🔍 Search results preview:")
+                for i, contact in enumerate(contacts[:3]):
+                    name = f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip()
+                    print(f"  {i+1}. {name} (ID: {contact.get('id')})")
+            
+            print(f"✅ Successfully fetched {len(contacts)} of {total} contacts from FastAPI")
+
+            return render_template('contacts/index.html',
+                                contacts=contacts,
+                                search=search,
+                                contact_type=contact_type,
+                                page=page,
+                                per_page=per_page,
+                                total=total,
+                                total_pages=contacts_page.total_pages,
+                                has_prev=contacts_page.has_prev,
+                                has_next=contacts_page.has_next)
+
         except requests.RequestException as e:
             print(f"❌ Could not connect to FastAPI backend for contacts: {e}")
             flash('Backend service unavailable. Please try again later.', 'error')
@@ -1251,7 +1112,7 @@ def create_app():
             if headers:
                 try:
                     fastapi_url = app.config['FASTAPI_BASE_URL']
-                    accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers, timeout=5)
+                    accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers, timeout=5)
                     if accounts_response.status_code == 200:
                         accounts_data = accounts_response.json()
                         accounts = accounts_data.get('items', accounts_data) if isinstance(accounts_data, dict) else accounts_data
@@ -1286,26 +1147,14 @@ def create_app():
             # Remove None values
             contact_data = {k: v for k, v in contact_data.items() if v is not None and v != ''}
             
-            access_token = session.get('access_token')
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.post(
-                f"{fastapi_url}/api/contacts/",
-                headers=headers,
-                json=contact_data,
-                timeout=10
-            )
-            
-            if response.status_code == 201:
-                flash('Contact created successfully!', 'success')
-                return redirect(url_for('contacts_index'))
-            else:
+            try:
+                ContactRepository.for_request().create(contact_data)
+            except requests.HTTPError:
                 flash('Error creating contact. Please try again.', 'error')
                 return render_template('contacts/form.html', contact=contact_data)
+            
+            flash('Contact created successfully!', 'success')
+            return redirect(url_for('contacts_index'))
         
         except Exception as e:
             print(f"Error creating contact: {e}")
@@ -1328,19 +1177,15 @@ def create_app():
             print(f"Loading contact details for ID: {contact_id}")  # Debug
             
             # Load contact details
-            contact_response = requests.get(
-                f"{fastapi_url}/api/contacts/{contact_id}",
-                headers=headers,
-                timeout=10
-            )
-            
-            print(f"API response status: {contact_response.status_code}")  # Debug
+            try:
+                contact = ContactRepository(fastapi_url, headers).get(contact_id, timeout=10)
+            except requests.HTTPError:
+                contact = None
             
-            if contact_response.status_code != 200:
+            if contact is None:
                 flash('Contact not found.', 'error')
                 return redirect(url_for('contacts_index'))
             
-            contact = contact_response.json()
             print(f"Contact data: {contact}")  # Debug
             
             # Initialize related data
@@ -1352,160 +1197,66 @@ def create_app():
             # Load related account if contact has account_id
             if contact.get('account_id'):
                 try:
-                    account_response = requests.get(f"{fastapi_url}/api/accounts/{contact['account_id']}", headers=headers, timeout=5)
-                    if account_response.status_code == 200:
-                        related_account = account_response.json()
+                    related_account = AccountRepository(fastapi_url, headers).get(contact['account_id'], timeout=5)
+                    if related_account is not None:
                         print(f"Loaded related account: {related_account.get('account_name', 'Unknown')}")
                 except Exception as e:
                     print(f"Error loading related account: {e}")
             
-            # Try to load related loans with better filtering
-            loan_endpoints = [
-                f"/api/loans/?contact_id={contact_id}",
-                f"/api/loans?contact_id={contact_id}",
-                f"/api/contacts/{contact_id}/loans"
-            ]
-            
-            for endpoint in loan_endpoints:
-                try:
-                    print(f"Trying loan endpoint: {fastapi_url}{endpoint}")
-                    loan_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    print(f"Loan endpoint response: {loan_response.status_code}")
-                    
-                    if loan_response.status_code == 200:
-                        loan_data = loan_response.json()
-                        print(f"Raw loan data type: {type(loan_data)}")
-                        
-                        # Handle different response formats
-                        if isinstance(loan_data, dict):
-                            related_loans = loan_data.get('items', [])
-                        elif isinstance(loan_data, list):
-                            related_loans = loan_data
-                        else:
-                            related_loans = []
-                        
-                        print(f"Parsed {len(related_loans)} loans from {endpoint}")
-                        
-                        # Additional client-side filtering as backup
-                        if related_loans:
-                            # Filter loans that actually belong to this contact
-                            filtered_loans = []
-                            for loan in related_loans:
-                                loan_contact_id = loan.get('contact_id')
-                                print(f"Loan {loan.get('id', 'unknown')} contact_id: {loan_contact_id}, target: {contact_id}")
-                                if loan_contact_id == contact_id:
-                                    filtered_loans.append(loan)
-                            
-                            related_loans = filtered_loans
-                            print(f"After filtering: {len(related_loans)} loans belong to contact {contact_id}")
-                        
-                        break
-                except Exception as e:
-                    print(f"Error loading loans from {endpoint}: {e}")
-                    continue
+            # Load related loans through the learned endpoint shape for contact loans
+            loan_data = resolver.fetch('contact.loans', fastapi_url, headers, contact_id)
+            if loan_data is not None:
+                # Handle different response formats
+                if isinstance(loan_data, dict):
+                    related_loans = loan_data.get('items', [])
+                elif isinstance(loan_data, list):
+                    related_loans = loan_data
+                
+                # Additional client-side filtering as backup
+                related_loans = [loan for loan in related_loans if loan.get('contact_id') == contact_id]
+                print(f"Loaded {len(related_loans)} loans belonging to contact {contact_id}")
             
             # If no loans found through contact_id, try through account relationship
-            if 'related_loans' not in locals() or not related_loans:
+            if not related_loans and related_account and related_account.get('id'):
                 print("No loans found by contact_id, trying through account relationship...")
-                if related_account and related_account.get('id'):
-                    account_id = related_account['id']
-                    account_loan_endpoints = [
-                        f"/api/loans/?account_id={account_id}",
-                        f"/api/loans?account_id={account_id}",
-                        f"/api/accounts/{account_id}/loans"
-                    ]
-                    
-                    for endpoint in account_loan_endpoints:
-                        try:
-                            print(f"Trying account loan endpoint: {fastapi_url}{endpoint}")
-                            loan_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                            
-                            if loan_response.status_code == 200:
-                                loan_data = loan_response.json()
-                                if isinstance(loan_data, dict):
-                                    account_loans = loan_data.get('items', [])
-                                elif isinstance(loan_data, list):
-                                    account_loans = loan_data
-                                else:
-                                    account_loans = []
-                                
-                                print(f"Found {len(account_loans)} loans through account {account_id}")
-                                
-                                # Use account loans if we didn't find any through contact
-                                if not related_loans:
-                                    related_loans = account_loans
-                                    print(f"Using account loans as fallback: {len(related_loans)} loans")
-                                break
-                        except Exception as e:
-                            print(f"Error loading account loans from {endpoint}: {e}")
-                            continue
-            
-            # If still no loans found, set empty list
-            if 'related_loans' not in locals():
-                related_loans = []
-                print(f"No loans found for contact {contact_id} through any method")
+                account_id = related_account['id']
+                loan_data = resolver.fetch('account.loans', fastapi_url, headers, account_id)
+                if loan_data is not None:
+                    if isinstance(loan_data, dict):
+                        related_loans = loan_data.get('items', [])
+                    elif isinstance(loan_data, list):
+                        related_loans = loan_data
+                    print(f"Using account loans as fallback: {len(related_loans)} loans")
             
             # Alternative: Load all loans and filter client-side (fallback)
             if not related_loans:
                 try:
                     print("Final fallback: Loading all loans and filtering client-side")
-                    all_loans_response = requests.get(f"{fastapi_url}/api/loans/", headers=headers, timeout=10)
-                    if all_loans_response.status_code == 200:
-                        all_loans_data = all_loans_response.json()
-                        all_loans = all_loans_data.get('items', all_loans_data) if isinstance(all_loans_data, dict) else all_loans_data
-                        
-                        # Filter loans for this contact OR this contact's account
-                        contact_account_id = related_account.get('id') if related_account else None
-                        related_loans = []
-                        
-                        for loan in all_loans:
-                            # Match by contact_id OR by account_id if contact has an account
-                            if (loan.get('contact_id') == contact_id or 
-                                (contact_account_id and loan.get('account_id') == contact_account_id)):
-                                related_loans.append(loan)
-                        
-                        print(f"Client-side filtering found {len(related_loans)} loans for contact {contact_id}")
+                    # Filter loans for this contact OR this contact's account, a page at a time
+                    contact_account_id = related_account.get('id') if related_account else None
+                    related_loans = []
+                    
+                    for loan in iter_rows(fastapi_url, '/api/loans/', headers, timeout=10):
+                        # Match by contact_id OR by account_id if contact has an account
+                        if (loan.get('contact_id') == contact_id or 
+                            (contact_account_id and loan.get('account_id') == contact_account_id)):
+                            related_loans.append(loan)
+                    
+                    print(f"Client-side filtering found {len(related_loans)} loans for contact {contact_id}")
                 except Exception as e:
                     print(f"Fallback filtering failed: {e}")
                     related_loans = []
             
-            # Try to load related assets
-            asset_endpoints = [
-                f"/api/assets/?contact_id={contact_id}",
-                f"/api/assets?contact_id={contact_id}",
-                f"/api/contacts/{contact_id}/assets"
-            ]
+            # Load related assets and cases through their learned endpoint shapes
+            asset_data = resolver.fetch('contact.assets', fastapi_url, headers, contact_id)
+            if asset_data is not None:
+                related_assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
+                print(f"Loaded {len(related_assets)} related assets")
             
-            for endpoint in asset_endpoints:
-                try:
-                    asset_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if asset_response.status_code == 200:
-                        asset_data = asset_response.json()
-                        related_assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
-                        print(f"Loaded {len(related_assets)} related assets")
-                        break
-                except Exception as e:
-                    print(f"Error loading assets from {endpoint}: {e}")
-                    continue
-            
-            # Try to load related cases
-            case_endpoints = [
-                f"/api/cases/?contact_id={contact_id}",
-                f"/api/cases?contact_id={contact_id}",
-                f"/api/contacts/{contact_id}/cases"
-            ]
-            
-            for endpoint in case_endpoints:
-                try:
-                    case_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                    if case_response.status_code == 200:
-                        case_data = case_response.json()
-                        related_cases = case_data.get('items', case_data) if isinstance(case_data, dict) else case_data
-                        print(f"Loaded {len(related_cases)} related cases")
-                        break
-                except Exception as e:
-                    print(f"Error loading cases from {endpoint}: {e}")
-                    continue
+            case_data = resolver.fetch('contact.cases', fastapi_url, headers, contact_id)
+            if case_data is not None:
+                related_cases = case_data.get('items', case_data) if isinstance(case_data, dict) else case_data
+                print(f"Loaded {len(related_cases)} related cases")
             
             print("About to render template...")  # Debug
             print(f"Data summary: account={related_account is not None}, loans={len(related_loans)}, assets={len(related_assets)}, cases={len(related_cases)}")
@@ -1539,18 +1290,19 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Fetch contact details
-            response = requests.get(f"{fastapi_url}/api/contacts/{contact_id}", headers=headers)
+            try:
+                contact = ContactRepository(fastapi_url, headers).get(contact_id)
+            except requests.HTTPError:
+                contact = None
             
-            if response.status_code != 200:
+            if contact is None:
                 flash('Contact not found', 'error')
                 return redirect(url_for('contacts_index'))
             
-            contact = response.json()
-            
             # Load accounts for dropdown
             accounts = []
             try:
-                accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
+                accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
                 if accounts_response.status_code == 200:
                     accounts_data = accounts_response.json()
                     accounts = accounts_data.get('items', accounts_data) if isinstance(accounts_data, dict) else accounts_data
@@ -1589,20 +1341,14 @@ def create_app():
             if not headers:
                 return redirect(url_for('auth.login'))
             
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.put(
-                f"{fastapi_url}/api/contacts/{contact_id}",
-                headers=headers,
-                json=contact_data,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                flash('Contact updated successfully!', 'success')
-                return redirect(url_for('contacts_detail', contact_id=contact_id))
-            else:
+            try:
+                ContactRepository(app.config['FASTAPI_BASE_URL'], headers).update(contact_id, contact_data)
+            except requests.HTTPError:
                 flash('Error updating contact. Please try again.', 'error')
                 return redirect(url_for('contacts_edit', contact_id=contact_id))
+            
+            flash('Contact updated successfully!', 'success')
+            return redirect(url_for('contacts_detail', contact_id=contact_id))
                 
         except Exception as e:
             print(f"Error updating contact: {e}")
@@ -1640,52 +1386,25 @@ def create_app():
             skip = (page - 1) * per_page
             
             # Get access token from session
-            access_token = session.get('access_token')
-            if not access_token:
+            headers = get_auth_headers()
+            if not headers:
                 flash('Authentication required', 'error')
                 return redirect(url_for('auth.login'))
             
-            # Prepare API request headers
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Build query parameters for FastAPI
-            params = {
-                'skip': skip,
-                'limit': per_page
-            }
-            
-            if search:
-                params['search'] = search
-            if make:
-                params['Make'] = make
-            if status:
-                params['status'] = status
-            
-            print(f"🔍 Assets search params: {params}")
+            # Filters for FastAPI; empty ones are left out of the query
+            filters = {'search': search, 'Make': make, 'status': status}
+            print(f"🔍 Assets search filters: {filters}")
             
-            # Call FastAPI backend to get assets (with longer timeout)
+            # Call FastAPI backend to get assets (the repository allows assets a longer timeout)
             fastapi_url = app.config['FASTAPI_BASE_URL']
+            repository = AssetRepository(fastapi_url, headers)
             try:
-                response = requests.get(
-                    f"{fastapi_url}/api/assets/",
-                    headers=headers,
-                    params=params,
-                    timeout=30  # Increased timeout for assets call
-                )
+                assets_page = repository.list(skip=skip, limit=per_page, **filters)
             except requests.exceptions.ReadTimeout:
                 print("❌ Assets API timed out, trying with smaller page size")
                 # Try with smaller page size if it times out
-                params['limit'] = 25
                 try:
-                    response = requests.get(
-                        f"{fastapi_url}/api/assets/",
-                        headers=headers,
-                        params=params,
-                        timeout=30
-                    )
+                    assets_page = repository.list(skip=skip, limit=25, **filters)
                 except requests.exceptions.ReadTimeout:
                     print("❌ Assets API still timing out with smaller page size")
                     flash('Database query is taking too long. Please try a more specific search.', 'warning')
@@ -1700,246 +1419,165 @@ def create_app():
                                         total=0,
                                         has_prev=False,
                                         has_next=False)
+            except Unauthorized:
+                flash('Session expired. Please log in again.', 'error')
+                return redirect(url_for('auth.login'))
+            except requests.HTTPError as e:
+                print(f"FastAPI error: {e}")
+                flash('Error loading assets. Please try again.', 'error')
+                return render_template('assets/index.html', 
+                                    assets=[], 
+                                    makes=[],
+                                    search=search,
+                                    make=make,
+                                    status=status,
+                                    page=1,
+                                    total_pages=1,
+                                    total=0,
+                                    has_prev=False,
+                                    has_next=False)
             
-            print(f"📡 FastAPI response status: {response.status_code}")
+            assets = assets_page.items
+            total = assets_page.total
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle both list and dictionary responses
-                if isinstance(data, list):
-                    assets = data
-                    total = len(data)
-                elif isinstance(data, dict):
-                    assets = data.get('items', [])
-                    total = data.get('total', len(assets))
-                else:
-                    assets = []
-                    total = 0
-                
-                print(f"📊 Assets loaded: {len(assets)} of {total} total")
-                
-                # ===============================================
-                # SMART LOAN MATCHING FOR PRINCIPAL BALANCE
-                # Only fetch loans for the current assets being displayed
-                # ===============================================
-                
-                print(f"💰 Starting targeted loan matching for {len(assets)} assets...")
-                
-                # Extract unique account IDs from current assets
-                account_ids = list(set([asset.get('account_id') for asset in assets if asset.get('account_id')]))
-                print(f"🎯 Found {len(account_ids)} unique account IDs to search: {account_ids[:5]}...")
-                
-                # Initialize all assets with None principal balance
-                for asset in assets:
-                    asset['principal_balance'] = None
-                    asset['loan_principal_balance'] = None
-                    asset['match_method'] = None
-                
-                if account_ids:
-                    try:
-                        # Try to get loans for these specific accounts only
-                        matched_loans = []
-                        successful_accounts = 0
+            print(f"📊 Assets loaded: {len(assets)} of {total} total")
+            
+            # ===============================================
+            # SMART LOAN MATCHING FOR PRINCIPAL BALANCE
+            # Only fetch loans for the current assets being displayed
+            # ===============================================
+            
+            print(f"💰 Starting targeted loan matching for {len(assets)} assets...")
+            
+            # Extract unique account IDs from current assets
+            account_ids = list(set([asset.get('account_id') for asset in assets if asset.get('account_id')]))
+            print(f"🎯 Found {len(account_ids)} unique account IDs to search: {account_ids[:5]}...")
+            
+            # Initialize all assets with None principal balance
+            for asset in assets:
+                asset['principal_balance'] = None
+                asset['loan_principal_balance'] = None
+                asset['match_method'] = None
+            
+            if account_ids:
+                try:
+                    # Fetch loans for every account on the page in one batched call
+                    # (parallel per-account calls if the backend lacks account_ids)
+                    matched_loans = fetch_for_accounts(
+                        fastapi_url,
+                        '/api/loans/',
+                        headers,
+                        account_ids,
+                        params={'is_active': True},
+                        per_account=50,  # Should be plenty per account
+                        timeout=8
+                    )
+                    
+                    print(f"📊 Loan search complete:")
+                    print(f"   - Searched {len(account_ids)} accounts")
+                    print(f"   - Found {len(matched_loans)} total loans")
+                    
+                    if matched_loans:
+                        # Show sample loan structure for debugging
+                        sample_loan = matched_loans[0]
+                        print(f"🔍 Sample loan structure:")
+                        print(f"   Keys: {list(sample_loan.keys())}")
+                        print(f"   Sample: id={sample_loan.get('id')}, account_id={sample_loan.get('account_id')}, principal_balance={sample_loan.get('principal_balance')}")
                         
-                        for account_id in account_ids:
-                            try:
-                                print(f"🔍 Searching loans for account {account_id}...")
-                                
-                                # Query loans API for this specific account
-                                loans_response = requests.get(
-                                    f"{fastapi_url}/api/loans/",
-                                    headers=headers,
-                                    params={
-                                        'account_id': account_id,
-                                        'limit': 50,  # Should be plenty per account
-                                        'is_active': True
-                                    },
-                                    timeout=8  # Shorter timeout per account
-                                )
-                                
-                                if loans_response.status_code == 200:
-                                    loans_data = loans_response.json()
-                                    
-                                    # Handle both list and dict responses
-                                    if isinstance(loans_data, dict):
-                                        account_loans = loans_data.get('items', [])
-                                    elif isinstance(loans_data, list):
-                                        account_loans = loans_data
-                                    else:
-                                        account_loans = []
-                                    
-                                    if account_loans:
-                                        matched_loans.extend(account_loans)
-                                        successful_accounts += 1
-                                        print(f"   ✅ Found {len(account_loans)} loans for account {account_id}")
-                                    else:
-                                        print(f"   ⚪ No loans found for account {account_id}")
-                                
-                                elif loans_response.status_code == 404:
-                                    print(f"   ⚪ No loans found for account {account_id} (404)")
-                                
-                                else:
-                                    print(f"   ❌ Error for account {account_id}: {loans_response.status_code}")
-                            
-                            except requests.exceptions.ReadTimeout:
-                                print(f"   ⏱️ Timeout for account {account_id} - skipping")
-                                continue
+                        # Create lookup for efficient matching
+                        loans_by_account = {}
+                        loans_by_asset_id = {}
+                        
+                        for loan in matched_loans:
+                            # Group by account_id
+                            if loan.get('account_id'):
+                                account_id = loan['account_id']
+                                if account_id not in loans_by_account:
+                                    loans_by_account[account_id] = []
+                                loans_by_account[account_id].append(loan)
                             
-                            except Exception as e:
-                                print(f"   ❌ Exception for account {account_id}: {e}")
-                                continue
+                            # Direct asset_id matching (if available)
+                            if loan.get('asset_id'):
+                                loans_by_asset_id[loan['asset_id']] = loan
                         
-                        print(f"📊 Loan search complete:")
-                        print(f"   - Searched {len(account_ids)} accounts")
-                        print(f"   - Successfully got data from {successful_accounts} accounts")
-                        print(f"   - Found {len(matched_loans)} total loans")
+                        print(f"📋 Lookup tables created:")
+                        print(f"   - Account lookup: {len(loans_by_account)} accounts")
+                        print(f"   - Direct asset lookup: {len(loans_by_asset_id)} assets")
                         
-                        if matched_loans:
-                            # Show sample loan structure for debugging
-                            sample_loan = matched_loans[0]
-                            print(f"🔍 Sample loan structure:")
-                            print(f"   Keys: {list(sample_loan.keys())}")
-                            print(f"   Sample: id={sample_loan.get('id')}, account_id={sample_loan.get('account_id')}, principal_balance={sample_loan.get('principal_balance')}")
-                            
-                            # Create lookup for efficient matching
-                            loans_by_account = {}
-                            loans_by_asset_id = {}
+                        # Match loans to assets
+                        match_count = 0
+                        
+                        for asset in assets:
+                            asset_id = asset.get('id')
+                            asset_account_id = asset.get('account_id')
                             
-                            for loan in matched_loans:
-                                # Group by account_id
-                                if loan.get('account_id'):
-                                    account_id = loan['account_id']
-                                    if account_id not in loans_by_account:
-                                        loans_by_account[account_id] = []
-                                    loans_by_account[account_id].append(loan)
-                                
-                                # Direct asset_id matching (if available)
-                                if loan.get('asset_id'):
-                                    loans_by_asset_id[loan['asset_id']] = loan
+                            matched_loan = None
+                            match_method = None
                             
-                            print(f"📋 Lookup tables created:")
-                            print(f"   - Account lookup: {len(loans_by_account)} accounts")
-                            print(f"   - Direct asset lookup: {len(loans_by_asset_id)} assets")
+                            # Strategy 1: Direct asset-loan relationship
+                            if asset_id in loans_by_asset_id:
+                                matched_loan = loans_by_asset_id[asset_id]
+                                match_method = "direct_asset"
                             
-                            # Match loans to assets
-                            match_count = 0
+                            # Strategy 2: Account-based matching
+                            elif asset_account_id in loans_by_account:
+                                account_loans = loans_by_account[asset_account_id]
+                                if account_loans:
+                                    # Use loan with highest principal balance
+                                    matched_loan = max(account_loans, key=lambda x: float(x.get('principal_balance', 0) or 0))
+                                    match_method = "account_based"
                             
-                            for asset in assets:
-                                asset_id = asset.get('id')
-                                asset_account_id = asset.get('account_id')
-                                
-                                matched_loan = None
-                                match_method = None
-                                
-                                # Strategy 1: Direct asset-loan relationship
-                                if asset_id in loans_by_asset_id:
-                                    matched_loan = loans_by_asset_id[asset_id]
-                                    match_method = "direct_asset"
-                                
-                                # Strategy 2: Account-based matching
-                                elif asset_account_id in loans_by_account:
-                                    account_loans = loans_by_account[asset_account_id]
-                                    if account_loans:
-                                        # Use loan with highest principal balance
-                                        matched_loan = max(account_loans, key=lambda x: float(x.get('principal_balance', 0) or 0))
-                                        match_method = "account_based"
-                                
-                                # Apply the match
-                                if matched_loan:
-                                    principal_balance = matched_loan.get('principal_balance')
-                                    if principal_balance is not None:
-                                        try:
-                                            balance_float = float(principal_balance)
-                                            asset['principal_balance'] = balance_float
-                                            asset['loan_principal_balance'] = balance_float
-                                            asset['matched_loan_id'] = matched_loan.get('id')
-                                            asset['matched_loan_contract'] = matched_loan.get('contract_number')
-                                            asset['match_method'] = match_method
-                                            match_count += 1
-                                            
-                                            print(f"   💰 Asset {asset_id} → ${balance_float:,.2f} (via {match_method})")
+                            # Apply the match
+                            if matched_loan:
+                                principal_balance = matched_loan.get('principal_balance')
+                                if principal_balance is not None:
+                                    try:
+                                        balance_float = float(principal_balance)
+                                        asset['principal_balance'] = balance_float
+                                        asset['loan_principal_balance'] = balance_float
+                                        asset['matched_loan_id'] = matched_loan.get('id')
+                                        asset['matched_loan_contract'] = matched_loan.get('contract_number')
+                                        asset['match_method'] = match_method
+                                        match_count += 1
                                         
-                                        except (ValueError, TypeError) as e:
-                                            print(f"   ❌ Invalid balance for asset {asset_id}: {principal_balance} ({e})")
-                            
-                            print(f"🎉 FINAL RESULT: {match_count} of {len(assets)} assets matched with principal balances")
+                                        print(f"   💰 Asset {asset_id} → ${balance_float:,.2f} (via {match_method})")
+                                    
+                                    except (ValueError, TypeError) as e:
+                                        print(f"   ❌ Invalid balance for asset {asset_id}: {principal_balance} ({e})")
                         
-                        else:
-                            print(f"⚪ No loans found for any of the displayed assets")
+                        print(f"🎉 FINAL RESULT: {match_count} of {len(assets)} assets matched with principal balances")
                     
-                    except Exception as e:
-                        print(f"❌ Error in loan matching process: {e}")
-                        import traceback
-                        print(f"❌ Traceback: {traceback.format_exc()}")
-                
-                else:
-                    print(f"⚪ No account IDs found in current assets - cannot match loans")
+                    else:
+                        print(f"⚪ No loans found for any of the displayed assets")
                 
-                # Get unique makes for filter dropdown (with shorter timeout)
-                makes = []
-                try:
-                    makes_response = requests.get(
-                        f"{fastapi_url}/api/assets/",
-                        headers=headers,
-                        params={'skip': 0, 'limit': 100},  # Much smaller sample for makes
-                        timeout=10
-                    )
-                    if makes_response.status_code == 200:
-                        makes_data = makes_response.json()
-                        
-                        if isinstance(makes_data, list):
-                            all_assets_for_makes = makes_data
-                        elif isinstance(makes_data, dict):
-                            all_assets_for_makes = makes_data.get('items', [])
-                        else:
-                            all_assets_for_makes = []
-                        
-                        makes = sorted(list(set(
-                            asset.get('Make', '') for asset in all_assets_for_makes 
-                            if asset.get('Make') and asset.get('Make') != 'None' and asset.get('Make').strip()
-                        )))
-                        
                 except Exception as e:
-                    print(f"Error getting makes: {e}")
-                    makes = []
-                
-                # Calculate pagination info
-                total_pages = max(1, (total + per_page - 1) // per_page)
-                has_prev = page > 1
-                has_next = page < total_pages
-                
-                return render_template('assets/index.html', 
-                                    assets=assets,
-                                    makes=makes,
-                                    search=search,
-                                    make=make,
-                                    status=status,
-                                    page=page,
-                                    per_page=per_page,
-                                    total=total,
-                                    total_pages=total_pages,
-                                    has_prev=has_prev,
-                                    has_next=has_next)
-            
-            elif response.status_code == 401:
-                flash('Session expired. Please log in again.', 'error')
-                return redirect(url_for('auth.login'))
+                    print(f"❌ Error in loan matching process: {e}")
+                    import traceback
+                    print(f"❌ Traceback: {traceback.format_exc()}")
             
             else:
-                print(f"FastAPI error: {response.status_code} - {response.text}")
-                flash('Error loading assets. Please try again.', 'error')
-                return render_template('assets/index.html', 
-                                    assets=[], 
-                                    makes=[],
-                                    search=search,
-                                    make=make,
-                                    status=status,
-                                    page=1,
-                                    total_pages=1,
-                                    total=0,
-                                    has_prev=False,
-                                    has_next=False)
+                print(f"⚪ No account IDs found in current assets - cannot match loans")
+            
+            # Unique makes for the filter dropdown come from the shared reference-data cache
+            makes = repository.makes()
+            
+            # Calculate pagination info
+            total_pages = max(1, (total + per_page - 1) // per_page)
+            has_prev = page > 1
+            has_next = page < total_pages
+            
+            return render_template('assets/index.html', 
+                                assets=assets,
+                                makes=makes,
+                                search=search,
+                                make=make,
+                                status=status,
+                                page=page,
+                                per_page=per_page,
+                                total=total,
+                                total_pages=total_pages,
+                                has_prev=has_prev,
+                                has_next=has_next)
         
         except ValueError as e:
             print(f"❌ Invalid parameter: {e}")
@@ -1978,7 +1616,7 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Load accounts for dropdown
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
             
             accounts = []
             
@@ -2046,25 +1684,18 @@ def create_app():
             # Remove None values
             asset_data = {k: v for k, v in asset_data.items() if v is not None and v != ''}
             
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.post(
-                f"{fastapi_url}/api/assets/",
-                headers=headers,
-                json=asset_data,
-                timeout=10
-            )
-            
-            if response.status_code == 401:
+            try:
+                AssetRepository(app.config['FASTAPI_BASE_URL'], headers).create(asset_data)
+            except Unauthorized:
                 session.clear()
                 return redirect(url_for('auth.login'))
-            
-            if response.status_code in [200, 201]:
-                flash('Asset created successfully!', 'success')
-                return redirect(url_for('assets_index'))
-            else:
+            except requests.HTTPError:
                 flash('Error creating asset. Please try again.', 'error')
                 return redirect(url_for('assets_new'))
             
+            flash('Asset created successfully!', 'success')
+            return redirect(url_for('assets_index'))
+            
         except (ValueError, TypeError) as e:
             flash(f'Invalid form data: {str(e)}', 'error')
             return redirect(url_for('assets_new'))
@@ -2088,18 +1719,16 @@ def create_app():
             print(f"🔍 DEBUG: Loading asset details for ID: {asset_id}")
             
             # Load asset details
-            asset_response = requests.get(
-                f"{fastapi_url}/api/assets/{asset_id}",
-                headers=headers,
-                timeout=10
-            )
+            try:
+                asset = AssetRepository(fastapi_url, headers).get(asset_id, timeout=10)
+            except requests.HTTPError as e:
+                print(f"❌ Asset API error: {e}")
+                asset = None
             
-            if asset_response.status_code != 200:
-                print(f"❌ Asset API error: {asset_response.status_code} - {asset_response.text}")
+            if asset is None:
                 flash(f'Asset not found (ID: {asset_id}).', 'error')
                 return redirect(url_for('assets_index'))
             
-            asset = asset_response.json()
             print(f"✅ Asset loaded: {asset.get('Year', '')} {asset.get('Make', '')} {asset.get('Model', '')}")
             print(f"🔍 Asset details:")
             print(f"   - Asset ID: {asset.get('id')}")
@@ -2122,7 +1751,7 @@ def create_app():
             # Load related account
             if asset.get('account_id'):
                 try:
-                    account_response = requests.get(
+                    account_response = gateway.get(
                         f"{fastapi_url}/api/accounts/{asset['account_id']}", 
                         headers=headers, 
                         timeout=10  # Increased timeout
@@ -2138,7 +1767,7 @@ def create_app():
             # Load related contact
             if asset.get('contact_id'):
                 try:
-                    contact_response = requests.get(
+                    contact_response = gateway.get(
                         f"{fastapi_url}/api/contacts/{asset['contact_id']}", 
                         headers=headers, 
                         timeout=10  # Increased timeout
@@ -2158,7 +1787,7 @@ def create_app():
             if asset.get('loan_id'):
                 print(f"🔍 Trying direct loan_id: {asset.get('loan_id')}")
                 try:
-                    loan_response = requests.get(
+                    loan_response = gateway.get(
                         f"{fastapi_url}/api/loans/{asset['loan_id']}", 
                         headers=headers, 
                         timeout=10
@@ -2176,7 +1805,7 @@ def create_app():
                 # Use the main loans endpoint with parameters instead of trying different endpoints
                 try:
                     print(f"🔍 Trying main endpoint: {fastapi_url}/api/loans/")
-                    loan_response = requests.get(
+                    loan_response = gateway.stream_get(
                         f"{fastapi_url}/api/loans/",
                         headers=headers,
                         params={'account_id': asset['account_id']},
@@ -2185,11 +1814,12 @@ def create_app():
                     print(f"   Response: {loan_response.status_code}")
                     
                     if loan_response.status_code == 200:
-                        loan_data = loan_response.json()
-                        if isinstance(loan_data, dict):
-                            loans = loan_data.get('items', [])
-                        elif isinstance(loan_data, list):
-                            loans = loan_data
+                        # Matched as the rows stream in - a backend that ignores the
+                        # filter sends every loan, and only this account's are kept
+                        loans = [
+                            loan for loan in iter_items(loan_response)
+                            if loan.get('account_id') == asset['account_id']
+                        ]
                         
                         if loans:
                             print(f"✅ Found account-based loans: {len(loans)} loans")
@@ -2197,6 +1827,7 @@ def create_app():
                             print(f"   Empty response from main endpoint")
                     elif loan_response.status_code == 401:
                         print(f"   ❌ 401 Unauthorized - checking session token")
+                        loan_response.close()
                         # Try to refresh token or redirect to login
                         session.clear()
                         flash('Session expired. Please log in again.', 'error')
@@ -2207,92 +1838,18 @@ def create_app():
                 except Exception as e:
                     print(f"   Exception: {e}")
             
-            # Strategy 3: Vehicle matching (get all loans and match by vehicle details) - FIXED
+            # Strategy 3: Vehicle matching against the in-process loan index (VIN / account probe)
             if not loans:
                 print(f"🔍 Trying vehicle detail matching...")
                 try:
-                    all_loans_response = requests.get(
-                        f"{fastapi_url}/api/loans/", 
-                        headers=headers, 
-                        timeout=20  # Increased timeout for all loans
-                    )
-                    print(f"   All loans response: {all_loans_response.status_code}")
-                    
-                    if all_loans_response.status_code == 200:
-                        all_loans_data = all_loans_response.json()
-                        all_loans = all_loans_data.get('items', all_loans_data) if isinstance(all_loans_data, dict) else all_loans_data
-                        
-                        print(f"   Total loans in system: {len(all_loans)}")
-                        
-                        # Get asset identifiers for matching
-                        asset_vin = str(asset.get('VIN') or asset.get('Vin') or '').upper().strip()
-                        asset_year = str(asset.get('Year') or '').strip()
-                        asset_make = str(asset.get('Make') or '').upper().strip()
-                        asset_model = str(asset.get('Model') or '').upper().strip()
-                        asset_account_id = asset.get('account_id')
-                        
-                        print(f"   Asset matching criteria:")
-                        print(f"     VIN: '{asset_vin}'")
-                        print(f"     Year: '{asset_year}'")
-                        print(f"     Make: '{asset_make}'")
-                        print(f"     Model: '{asset_model}'")
-                        print(f"     Account: {asset_account_id}")
-                        
-                        matched_loans = []
-                        
-                        for loan in all_loans:
-                            match_score = 0
-                            match_reasons = []
-                            
-                            # Method 1: VIN matching (highest priority)
-                            loan_vin = str(loan.get('vehicle_vin') or loan.get('VIN') or '').upper().strip()
-                            if asset_vin and loan_vin and asset_vin == loan_vin:
-                                match_score += 10
-                                match_reasons.append("VIN")
-                            
-                            # Method 2: Account + Vehicle details matching
-                            if asset_account_id and loan.get('account_id') == asset_account_id:
-                                match_score += 3
-                                match_reasons.append("Account")
-                                
-                                # Check vehicle details
-                                loan_year = str(loan.get('vehicle_year') or loan.get('Year') or '').strip()
-                                loan_make = str(loan.get('vehicle_make') or loan.get('Make') or '').upper().strip()
-                                loan_model = str(loan.get('vehicle_model') or loan.get('Model') or '').upper().strip()
-                                
-                                if asset_year and loan_year and asset_year == loan_year:
-                                    match_score += 2
-                                    match_reasons.append("Year")
-                                
-                                if asset_make and loan_make and asset_make == loan_make:
-                                    match_score += 2
-                                    match_reasons.append("Make")
-                                
-                                if asset_model and loan_model and asset_model == loan_model:
-                                    match_score += 2
-                                    match_reasons.append("Model")
-                            
-                            # Method 3: Contact matching
-                            if asset.get('contact_id') and loan.get('contact_id') == asset.get('contact_id'):
-                                match_score += 2
-                                match_reasons.append("Contact")
-                            
-                            # Accept loans with match score >= 5 (VIN match or Account + 2 vehicle details)
-                            if match_score >= 5:
-                                matched_loans.append(loan)
-                                print(f"   ✅ Matched loan {loan.get('contract_number', loan.get('id'))} (score: {match_score}, reasons: {', '.join(match_reasons)})")
-                        
-                        loans = matched_loans
-                        print(f"✅ Vehicle matching found: {len(loans)} loans")
-                    
-                    elif all_loans_response.status_code == 401:
-                        print(f"   ❌ 401 Unauthorized getting all loans - session expired")
-                        session.clear()
-                        flash('Session expired. Please log in again.', 'error')
-                        return redirect(url_for('auth.login'))
+                    matches = loan_index.match(asset, fastapi_url, headers, scope=get_cache_scope())
+                    if matches is None:
+                        print(f"   Loan lookup failed - skipping vehicle matching")
                     else:
-                        print(f"   Failed to get all loans: {all_loans_response.status_code}")
-                        
+                        for loan, match_score, match_reasons in matches:
+                            print(f"   ✅ Matched loan {loan.get('contract_number', loan.get('id'))} (score: {match_score}, reasons: {', '.join(match_reasons)})")
+                        loans = [loan for loan, _, _ in matches]
+                        print(f"✅ Vehicle matching found: {len(loans)} loans")
                 except Exception as e:
                     print(f"❌ Vehicle matching failed: {e}")
             
@@ -2304,46 +1861,42 @@ def create_app():
                 loan_ids = [loan.get('id') for loan in loans if loan.get('id')]
                 print(f"🔍 Searching cases by loan IDs: {loan_ids}")
                 
+                def find_cases(params):
+                    response = gateway.get(f"{fastapi_url}/api/cases/", headers=headers, params=params, timeout=20)
+                    response.raise_for_status()
+                    data = response.json()
+                    return data.get('items', []) if isinstance(data, dict) else data
+                
                 try:
-                    all_cases_response = requests.get(
-                        f"{fastapi_url}/api/cases/", 
-                        headers=headers, 
-                        timeout=20  # Increased timeout
-                    )
-                    print(f"   All cases response: {all_cases_response.status_code}")
-                    
-                    if all_cases_response.status_code == 200:
-                        all_cases_data = all_cases_response.json()
-                        all_cases = all_cases_data.get('items', all_cases_data) if isinstance(all_cases_data, dict) else all_cases_data
-                        
-                        print(f"   Total cases in system: {len(all_cases)}")
-                        
-                        matched_cases = []
-                        for case in all_cases:
-                            case_loan_id = case.get('loan_id')
-                            case_account_id = case.get('account_id')
-                            
-                            # Match by loan ID
-                            if case_loan_id in loan_ids:
+                    # One filtered query per loan, side by side - rows are checked in case
+                    # the backend ignores the filter
+                    matched_cases = []
+                    for loan_id, loan_cases in zip(loan_ids, gather(*[
+                        (lambda loan_id=loan_id: find_cases({'loan_id': loan_id})) for loan_id in loan_ids
+                    ])):
+                        for case in loan_cases:
+                            if case.get('loan_id') == loan_id:
                                 matched_cases.append(case)
-                                print(f"   ✅ Matched case {case.get('case_number', case.get('id'))} via loan {case_loan_id}")
-                            
-                            # Match by account ID as fallback
-                            elif not matched_cases and asset.get('account_id') and case_account_id == asset.get('account_id'):
+                                print(f"   ✅ Matched case {case.get('case_number', case.get('id'))} via loan {loan_id}")
+                    
+                    # Match by account ID as fallback (the first of the account's cases, as before)
+                    if not matched_cases and asset.get('account_id'):
+                        for case in find_cases({'account_id': asset['account_id']}):
+                            if case.get('account_id') == asset['account_id']:
                                 matched_cases.append(case)
-                                print(f"   ✅ Matched case {case.get('case_number', case.get('id'))} via account {case_account_id}")
-                        
-                        cases = matched_cases
-                        print(f"✅ Case matching found: {len(cases)} cases")
+                                print(f"   ✅ Matched case {case.get('case_number', case.get('id'))} via account {asset['account_id']}")
+                                break
                     
-                    elif all_cases_response.status_code == 401:
-                        print(f"   ❌ 401 Unauthorized getting all cases - session expired")
+                    cases = matched_cases
+                    print(f"✅ Case matching found: {len(cases)} cases")
+                
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 401:
+                        print(f"   ❌ 401 Unauthorized searching cases - session expired")
                         session.clear()
                         flash('Session expired. Please log in again.', 'error')
                         return redirect(url_for('auth.login'))
-                    else:
-                        print(f"   Failed to get all cases: {all_cases_response.status_code}")
-                        
+                    print(f"   Failed to search cases: {e}")
                 except Exception as e:
                     print(f"❌ Case matching failed: {e}")
             
@@ -2354,7 +1907,7 @@ def create_app():
                 # Use the main cases endpoint with parameters instead of trying different endpoints
                 try:
                     print(f"🔍 Trying main endpoint: {fastapi_url}/api/cases/")
-                    case_response = requests.get(
+                    case_response = gateway.get(
                         f"{fastapi_url}/api/cases/",
                         headers=headers,
                         params={'account_id': asset['account_id']},
@@ -2424,22 +1977,21 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Fetch asset details
-            response = requests.get(f"{fastapi_url}/api/assets/{asset_id}", headers=headers)
-            
-            if response.status_code == 401:
+            try:
+                asset = AssetRepository(fastapi_url, headers).get(asset_id)
+            except Unauthorized:
                 session.clear()
                 return redirect(url_for('auth.login'))
-            elif response.status_code == 404:
-                flash('Asset not found', 'error')
-                return redirect(url_for('assets_index'))
-            elif response.status_code != 200:
+            except requests.HTTPError:
                 flash('Error loading asset', 'error')
                 return redirect(url_for('assets_index'))
             
-            asset = response.json()
+            if asset is None:
+                flash('Asset not found', 'error')
+                return redirect(url_for('assets_index'))
             
             # Load accounts for dropdown
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
             
             accounts = []
             
@@ -2504,27 +2056,21 @@ def create_app():
             # Remove None values
             asset_data = {k: v for k, v in asset_data.items() if v is not None and v != ''}
             
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.put(
-                f"{fastapi_url}/api/assets/{asset_id}",
-                headers=headers,
-                json=asset_data,
-                timeout=10
-            )
-            
-            if response.status_code == 401:
+            try:
+                AssetRepository(app.config['FASTAPI_BASE_URL'], headers).update(asset_id, asset_data)
+            except Unauthorized:
                 session.clear()
                 return redirect(url_for('auth.login'))
-            elif response.status_code == 404:
+            except NotFound:
                 flash('Asset not found', 'error')
                 return redirect(url_for('assets_index'))
-            elif response.status_code == 200:
-                flash('Asset updated successfully!', 'success')
-                return redirect(url_for('assets_detail', asset_id=asset_id))
-            else:
+            except requests.HTTPError:
                 flash('Error updating asset. Please try again.', 'error')
                 return redirect(url_for('assets_edit', asset_id=asset_id))
             
+            flash('Asset updated successfully!', 'success')
+            return redirect(url_for('assets_detail', asset_id=asset_id))
+            
         except (ValueError, TypeError) as e:
             flash(f'Invalid form data: {str(e)}', 'error')
             return redirect(url_for('assets_edit', asset_id=asset_id))
@@ -2544,22 +2090,21 @@ def create_app():
             if not headers:
                 return redirect(url_for('auth.login'))
             
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.delete(f"{fastapi_url}/api/assets/{asset_id}", headers=headers)
-            
-            if response.status_code == 401:
+            try:
+                AssetRepository(app.config['FASTAPI_BASE_URL'], headers).delete(asset_id)
+            except Unauthorized:
                 session.clear()
                 return redirect(url_for('auth.login'))
-            elif response.status_code == 404:
+            except NotFound:
                 flash('Asset not found', 'error')
                 return redirect(url_for('assets_index'))
-            elif response.status_code == 200:
-                flash('Asset deleted successfully!', 'success')
-                return redirect(url_for('assets_index'))
-            else:
+            except requests.HTTPError:
                 flash('Error deleting asset. Please try again.', 'error')
                 return redirect(url_for('assets_detail', asset_id=asset_id))
             
+            flash('Asset deleted successfully!', 'success')
+            return redirect(url_for('assets_index'))
+            
         except requests.RequestException as e:
             flash(f'Error deleting asset: {str(e)}', 'error')
             return redirect(url_for('assets_detail', asset_id=asset_id))
@@ -2582,19 +2127,35 @@ def create_app():
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
-            # Test 1: Get all assets without search
+            # Test 1: Walk all assets without search - keeping only a sample and
+            # the client-side matches for Test 3, not the whole inventory
             print(f"🔍 TEST 1: Getting all assets")
-            all_assets_response = requests.get(f"{fastapi_url}/api/assets/", headers=headers, timeout=10)
+            search_lower = search_term.lower()
+            total_assets = 0
+            sample_assets = []
+            client_matches = []
+            for asset in iter_rows(fastapi_url, '/api/assets/', headers, timeout=10):
+                total_assets += 1
+                if len(sample_assets) < 3:
+                    sample_assets.append(asset)
+                if search_term:
+                    # Check various fields
+                    matches = [
+                        str(asset.get('VIN', '')).lower(),
+                        str(asset.get('Vin', '')).lower(), 
+                        str(asset.get('vin', '')).lower(),
+                        str(asset.get('Make', '')).lower(),
+                        str(asset.get('Model', '')).lower(),
+                        str(asset.get('Year', '')).lower()
+                    ]
+                    if any(search_lower in match for match in matches):
+                        client_matches.append(asset)
             
-            if all_assets_response.status_code == 200:
-                all_assets_data = all_assets_response.json()
-                all_assets = all_assets_data.get('items', all_assets_data) if isinstance(all_assets_data, dict) else all_assets_data
-                
-                print(f"✅ Found {len(all_assets)} total assets")
-                
-                # Show VIN fields in first few assets
-                for i, asset in enumerate(all_assets[:3]):
-                    print(f"Asset {i+1}: ID={asset.get('id')}, VIN={asset.get('VIN')}, Vin={asset.get('Vin')}, vin={asset.get('vin')}")
+            print(f"✅ Found {total_assets} total assets")
+            
+            # Show VIN fields in first few assets
+            for i, asset in enumerate(sample_assets):
+                print(f"Asset {i+1}: ID={asset.get('id')}, VIN={asset.get('VIN')}, Vin={asset.get('Vin')}, vin={asset.get('vin')}")
             
             # Test 2: Search with the problematic VIN
             if search_term:
@@ -2611,7 +2172,7 @@ def create_app():
                 
                 for i, params in enumerate(search_tests):
                     print(f"🔍 Search test {i+1}: {params}")
-                    search_response = requests.get(f"{fastapi_url}/api/assets/", headers=headers, params=params, timeout=10)
+                    search_response = gateway.get(f"{fastapi_url}/api/assets/", headers=headers, params=params, timeout=10)
                     
                     if search_response.status_code == 200:
                         search_data = search_response.json()
@@ -2625,25 +2186,8 @@ def create_app():
                         print(f"❌ Search failed with {params}: {search_response.status_code}")
             
             # Test 3: Client-side search simulation
-            if search_term and all_assets:
+            if search_term and total_assets:
                 print(f"🔍 TEST 3: Client-side search simulation for '{search_term}'")
-                search_lower = search_term.lower()
-                
-                client_matches = []
-                for asset in all_assets:
-                    # Check various fields
-                    matches = [
-                        str(asset.get('VIN', '')).lower(),
-                        str(asset.get('Vin', '')).lower(), 
-                        str(asset.get('vin', '')).lower(),
-                        str(asset.get('Make', '')).lower(),
-                        str(asset.get('Model', '')).lower(),
-                        str(asset.get('Year', '')).lower()
-                    ]
-                    
-                    if any(search_lower in match for match in matches):
-                        client_matches.append(asset)
-                
                 print(f"✅ Client-side search found {len(client_matches)} matches")
                 for match in client_matches[:3]:
                     print(f"  Match: ID={match.get('id')}, VIN={match.get('VIN')}, Vehicle={match.get('Year')} {match.get('Make')} {match.get('Model')}")
@@ -2651,12 +2195,12 @@ def create_app():
             # Return results as JSON for easy viewing
             result = {
                 'search_term': search_term,
-                'total_assets': len(all_assets) if 'all_assets' in locals() else 0,
-                'sample_assets': all_assets[:3] if 'all_assets' in locals() else [],
+                'total_assets': total_assets,
+                'sample_assets': sample_assets,
                 'tests_completed': True
             }
             
-            if search_term and 'client_matches' in locals():
+            if search_term:
                 result['client_search_results'] = len(client_matches)
                 result['client_matches'] = client_matches[:3]
             
@@ -2707,42 +2251,30 @@ def create_app():
             if not headers:
                 return redirect(url_for('auth.login'))
             
-            # Build API query parameters - UPDATED to include financial_institution
-            params = {
-                'skip': (page - 1) * per_page,
-                'limit': per_page
+            # API filters - UPDATED to include financial_institution; empty ones are left out
+            filters = {
+                'search': search,
+                'status': status,
+                'priority': priority,
+                'case_type': case_type,
+                'financial_institution': financial_institution
             }
+            print(f"🔍 Cases API call filters: {filters}")  # Debug logging
             
-            if search:
-                params['search'] = search
-            if status:  # Only add status filter if not empty
-                params['status'] = status
-            if priority:
-                params['priority'] = priority
-            if case_type:
-                params['case_type'] = case_type
-            if financial_institution:
-                params['financial_institution'] = financial_institution
-            
-            print(f"🔍 Cases API call params: {params}")  # Debug logging
+            repository = CaseRepository(app.config['FASTAPI_BASE_URL'], headers)
             
-            # Fetch cases from FastAPI
-            fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.get(
-                f"{fastapi_url}/api/cases/",
-                headers=headers,
-                params=params,
-                timeout=15  # Increased timeout
-            )
-            
-            print(f"📡 FastAPI response status: {response.status_code}")  # Debug logging
+            # The dropdown comes from the shared reference-data cache and doesn't depend on
+            # the cases query, so a cold load runs at the same time
+            institutions_future = request_executor().submit(repository.financial_institutions)
             
-            if response.status_code == 401:
+            # Fetch cases from FastAPI
+            try:
+                cases_page = repository.list(skip=(page - 1) * per_page, limit=per_page, **filters)
+            except Unauthorized:
                 session.clear()
                 return redirect(url_for('auth.login'))
-            
-            if response.status_code != 200:
-                print(f"❌ FastAPI error: {response.status_code} - {response.text}")
+            except requests.HTTPError as e:
+                print(f"❌ FastAPI error: {e}")
                 flash('Error loading cases. Please try again.', 'error')
                 return render_template('cases/index.html', 
                                     cases=[], 
@@ -2758,41 +2290,12 @@ def create_app():
                                     has_prev=False,
                                     has_next=False)
             
-            data = response.json()
-            print(f"📊 Cases data received: {type(data)}")  # Debug logging
-            
-            # Handle both paginated and non-paginated responses
-            if isinstance(data, dict) and 'items' in data:
-                cases = data['items']
-                total = data.get('total', len(cases))
-            else:
-                cases = data if isinstance(data, list) else []
-                total = len(cases)
-            
+            cases = cases_page.items
+            total = cases_page.total
             print(f"✅ Cases loaded: {len(cases)} of {total} total")  # Debug logging
             
-            # Fetch financial institutions for filter dropdown
-            financial_institutions = []
-            try:
-                institutions_response = requests.get(
-                    f"{fastapi_url}/api/cases/stats/financial-institutions",
-                    headers=headers,
-                    timeout=10
-                )
-                if institutions_response.status_code == 200:
-                    institutions_data = institutions_response.json()
-                    financial_institutions = institutions_data.get('financial_institutions', [])
-                    print(f"✅ Financial institutions loaded: {len(financial_institutions)}")
-                else:
-                    print(f"⚠️ Could not load financial institutions: {institutions_response.status_code}")
-            except Exception as e:
-                print(f"❌ Error loading financial institutions: {e}")
-                financial_institutions = []
-            
-            # Calculate pagination
-            total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-            has_prev = page > 1
-            has_next = page < total_pages
+            # Collect the financial institutions for the filter dropdown (fetched alongside the cases)
+            financial_institutions = institutions_future.result()
             
             return render_template('cases/index.html',
                                 cases=cases,
@@ -2803,10 +2306,10 @@ def create_app():
                                 case_type=case_type,
                                 financial_institution=financial_institution,
                                 page=page,
-                                total_pages=total_pages,
+                                total_pages=cases_page.total_pages,
                                 total=total,
-                                has_prev=has_prev,
-                                has_next=has_next)
+                                has_prev=cases_page.has_prev,
+                                has_next=cases_page.has_next)
             
         except requests.RequestException as e:
             print(f"❌ Request error: {str(e)}")
@@ -2856,9 +2359,9 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Load accounts and contacts for dropdowns
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
-            contacts_response = requests.get(f"{fastapi_url}/api/contacts/", headers=headers)
-            loans_response = requests.get(f"{fastapi_url}/api/loans/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            contacts_response = gateway.get(f"{fastapi_url}/api/contacts/", headers=headers)
+            loans_response = gateway.get(f"{fastapi_url}/api/loans/", headers=headers)
             
             accounts = []
             contacts = []
@@ -2913,7 +2416,7 @@ def create_app():
             case_data = {k: v for k, v in case_data.items() if v is not None and v != ''}
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.post(
+            response = gateway.post(
                 f"{fastapi_url}/api/cases/",
                 headers=headers,
                 json=case_data,
@@ -2955,7 +2458,7 @@ def create_app():
             print(f"🔍 Loading case details for ID: {case_id}")
             
             # Fetch case details with relationships
-            response = requests.get(f"{fastapi_url}/api/cases/{case_id}", headers=headers, timeout=15)
+            response = gateway.get(f"{fastapi_url}/api/cases/{case_id}", headers=headers, timeout=15)
             
             if response.status_code == 401:
                 session.clear()
@@ -2973,61 +2476,17 @@ def create_app():
             print(f"🔍 Case relationships: account_id={case.get('account_id')}, contact_id={case.get('contact_id')}, loan_id={case.get('loan_id')}")
             
             # Initialize related data
-            account = None
-            contact = None
-            loan = None
             assets = []
             
-            # Load related account
-            if case.get('account_id'):
-                try:
-                    print(f"🔍 Loading account ID: {case.get('account_id')}")
-                    account_response = requests.get(
-                        f"{fastapi_url}/api/accounts/{case['account_id']}", 
-                        headers=headers, 
-                        timeout=10
-                    )
-                    if account_response.status_code == 200:
-                        account = account_response.json()
-                        print(f"✅ Account loaded: {account.get('account_name', 'Unknown')}")
-                    else:
-                        print(f"❌ Account load failed: {account_response.status_code}")
-                except Exception as e:
-                    print(f"❌ Error loading account: {e}")
-            
-            # Load related contact
-            if case.get('contact_id'):
-                try:
-                    print(f"🔍 Loading contact ID: {case.get('contact_id')}")
-                    contact_response = requests.get(
-                        f"{fastapi_url}/api/contacts/{case['contact_id']}", 
-                        headers=headers, 
-                        timeout=10
-                    )
-                    if contact_response.status_code == 200:
-                        contact = contact_response.json()
-                        print(f"✅ Contact loaded: {contact.get('display_name', contact.get('first_name', '') + ' ' + contact.get('last_name', ''))}")
-                    else:
-                        print(f"❌ Contact load failed: {contact_response.status_code}")
-                except Exception as e:
-                    print(f"❌ Error loading contact: {e}")
-            
-            # Load related loan
-            if case.get('loan_id'):
-                try:
-                    print(f"🔍 Loading loan ID: {case.get('loan_id')}")
-                    loan_response = requests.get(
-                        f"{fastapi_url}/api/loans/{case['loan_id']}", 
-                        headers=headers, 
-                        timeout=10
-                    )
-                    if loan_response.status_code == 200:
-                        loan = loan_response.json()
-                        print(f"✅ Loan loaded: Contract #{loan.get('contract_number', loan.get('contractnumber', 'Unknown'))}")
-                    else:
-                        print(f"❌ Loan load failed: {loan_response.status_code}")
-                except Exception as e:
-                    print(f"❌ Error loading loan: {e}")
+            # Load the related account, contact and loan - one batched call per collection
+            loader = entity_loader(fastapi_url, headers)
+            pending = [
+                loader.load('accounts', case.get('account_id')),
+                loader.load('contacts', case.get('contact_id')),
+                loader.load('loans', case.get('loan_id')),
+            ]
+            account, contact, loan = [record.get() for record in pending]
+            print(f"   - Account: {'✅' if account else '❌'}  Contact: {'✅' if contact else '❌'}  Loan: {'✅' if loan else '❌'}")
             
             # Load related assets - try multiple approaches
             print(f"🔍 Loading assets...")
@@ -3036,21 +2495,19 @@ def create_app():
             if loan and loan.get('id'):
                 try:
                     print(f"🔍 Searching assets by loan ID: {loan.get('id')}")
-                    assets_response = requests.get(
+                    assets_response = gateway.stream_get(
                         f"{fastapi_url}/api/assets/",
                         headers=headers,
                         params={'loan_id': loan['id']},
                         timeout=10
                     )
                     if assets_response.status_code == 200:
-                        assets_data = assets_response.json()
-                        if isinstance(assets_data, dict):
-                            assets = assets_data.get('items', [])
-                        elif isinstance(assets_data, list):
-                            assets = assets_data
+                        assets = [asset for asset in iter_items(assets_response) if asset.get('loan_id') == loan['id']]
                         
                         if assets:
                             print(f"✅ Found {len(assets)} assets via loan relationship")
+                    else:
+                        assets_response.close()
                 except Exception as e:
                     print(f"❌ Error loading assets by loan: {e}")
             
@@ -3058,21 +2515,22 @@ def create_app():
             if not assets and case.get('account_id'):
                 try:
                     print(f"🔍 Searching assets by account ID: {case.get('account_id')}")
-                    assets_response = requests.get(
+                    assets_response = gateway.stream_get(
                         f"{fastapi_url}/api/assets/",
                         headers=headers,
                         params={'account_id': case['account_id']},
                         timeout=10
                     )
                     if assets_response.status_code == 200:
-                        assets_data = assets_response.json()
-                        if isinstance(assets_data, dict):
-                            assets = assets_data.get('items', [])
-                        elif isinstance(assets_data, list):
-                            assets = assets_data
+                        assets = [
+                            asset for asset in iter_items(assets_response)
+                            if asset.get('account_id') == case['account_id']
+                        ]
                         
                         if assets:
                             print(f"✅ Found {len(assets)} assets via account relationship")
+                    else:
+                        assets_response.close()
                 except Exception as e:
                     print(f"❌ Error loading assets by account: {e}")
             
@@ -3080,27 +2538,18 @@ def create_app():
             if not assets and (loan or account):
                 try:
                     print(f"🔍 Searching all assets for matches...")
-                    all_assets_response = requests.get(
-                        f"{fastapi_url}/api/assets/", 
-                        headers=headers, 
-                        timeout=15
-                    )
-                    if all_assets_response.status_code == 200:
-                        all_assets_data = all_assets_response.json()
-                        all_assets = all_assets_data.get('items', all_assets_data) if isinstance(all_assets_data, dict) else all_assets_data
-                        
-                        matched_assets = []
-                        for asset in all_assets:
-                            # Match by account ID
-                            if case.get('account_id') and asset.get('account_id') == case.get('account_id'):
-                                matched_assets.append(asset)
-                            # Match by loan ID
-                            elif loan and asset.get('loan_id') == loan.get('id'):
-                                matched_assets.append(asset)
-                        
-                        assets = matched_assets
-                        if assets:
-                            print(f"✅ Found {len(assets)} assets via comprehensive search")
+                    matched_assets = []
+                    for asset in iter_rows(fastapi_url, '/api/assets/', headers, timeout=15):
+                        # Match by account ID
+                        if case.get('account_id') and asset.get('account_id') == case.get('account_id'):
+                            matched_assets.append(asset)
+                        # Match by loan ID
+                        elif loan and asset.get('loan_id') == loan.get('id'):
+                            matched_assets.append(asset)
+                    
+                    assets = matched_assets
+                    if assets:
+                        print(f"✅ Found {len(assets)} assets via comprehensive search")
                 except Exception as e:
                     print(f"❌ Error in comprehensive asset search: {e}")
             
@@ -3108,34 +2557,12 @@ def create_app():
             if not account and not contact and loan:
                 print(f"🔍 Trying to load related data from loan...")
                 
-                # Try to get account from loan
-                if loan.get('account_id') and not account:
-                    try:
-                        loan_account_response = requests.get(
-                            f"{fastapi_url}/api/accounts/{loan['account_id']}", 
-                            headers=headers, 
-                            timeout=10
-                        )
-                        if loan_account_response.status_code == 200:
-                            account = loan_account_response.json()
-                            print(f"✅ Account loaded via loan: {account.get('account_name', 'Unknown')}")
-                    except Exception as e:
-                        print(f"❌ Error loading account via loan: {e}")
-                
-                # Try to get contact from loan
-                contact_id = loan.get('primary_contact') or loan.get('contact_id')
-                if contact_id and not contact:
-                    try:
-                        loan_contact_response = requests.get(
-                            f"{fastapi_url}/api/contacts/{contact_id}", 
-                            headers=headers, 
-                            timeout=10
-                        )
-                        if loan_contact_response.status_code == 200:
-                            contact = loan_contact_response.json()
-                            print(f"✅ Contact loaded via loan: {contact.get('display_name', 'Unknown')}")
-                    except Exception as e:
-                        print(f"❌ Error loading contact via loan: {e}")
+                pending = [
+                    loader.load('accounts', loan.get('account_id')),
+                    loader.load('contacts', loan.get('primary_contact') or loan.get('contact_id')),
+                ]
+                account, contact = [record.get() for record in pending]
+                print(f"   - Via loan: Account {'✅' if account else '❌'}  Contact {'✅' if contact else '❌'}")
             
             # Ensure assets is always a list
             if not isinstance(assets, list):
@@ -3181,7 +2608,7 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             
             # Fetch case details
-            response = requests.get(f"{fastapi_url}/api/cases/{case_id}", headers=headers)
+            response = gateway.get(f"{fastapi_url}/api/cases/{case_id}", headers=headers)
             
             if response.status_code == 401:
                 session.clear()
@@ -3196,9 +2623,9 @@ def create_app():
             case = response.json()
             
             # Load accounts, contacts, and loans for dropdowns
-            accounts_response = requests.get(f"{fastapi_url}/api/accounts/", headers=headers)
-            contacts_response = requests.get(f"{fastapi_url}/api/contacts/", headers=headers)
-            loans_response = requests.get(f"{fastapi_url}/api/loans/", headers=headers)
+            accounts_response = gateway.get(f"{fastapi_url}/api/accounts/", headers=headers)
+            contacts_response = gateway.get(f"{fastapi_url}/api/contacts/", headers=headers)
+            loans_response = gateway.get(f"{fastapi_url}/api/loans/", headers=headers)
             
             accounts = []
             contacts = []
@@ -3255,7 +2682,7 @@ def create_app():
             case_data = {k: v for k, v in case_data.items() if v is not None and v != ''}
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.put(
+            response = gateway.put(
                 f"{fastapi_url}/api/cases/{case_id}",
                 headers=headers,
                 json=case_data,
@@ -3295,7 +2722,7 @@ def create_app():
                 return redirect(url_for('auth.login'))
             
             fastapi_url = app.config['FASTAPI_BASE_URL']
-            response = requests.delete(f"{fastapi_url}/api/cases/{case_id}", headers=headers)
+            response = gateway.delete(f"{fastapi_url}/api/cases/{case_id}", headers=headers)
             
             if response.status_code == 401:
                 session.clear()
@@ -3330,7 +2757,7 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             print(f"🔍 Testing: {fastapi_url}/api/cases/filters")
             
-            response = requests.get(
+            response = gateway.get(
                 f"{fastapi_url}/api/cases/filters",
                 headers=headers,
                 timeout=10
@@ -3604,14 +3031,18 @@ def create_app():
             fastapi_url = app.config['FASTAPI_BASE_URL']
             url = f"{fastapi_url}/api/{path}"
             
+            # Pass status, headers and body bytes straight through without re-encoding
+            if app.config['API_PROXY_STREAMING']:
+                return stream_proxy(url, headers)
+            
             if request.method == 'GET':
-                response = requests.get(url, headers=headers, params=request.args)
+                response = gateway.get(url, headers=headers, params=request.args)
             elif request.method == 'POST':
-                response = requests.post(url, headers=headers, json=request.get_json())
+                response = gateway.post(url, headers=headers, json=request.get_json())
             elif request.method == 'PUT':
-                response = requests.put(url, headers=headers, json=request.get_json())
+                response = gateway.put(url, headers=headers, json=request.get_json())
             elif request.method == 'DELETE':
-                response = requests.delete(url, headers=headers)
+                response = gateway.delete(url, headers=headers)
             
             return jsonify(response.json()), response.status_code
             
@@ -1,7 +1,118 @@
 # config.py - Configuration Settings
 import os
+import tempfile
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
     FASTAPI_BASE_URL = os.environ.get('FASTAPI_BASE_URL') or 'http://127.0.0.1:8000'
     SESSION_TYPE = 'filesystem'
+
+    # Backend gateway connection pool
+    BACKEND_POOL_CONNECTIONS = int(os.environ.get('BACKEND_POOL_CONNECTIONS', 4))  # distinct hosts kept pooled
+    BACKEND_POOL_MAXSIZE = int(os.environ.get('BACKEND_POOL_MAXSIZE', 20))  # keep-alive connections per host
+    BACKEND_POOL_BLOCK = os.environ.get('BACKEND_POOL_BLOCK', 'true').lower() == 'true'
+    # Streamed responses (proxied browser calls, streamed JSON) use a pool of their own that never
+    # blocks, so a slow download cannot hold the connections every other call waits for
+    BACKEND_STREAM_POOL_MAXSIZE = int(os.environ.get('BACKEND_STREAM_POOL_MAXSIZE', 10))
+    BACKEND_MAX_RETRIES = int(os.environ.get('BACKEND_MAX_RETRIES', 0))
+    BACKEND_DEFAULT_TIMEOUT = float(os.environ.get('BACKEND_DEFAULT_TIMEOUT', 30))
+
+    # Seconds a verified access token is trusted before /auth/verify-token is called again
+    # (never beyond the token's own 'exp' claim; 0 verifies on every request)
+    AUTH_VERIFY_CACHE_TTL = int(os.environ.get('AUTH_VERIFY_CACHE_TTL', 300))
+
+    # Seconds a relationship URL shape the backend has no route for (or that failed for one entity) is skipped before being re-probed
+    ENDPOINT_NEGATIVE_TTL = int(os.environ.get('ENDPOINT_NEGATIVE_TTL', 600))
+
+    # Multi-id lookups: accounts per batched 'account_ids' call, and seconds a collection whose
+    # backend refused or ignored a multi-id filter goes straight to per-id calls before retrying
+    BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', 50))
+    BATCH_UNSUPPORTED_TTL = int(os.environ.get('BATCH_UNSUPPORTED_TTL', 600))
+
+    # In-process loan index used to match assets to loans by VIN / account
+    LOAN_INDEX_TTL = int(os.environ.get('LOAN_INDEX_TTL', 300))  # seconds before a background rebuild
+    LOAN_INDEX_PAGE_SIZE = int(os.environ.get('LOAN_INDEX_PAGE_SIZE', 500))
+
+    # Seconds dashboard counters are served from cache before a background recount
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL', 60))
+
+    # Stream /api/<path> proxy responses through unchanged instead of decoding and re-serialising JSON
+    API_PROXY_STREAMING = os.environ.get('API_PROXY_STREAMING', 'true').lower() == 'true'
+
+    # Concurrent backend calls: shared worker threads per process, the most calls a single
+    # page request may have in flight at once, and how long a page waits for a group of them
+    BACKEND_CONCURRENCY_WORKERS = int(os.environ.get('BACKEND_CONCURRENCY_WORKERS', 32))
+    REQUEST_CONCURRENCY = int(os.environ.get('REQUEST_CONCURRENCY', 6))
+    REQUEST_GATHER_TIMEOUT = float(os.environ.get('REQUEST_GATHER_TIMEOUT', 2 * BACKEND_DEFAULT_TIMEOUT))
+
+    # Dropdown reference data (financial institutions, asset makes): seconds served fresh,
+    # and how old a cached list may get while it is reloaded in the background
+    REFERENCE_DATA_TTL = int(os.environ.get('REFERENCE_DATA_TTL', 300))
+    REFERENCE_DATA_MAX_STALE = int(os.environ.get('REFERENCE_DATA_MAX_STALE', 3600))
+
+    # Longest a worker keeps case filter categories without re-reading them
+    CASE_FILTERS_TTL = int(os.environ.get('CASE_FILTERS_TTL', 3600))
+
+    # Seconds the admin capabilities resolved at login are trusted before require_admin re-queries them
+    ADMIN_STATUS_TTL = int(os.environ.get('ADMIN_STATUS_TTL', 900))
+
+    # Share identical backend GETs made while rendering a single page
+    BACKEND_REQUEST_MEMO = os.environ.get('BACKEND_REQUEST_MEMO', 'true').lower() == 'true'
+
+    # Let concurrent identical backend GETs share one upstream call; paths listed here
+    # (reference data) are shared and cached by users with the same roles, all others per access token
+    BACKEND_COALESCE_GETS = os.environ.get('BACKEND_COALESCE_GETS', 'true').lower() == 'true'
+    BACKEND_ROLE_SHARED_PATHS = tuple(
+        path for path in os.environ.get(
+            'BACKEND_ROLE_SHARED_PATHS',
+            '/api/loans/financial-institutions,/api/cases/stats/financial-institutions,/api/cases/filters'
+        ).split(',') if path
+    )
+
+    # Per-user cache of backend GET responses: total size limit in bytes, seconds a response
+    # is reused by default, and per-path-prefix overrides ('prefix=seconds', 0 never caches)
+    BACKEND_RESPONSE_CACHE = os.environ.get('BACKEND_RESPONSE_CACHE', 'true').lower() == 'true'
+    BACKEND_CACHE_MAX_BYTES = int(os.environ.get('BACKEND_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    BACKEND_CACHE_DEFAULT_TTL = int(os.environ.get('BACKEND_CACHE_DEFAULT_TTL', 30))
+    BACKEND_CACHE_TTLS = {
+        prefix: int(seconds) for prefix, _, seconds in (
+            entry.partition('=') for entry in os.environ.get(
+                'BACKEND_CACHE_TTLS',
+                '/api/auth/=0,/api/admin/=0,/api/loans/financial-institutions=300,'
+                '/api/cases/stats/=120,/api/cases/filters=300'
+            ).split(',') if entry
+        )
+    }
+
+    # Private directory (created 0700, outside the source tree) for cache files holding backend data
+    BACKEND_CACHE_DIR = os.environ.get('BACKEND_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'crm-backend-cache')
+
+    # Second-level response cache shared by the worker processes on this host ('sqlite', or
+    # empty - the default - to keep each worker's cache private and in memory). It stores
+    # every user's responses, so it is opt-in: database file and its size limit in bytes
+    BACKEND_CACHE_L2 = os.environ.get('BACKEND_CACHE_L2', '')
+    BACKEND_CACHE_L2_PATH = os.environ.get('BACKEND_CACHE_L2_PATH') or os.path.join(BACKEND_CACHE_DIR, 'backend_responses.sqlite3')
+    BACKEND_CACHE_L2_MAX_BYTES = int(os.environ.get('BACKEND_CACHE_L2_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Log of cache invalidations each worker replays before answering from its own cache, so a
+    # write handled by one worker is seen by all of them (used when BACKEND_CACHE_L2 is off)
+    BACKEND_CACHE_SYNC_PATH = os.environ.get('BACKEND_CACHE_SYNC_PATH') or os.path.join(BACKEND_CACHE_DIR, 'invalidations.sqlite3')
+
+    # Directory of version stamp files shared by all worker processes on this host
+    CACHE_STAMP_DIR = os.environ.get('CACHE_STAMP_DIR') or os.path.join(BACKEND_CACHE_DIR, 'cache_stamps')
+
+    # Snapshot of role-shared cache entries (no per-token responses) written at shutdown and
+    # reloaded at startup; a snapshot older than WARM_CACHE_MAX_AGE seconds is ignored
+    WARM_CACHE_ENABLED = os.environ.get('WARM_CACHE_ENABLED', 'true').lower() == 'true'
+    WARM_CACHE_PATH = os.environ.get('WARM_CACHE_PATH') or os.path.join(BACKEND_CACHE_DIR, 'warm_cache.json')
+    WARM_CACHE_MAX_AGE = int(os.environ.get('WARM_CACHE_MAX_AGE', 3600))
+
+    # Stale-if-error: seconds an expired cached response is kept to stand in for a failed
+    # backend call (0 disables), and the most seconds the backend gets while one is available
+    BACKEND_STALE_IF_ERROR = int(os.environ.get('BACKEND_STALE_IF_ERROR', 900))
+    BACKEND_STALE_BUDGET = float(os.environ.get('BACKEND_STALE_BUDGET', 5))
+
+    # Rows requested per page when a list endpoint is walked page by page
+    BACKEND_PAGE_SIZE = int(os.environ.get('BACKEND_PAGE_SIZE', 200))
+    # Further pages fetched side by side while a full collection scan works through the current one
+    BACKEND_PAGE_PREFETCH = int(os.environ.get('BACKEND_PAGE_PREFETCH', 4))
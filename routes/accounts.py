@@ -2,9 +2,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 import requests
 import traceback
+import logging
+from utils.gateway import gateway
+from utils.resolver import resolver
+from utils.repository import AccountRepository, Unauthorized
 
 # Create blueprint WITHOUT url_prefix since we're adding it during registration
 accounts_bp = Blueprint('accounts', __name__)
+logger = logging.getLogger(__name__)
 
 def require_auth():
     """Helper function for authentication check"""
@@ -31,88 +36,49 @@ def index():
         skip = (page - 1) * per_page
         
         # Get access token from session
-        access_token = session.get('access_token')
-        if not access_token:
+        if not session.get('access_token'):
             flash('Authentication required', 'error')
             return redirect(url_for('auth.login'))
         
-        # Prepare API request headers
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Build query parameters for FastAPI
-        params = {
-            'skip': skip,
-            'limit': per_page
-        }
-        
-        # Add filters if they exist
-        if search:
-            params['search'] = search
-        if account_type:
-            params['account_type'] = account_type
-        if status:
-            params['status'] = status
-        
         # Call FastAPI backend
-        from flask import current_app
-        fastapi_url = current_app.config['FASTAPI_BASE_URL']
-        response = requests.get(
-            f"{fastapi_url}/api/accounts/",
-            headers=headers,
-            params=params,
-            timeout=10
+        accounts_page = AccountRepository.for_request().list(
+            skip=skip, limit=per_page, search=search, account_type=account_type, status=status
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            accounts = data.get('items', [])
-            total = data.get('total', 0)
-            
-            # Handle case where API returns list directly
-            if isinstance(data, list):
-                accounts = data
-                total = len(data)
-            
-            # Calculate pagination info
-            total_pages = (total + per_page - 1) // per_page
-            has_prev = page > 1
-            has_next = page < total_pages
-            
-            print(f"Successfully fetched {len(accounts)} accounts from FastAPI")
-            
-            return render_template('accounts/index.html', 
-                                accounts=accounts,
-                                search=search,
-                                account_type=account_type,
-                                status=status,
-                                page=page,
-                                per_page=per_page,
-                                total=total,
-                                total_pages=total_pages,
-                                has_prev=has_prev,
-                                has_next=has_next)
-        
-        elif response.status_code == 401:
-            flash('Session expired. Please log in again.', 'error')
-            return redirect(url_for('auth.login'))
-        
-        else:
-            print(f"FastAPI error: {response.status_code} - {response.text}")
-            flash('Error loading accounts. Please try again.', 'error')
-            return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+        print(f"Successfully fetched {len(accounts_page)} accounts from FastAPI")
+        
+        return render_template('accounts/index.html', 
+                            accounts=accounts_page.items,
+                            search=search,
+                            account_type=account_type,
+                            status=status,
+                            page=page,
+                            per_page=per_page,
+                            total=accounts_page.total,
+                            total_pages=accounts_page.total_pages,
+                            has_prev=accounts_page.has_prev,
+                            has_next=accounts_page.has_next)
+    
+    except Unauthorized:
+        flash('Session expired. Please log in again.', 'error')
+        return redirect(url_for('auth.login'))
+    
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"Accounts list failed: {e}")
+        flash('Error loading accounts. Please try again.', 'error')
+        return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                               page=1, total=0, total_pages=1)
     
     except requests.exceptions.ConnectionError:
-        print("Could not connect to FastAPI backend")
+        logger.error("Could not connect to FastAPI backend")
         flash('Backend service unavailable. Please try again later.', 'error')
-        return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+        return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                               page=1, total=0, total_pages=1)
     
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.exception(f"Unexpected error loading accounts: {e}")
         flash('An unexpected error occurred. Please try again.', 'error')
-        return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status)
+        return render_template('accounts/index.html', accounts=[], search=search, account_type=account_type, status=status,
+                               page=1, total=0, total_pages=1)
 
 @accounts_bp.route('/new')
 def new():
@@ -158,7 +124,7 @@ def create():
         # Call FastAPI backend
         from flask import current_app
         fastapi_url = current_app.config['FASTAPI_BASE_URL']
-        response = requests.post(
+        response = gateway.post(
             f"{fastapi_url}/api/accounts/",
             headers=headers,
             json=account_data,
@@ -177,6 +143,10 @@ def create():
         flash('An unexpected error occurred. Please try again.', 'error')
         return render_template('accounts/new.html')
 
+def _belongs_to_account(row, account_id):
+    """False only for a row that names a different account; rows without account_id are kept"""
+    return not isinstance(row, dict) or row.get('account_id') in (None, account_id)
+
 @accounts_bp.route('/<int:account_id>')
 def detail(account_id):
     """Route for viewing account details with enhanced cases support and debugging"""
@@ -194,7 +164,7 @@ def detail(account_id):
         print(f"🔍 Loading account details for ID: {account_id}")
         
         # Load account details
-        account_response = requests.get(
+        account_response = gateway.get(
             f"{fastapi_url}/api/accounts/{account_id}",
             headers=headers,
             timeout=10
@@ -215,239 +185,37 @@ def detail(account_id):
         assets = []
         cases = []
         
-        # Try to load contacts with detailed error handling
-        contact_endpoints = [
-            f"/api/contacts/?account_id={account_id}",
-            f"/api/contacts?account_id={account_id}",
-            f"/api/accounts/{account_id}/contacts",
-            f"/api/contacts/by-account/{account_id}"
-        ]
-        
+        # Load contacts, loans and assets through the learned endpoint shape for each relationship
         print(f"🔍 Loading contacts for account {account_id}...")
-        for endpoint in contact_endpoints:
-            try:
-                contact_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                if contact_response.status_code == 200:
-                    contact_data = contact_response.json()
-                    contacts = contact_data.get('items', contact_data) if isinstance(contact_data, dict) else contact_data
-                    print(f"✅ Contacts loaded from {endpoint}: {len(contacts)} contacts")
-                    if contacts:
-                        print(f"🔍 First contact keys: {list(contacts[0].keys()) if len(contacts) > 0 else 'No contacts'}")
-                    break
-                else:
-                    print(f"❌ Contact endpoint {endpoint} failed: {contact_response.status_code}")
-            except Exception as e:
-                print(f"❌ Contact endpoint {endpoint} exception: {str(e)}")
-                continue
-        
-        # Try to load loans with detailed error handling
-        loan_endpoints = [
-            f"/api/loans/?account_id={account_id}",
-            f"/api/loans?account_id={account_id}",
-            f"/api/accounts/{account_id}/loans",
-            f"/api/loans/by-account/{account_id}"
-        ]
+        contact_data = resolver.fetch('account.contacts', fastapi_url, headers, account_id)
+        if contact_data is not None:
+            contacts = contact_data.get('items', contact_data) if isinstance(contact_data, dict) else contact_data
+            print(f"✅ Contacts loaded: {len(contacts)} contacts")
         
         print(f"🔍 Loading loans for account {account_id}...")
-        for endpoint in loan_endpoints:
-            try:
-                loan_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                if loan_response.status_code == 200:
-                    loan_data = loan_response.json()
-                    loans = loan_data.get('items', loan_data) if isinstance(loan_data, dict) else loan_data
-                    print(f"✅ Loans loaded from {endpoint}: {len(loans)} loans")
-                    if loans:
-                        print(f"🔍 First loan keys: {list(loans[0].keys()) if len(loans) > 0 else 'No loans'}")
-                    break
-                else:
-                    print(f"❌ Loan endpoint {endpoint} failed: {loan_response.status_code}")
-            except Exception as e:
-                print(f"❌ Loan endpoint {endpoint} exception: {str(e)}")
-                continue
-        
-        # Try to load assets with detailed error handling
-        asset_endpoints = [
-            f"/api/assets/?account_id={account_id}",
-            f"/api/assets?account_id={account_id}",
-            f"/api/accounts/{account_id}/assets",
-            f"/api/assets/by-account/{account_id}"
-        ]
+        loan_data = resolver.fetch('account.loans', fastapi_url, headers, account_id)
+        if loan_data is not None:
+            loans = loan_data.get('items', loan_data) if isinstance(loan_data, dict) else loan_data
+            print(f"✅ Loans loaded: {len(loans)} loans")
         
         print(f"🔍 Loading assets for account {account_id}...")
-        for endpoint in asset_endpoints:
-            try:
-                asset_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=5)
-                if asset_response.status_code == 200:
-                    asset_data = asset_response.json()
-                    assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
-                    print(f"✅ Assets loaded from {endpoint}: {len(assets)} assets")
-                    if assets:
-                        print(f"🔍 First asset keys: {list(assets[0].keys()) if len(assets) > 0 else 'No assets'}")
-                    break
-                else:
-                    print(f"❌ Asset endpoint {endpoint} failed: {asset_response.status_code}")
-            except Exception as e:
-                print(f"❌ Asset endpoint {endpoint} exception: {str(e)}")
-                continue
-
-        # ENHANCED CASES LOADING WITH EXTENSIVE DEBUGGING
-        case_endpoints = [
-            f"/api/cases/?account_id={account_id}",
-            f"/api/cases?account_id={account_id}",
-            f"/api/cases/",  # Get all cases to see what's available
-            f"/api/cases/68",  # Try direct case ID if we know it exists
-            f"/api/cases/by-account/{account_id}",
-            f"/api/accounts/{account_id}/cases",
-        ]
-
-        print(f"🔍 DEBUG: Starting enhanced cases loading for account {account_id}")
-        print(f"🔍 DEBUG: Using FastAPI URL: {fastapi_url}")
-        print(f"🔍 DEBUG: Headers: {dict(headers)}")
+        asset_data = resolver.fetch('account.assets', fastapi_url, headers, account_id)
+        if asset_data is not None:
+            assets = asset_data.get('items', asset_data) if isinstance(asset_data, dict) else asset_data
+            print(f"✅ Assets loaded: {len(assets)} assets")
 
-        cases_found = False
-        debug_info = []
-
-        # First, let's try to get ALL cases to see what's in the system
-        print(f"🔍 DEBUG: First, let's see ALL cases in the system...")
-        try:
-            all_cases_response = requests.get(f"{fastapi_url}/api/cases/", headers=headers, timeout=10)
-            print(f"🔍 DEBUG: All cases endpoint status: {all_cases_response.status_code}")
-            
-            if all_cases_response.status_code == 200:
-                all_cases_data = all_cases_response.json()
-                print(f"🔍 DEBUG: All cases response type: {type(all_cases_data)}")
-                print(f"🔍 DEBUG: All cases response keys: {list(all_cases_data.keys()) if isinstance(all_cases_data, dict) else 'Not a dict'}")
-                
-                # Handle different response formats
-                if isinstance(all_cases_data, list):
-                    all_cases = all_cases_data
-                elif isinstance(all_cases_data, dict):
-                    all_cases = all_cases_data.get('items', all_cases_data.get('data', []))
-                else:
-                    all_cases = []
-                
-                print(f"🔍 DEBUG: Total cases found in system: {len(all_cases)}")
-                
-                if all_cases:
-                    print(f"🔍 DEBUG: First case structure: {all_cases[0]}")
-                    print(f"🔍 DEBUG: First case keys: {list(all_cases[0].keys()) if isinstance(all_cases[0], dict) else 'Not a dict'}")
-                    
-                    # Look for our specific account
-                    account_cases = [case for case in all_cases if case.get('account_id') == account_id]
-                    print(f"🔍 DEBUG: Cases for account {account_id}: {len(account_cases)}")
-                    
-                    if account_cases:
-                        print(f"🔍 DEBUG: Found matching cases: {account_cases}")
-                        cases = account_cases
-                        cases_found = True
-                    else:
-                        # Show all unique account_ids to help debug
-                        account_ids = list(set([case.get('account_id') for case in all_cases if case.get('account_id') is not None]))
-                        print(f"🔍 DEBUG: Available account_ids in cases: {sorted(account_ids)}")
-                        
-                        # Check for different field names
-                        for case in all_cases[:3]:  # Check first 3 cases
-                            print(f"🔍 DEBUG: Case {case.get('id')} account fields:")
-                            for key, value in case.items():
-                                if 'account' in key.lower():
-                                    print(f"   {key}: {value}")
-                else:
-                    print(f"🔍 DEBUG: No cases found in the system at all")
-            else:
-                print(f"🔍 DEBUG: All cases endpoint failed: {all_cases_response.status_code}")
-                print(f"🔍 DEBUG: Error response: {all_cases_response.text}")
-
-        except Exception as e:
-            print(f"🔍 DEBUG: Exception getting all cases: {str(e)}")
-            print(f"🔍 DEBUG: Full traceback: {traceback.format_exc()}")
-
-        # Now try the specific endpoints
-        for endpoint in case_endpoints:
-            if cases_found and endpoint != f"/api/cases/":  # Skip others if we already found cases
-                continue
-                
-            try:
-                print(f"🔍 DEBUG: Trying endpoint: {fastapi_url}{endpoint}")
-                case_response = requests.get(f"{fastapi_url}{endpoint}", headers=headers, timeout=10)
-                
-                debug_entry = {
-                    'endpoint': endpoint,
-                    'status_code': case_response.status_code,
-                    'headers': dict(case_response.headers),
-                    'url': f"{fastapi_url}{endpoint}"
-                }
-                
-                print(f"🔍 DEBUG: Endpoint {endpoint} returned status {case_response.status_code}")
-                
-                if case_response.status_code == 200:
-                    try:
-                        case_data = case_response.json()
-                        debug_entry['response_type'] = type(case_data).__name__
-                        debug_entry['response_keys'] = list(case_data.keys()) if isinstance(case_data, dict) else 'Not a dict'
-                        
-                        print(f"🔍 DEBUG: Response type: {type(case_data)}")
-                        print(f"🔍 DEBUG: Response data: {case_data}")
-                        
-                        # Handle different response formats
-                        if isinstance(case_data, list):
-                            endpoint_cases = case_data
-                        elif isinstance(case_data, dict):
-                            if 'id' in case_data:  # Single case object
-                                endpoint_cases = [case_data]
-                            else:  # Paginated response
-                                endpoint_cases = case_data.get('items', case_data.get('data', []))
-                        else:
-                            endpoint_cases = []
-                        
-                        debug_entry['cases_count'] = len(endpoint_cases)
-                        
-                        if endpoint_cases and not cases_found:
-                            cases = endpoint_cases
-                            cases_found = True
-                            print(f"✅ DEBUG: Successfully loaded {len(cases)} cases from {endpoint}")
-                            
-                            for i, case in enumerate(cases[:2]):  # Show first 2 cases
-                                print(f"🔍 DEBUG: Case {i+1} data: {case}")
-                                
-                    except Exception as json_error:
-                        debug_entry['json_error'] = str(json_error)
-                        debug_entry['raw_response'] = case_response.text[:500]
-                        print(f"🔍 DEBUG: JSON parsing error: {json_error}")
-                        print(f"🔍 DEBUG: Raw response: {case_response.text[:500]}")
-                        
-                else:
-                    debug_entry['error_response'] = case_response.text[:500]
-                    print(f"🔍 DEBUG: Error response: {case_response.text}")
-                
-                debug_info.append(debug_entry)
-                
-            except Exception as e:
-                print(f"🔍 DEBUG: Exception with endpoint {endpoint}: {str(e)}")
-                debug_info.append({
-                    'endpoint': endpoint,
-                    'exception': str(e)
-                })
-
-        # Final debug summary
-        print(f"🔍 DEBUG: === FINAL CASES SUMMARY ===")
-        print(f"🔍 DEBUG: Cases found: {cases_found}")
-        print(f"🔍 DEBUG: Number of cases: {len(cases)}")
-        print(f"🔍 DEBUG: Account ID we're looking for: {account_id}")
-
-        if cases:
-            for case in cases:
-                print(f"🔍 DEBUG: Case summary - ID: {case.get('id')}, Number: {case.get('case_number')}, Account: {case.get('account_id')}")
-
-        # Store debug info in a place we can access it in the template
-        account['debug_cases_info'] = debug_info
-        account['debug_cases_summary'] = {
-            'target_account_id': account_id,
-            'cases_found': cases_found,
-            'cases_count': len(cases),
-            'endpoints_tried': len(debug_info)
-        }
-
-        print(f"🔍 DEBUG: Debug info stored in account object for template")
+        # Cases come from one account-filtered query; a shape whose backend ignores the
+        # filter (returns other accounts' cases) is rejected so the resolver moves on -
+        # checked row by row as the payload streams in, so the rest of an unfiltered
+        # case list is never downloaded
+        print(f"🔍 Loading cases for account {account_id}...")
+        case_data = resolver.fetch(
+            'account.cases', fastapi_url, headers, account_id,
+            accept_row=lambda row: _belongs_to_account(row, account_id)
+        )
+        if case_data is not None:
+            cases = case_data.get('items', case_data.get('data', [])) if isinstance(case_data, dict) else case_data
+            print(f"✅ Cases loaded: {len(cases)} cases")
         
         print(f"📊 Final data summary for account {account_id}:")
         print(f"   - Account: {account.get('account_name', 'Unknown')}")
@@ -545,7 +313,7 @@ def edit(account_id):
         
         from flask import current_app
         fastapi_url = current_app.config['FASTAPI_BASE_URL']
-        response = requests.get(
+        response = gateway.get(
             f"{fastapi_url}/api/accounts/{account_id}",
             headers=headers,
             timeout=10
@@ -596,7 +364,7 @@ def update(account_id):
         
         from flask import current_app
         fastapi_url = current_app.config['FASTAPI_BASE_URL']
-        response = requests.put(
+        response = gateway.put(
             f"{fastapi_url}/api/accounts/{account_id}",
             headers=headers,
             json=account_data,
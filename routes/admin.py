@@ -5,13 +5,27 @@ from utils.auth import (
     require_admin, require_admin_permission, make_api_request, 
     get_admin_context, AdminPermissions, has_admin_permission, handle_admin_error
 )
+from utils.case_filters import case_filter_cache
+from utils.repository import AdminUserRepository
 from datetime import datetime
 import logging
+import requests
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+
+def _backend_error(error, message):
+    """JSON reply for a failed admin API call: the backend's own error and status when it answered"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return jsonify({'error': message}), 500
+    try:
+        return jsonify(response.json()), response.status_code
+    except ValueError:
+        return jsonify({'error': message}), response.status_code
+
 # ========================================
 # MAIN ADMIN DASHBOARD
 # ========================================
@@ -59,13 +73,15 @@ def admin_dashboard():
         params['mfa_enabled'] = mfa_filter == 'enabled'
     
     # Get users
-    users_response = make_api_request('/admin/users?' + '&'.join([f'{k}={v}' for k, v in params.items()]))
-    users_data = {}
+    users_data = None
     users = []
     pagination = None
+    try:
+        users_data = AdminUserRepository.for_request().search(**params)
+    except requests.RequestException as e:
+        logger.error(f"Admin user list failed: {e}")
     
-    if users_response and users_response.status_code == 200:
-        users_data = users_response.json()
+    if users_data is not None:
         users = users_data.get('users', [])
         
         # Create pagination object
@@ -233,13 +249,15 @@ def user_management():
         params['mfa_enabled'] = mfa_filter == 'enabled'
     
     # Get users
-    users_response = make_api_request('/admin/users?' + '&'.join([f'{k}={v}' for k, v in params.items()]))
-    users_data = {}
+    users_data = None
     users = []
     pagination = None
+    try:
+        users_data = AdminUserRepository.for_request().search(**params)
+    except requests.RequestException as e:
+        logger.error(f"Admin user list failed: {e}")
     
-    if users_response and users_response.status_code == 200:
-        users_data = users_response.json()
+    if users_data is not None:
         users = users_data.get('users', [])
         
         # Create pagination object
@@ -438,22 +456,21 @@ def api_get_stats():
 def api_get_users():
     """Get users list via AJAX"""
     # Forward all query parameters to FastAPI
-    params = dict(request.args)
-    query_string = '&'.join([f'{k}={v}' for k, v in params.items()])
-    endpoint = f'/admin/users?{query_string}' if query_string else '/admin/users'
-    
-    response = make_api_request(endpoint)
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    return jsonify({'error': 'Failed to fetch users'}), 500
+    try:
+        return jsonify(AdminUserRepository.for_request().search(**request.args.to_dict()))
+    except requests.RequestException:
+        return jsonify({'error': 'Failed to fetch users'}), 500
 
 @admin_bp.route('/api/users/<int:user_id>')
 @require_admin_permission(AdminPermissions.MANAGE_USERS)
 def api_get_user(user_id):
     """Get specific user details via AJAX"""
-    response = make_api_request(f'/admin/users/{user_id}')
-    if response and response.status_code == 200:
-        return jsonify(response.json())
+    try:
+        user = AdminUserRepository.for_request().get(user_id)
+    except requests.RequestException:
+        user = None
+    if user is not None:
+        return jsonify(user)
     return jsonify({'error': 'User not found'}), 404
 
 @admin_bp.route('/api/users', methods=['POST'])
@@ -461,63 +478,51 @@ def api_get_user(user_id):
 def api_create_user():
     """Create new user via AJAX"""
     data = request.get_json()
-    response = make_api_request('/admin/users', method='POST', data=data)
-    
-    if response and response.status_code == 201:
-        return jsonify(response.json()), 201
-    elif response:
-        return jsonify(response.json()), response.status_code
-    return jsonify({'error': 'Failed to create user'}), 500
+    try:
+        return jsonify(AdminUserRepository.for_request().create(data)), 201
+    except requests.RequestException as e:
+        return _backend_error(e, 'Failed to create user')
 
 @admin_bp.route('/api/users/<int:user_id>', methods=['PUT'])
 @require_admin_permission(AdminPermissions.MANAGE_USERS)
 def api_update_user(user_id):
     """Update user via AJAX"""
     data = request.get_json()
-    response = make_api_request(f'/admin/users/{user_id}', method='PUT', data=data)
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    elif response:
-        return jsonify(response.json()), response.status_code
-    return jsonify({'error': 'Failed to update user'}), 500
+    try:
+        return jsonify(AdminUserRepository.for_request().update(user_id, data))
+    except requests.RequestException as e:
+        return _backend_error(e, 'Failed to update user')
 
 @admin_bp.route('/api/users/<int:user_id>/reset-password', methods=['POST'])
 @require_admin_permission(AdminPermissions.MANAGE_USERS)
 def api_reset_password(user_id):
     """Reset user password via AJAX"""
     data = request.get_json()
-    response = make_api_request(f'/admin/users/{user_id}/reset-password', method='POST', data=data)
-    
-    if response and response.status_code == 200:
-        return jsonify({'message': 'Password reset successfully'})
-    elif response:
-        return jsonify(response.json()), response.status_code
-    return jsonify({'error': 'Failed to reset password'}), 500
+    try:
+        AdminUserRepository.for_request().action(user_id, 'reset-password', data)
+    except requests.RequestException as e:
+        return _backend_error(e, 'Failed to reset password')
+    return jsonify({'message': 'Password reset successfully'})
 
 @admin_bp.route('/api/users/<int:user_id>/reset-mfa', methods=['POST'])
 @require_admin_permission(AdminPermissions.MANAGE_USERS)
 def api_reset_mfa(user_id):
     """Reset user MFA via AJAX"""
-    response = make_api_request(f'/admin/users/{user_id}/reset-mfa', method='POST')
-    
-    if response and response.status_code == 200:
-        return jsonify({'message': 'MFA reset successfully'})
-    elif response:
-        return jsonify(response.json()), response.status_code
-    return jsonify({'error': 'Failed to reset MFA'}), 500
+    try:
+        AdminUserRepository.for_request().action(user_id, 'reset-mfa')
+    except requests.RequestException as e:
+        return _backend_error(e, 'Failed to reset MFA')
+    return jsonify({'message': 'MFA reset successfully'})
 
 @admin_bp.route('/api/users/<int:user_id>/unlock', methods=['POST'])
 @require_admin_permission(AdminPermissions.MANAGE_USERS)
 def api_unlock_user(user_id):
     """Unlock user account via AJAX"""
-    response = make_api_request(f'/admin/users/{user_id}/unlock', method='POST')
-    
-    if response and response.status_code == 200:
-        return jsonify({'message': 'User unlocked successfully'})
-    elif response:
-        return jsonify(response.json()), response.status_code
-    return jsonify({'error': 'Failed to unlock user'}), 500
+    try:
+        AdminUserRepository.for_request().action(user_id, 'unlock')
+    except requests.RequestException as e:
+        return _backend_error(e, 'Failed to unlock user')
+    return jsonify({'message': 'User unlocked successfully'})
 
 @admin_bp.route('/api/roles')
 @require_admin
@@ -552,6 +557,7 @@ def api_create_filter_category():
     response = make_api_request('/admin/filters/categories', method='POST', data=data)
     
     if response and response.status_code == 201:
+        case_filter_cache.invalidate()
         return jsonify(response.json()), 201
     elif response:
         return jsonify(response.json()), response.status_code
@@ -565,6 +571,7 @@ def api_create_filter_option(category_id):
     response = make_api_request(f'/admin/filters/categories/{category_id}/options', method='POST', data=data)
     
     if response and response.status_code == 201:
+        case_filter_cache.invalidate()
         return jsonify(response.json()), 201
     elif response:
         return jsonify(response.json()), response.status_code
@@ -577,6 +584,7 @@ def api_toggle_filter_option(option_id):
     response = make_api_request(f'/admin/filters/options/{option_id}/toggle', method='PATCH')
     
     if response and response.status_code == 200:
+        case_filter_cache.invalidate()
         return jsonify(response.json())
     elif response:
         return jsonify(response.json()), response.status_code
@@ -590,6 +598,7 @@ def api_update_filter_option(option_id):
     response = make_api_request(f'/admin/filters/options/{option_id}', method='PUT', data=data)
     
     if response and response.status_code == 200:
+        case_filter_cache.invalidate()
         return jsonify(response.json())
     elif response:
         return jsonify(response.json()), response.status_code
@@ -602,6 +611,7 @@ def api_delete_filter_option(option_id):
     response = make_api_request(f'/admin/filters/options/{option_id}', method='DELETE')
     
     if response and response.status_code == 204:
+        case_filter_cache.invalidate()
         return jsonify({'message': 'Filter option deleted successfully'})
     elif response:
         return jsonify(response.json()), response.status_code
@@ -1,7 +1,7 @@
 # routes/assets.py - Assets Blueprint
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from utils.auth import require_auth
-from utils.api_client import APIClient
+from utils.repository import AssetRepository
 
 assets_bp = Blueprint('assets', __name__)
 
@@ -13,16 +13,9 @@ def index():
         make = request.args.get('make', '')
         asset_type = request.args.get('type', '')
         
-        params = {'limit': 100}
-        if search:
-            params['search'] = search
-        if make:
-            params['Make'] = make
-        if asset_type:
-            params['asset_type'] = asset_type
-        
-        response = APIClient.get('/assets/', params)
-        assets = response.get('items', []) if isinstance(response, dict) else response
+        assets_page = AssetRepository.for_request().list(limit=100, search=search, Make=make, asset_type=asset_type)
+        assets = assets_page.items
+        total = assets_page.total
         
         # Get unique makes for filter
         makes = sorted(list(set(asset.get('Make', '') for asset in assets if asset.get('Make'))))
@@ -30,10 +23,14 @@ def index():
     except Exception as e:
         flash(f'Error loading assets: {str(e)}', 'error')
         assets = []
+        total = 0
         makes = []
     
     return render_template('assets/index.html', 
                          assets=assets,
+                         page=1,
+                         total_pages=1,
+                         total=total,
                          makes=makes,
                          search=search,
                          selected_make=make,
@@ -1,5 +1,7 @@
 # app/routes/auth.py - Simplified version without Flask-Login dependency
 import requests
+from utils.gateway import gateway
+from utils.auth import resolve_admin_status
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 from functools import wraps
 import logging
@@ -47,7 +49,7 @@ def login():
         }
         
         # Call FastAPI login endpoint
-        response = requests.post(
+        response = gateway.post(
             f"{BACKEND_URL}/api/auth/login",
             data=login_data,
             headers={'Content-Type': 'application/x-www-form-urlencoded'},
@@ -91,6 +93,7 @@ def login():
             # Normal login success
             else:
                 logger.info("✅ Login successful, no MFA required")
+                resolve_admin_status()
                 flash(f'Welcome back, {data.get("username", "User")}!', 'success')
                 return redirect(url_for('dashboard'))
         
@@ -148,7 +151,7 @@ def mfa_setup():
             }
             
             logger.info("🔧 Calling FastAPI MFA setup endpoint...")
-            response = requests.post(
+            response = gateway.post(
                 f"{BACKEND_URL}/api/auth/mfa/setup",
                 headers=headers,
                 timeout=10
@@ -244,7 +247,7 @@ def verify_mfa_setup():
             'mfa_code': mfa_code
         }
         
-        response = requests.post(
+        response = gateway.post(
             f"{BACKEND_URL}/api/auth/mfa/verify-setup",
             headers=headers,
             json=verification_data,
@@ -335,7 +338,7 @@ def mfa_verify():
             'mfa_code': mfa_code
         }
         
-        response = requests.post(
+        response = gateway.post(
             f"{BACKEND_URL}/api/auth/mfa/verify",
             headers=headers,
             json=verification_data,
@@ -362,6 +365,7 @@ def mfa_verify():
             # Clear temporary MFA data and save session
             session.pop('temp_token', None)
             session.pop('awaiting_mfa', None)
+            resolve_admin_status()
             session.modified = True
             
             logger.info("✅ MFA verification successful")
@@ -2,6 +2,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from utils.auth import require_auth
 from utils.api_client import APIClient
+from utils.concurrency import request_executor
+from utils.repository import CaseRepository, LoanRepository, AccountRepository
 import logging
 
 cases_bp = Blueprint('cases', __name__)
@@ -36,40 +38,46 @@ def index():
         print(f"   Status filter: '{status}'")
         print(f"   All args: {dict(request.args)}")
         
-        # STEP 1: Get dynamic filters from FastAPI backend with enhanced error handling
+        # STEP 1: Build API parameters for cases
+        params = {
+            'limit': per_page,
+            'skip': skip
+        }
+        
+        # Add filter parameters if provided
+        if search:
+            params['search'] = search
+        if status:  # Only add status filter if not empty
+            params['status'] = status
+        if case_type:
+            params['case_type'] = case_type
+        if financial_institution:
+            params['financial_institution'] = financial_institution
+        if priority:
+            params['priority'] = priority
+        
+        # Add sorting parameters
+        if sort_by and sort_order:
+            params['sort_by'] = sort_by
+            params['sort_order'] = sort_order
+            print(f"   Added sort params to API: sort_by={sort_by}, sort_order={sort_order}")
+        
+        print(f"   Final API params: {params}")
+        
+        # Start the cases query now so it runs while the filters load
+        repository = CaseRepository.for_request()
+        cases_future = request_executor().submit(lambda: repository.list(**params))
+        
+        # STEP 2: Get dynamic filters (cached in-process until an admin changes them)
         dynamic_filters = {}
         filter_api_success = False
         
         try:
             print(f"🔍 Calling filter API...")
-            filter_response = APIClient.get('/cases/filters')
-            print(f"   🔍 Filter API Response type: {type(filter_response)}")
-            print(f"   🔍 Filter API Response content: {filter_response}")
-            
-            if isinstance(filter_response, dict) and 'filters' in filter_response:
-                dynamic_filters = filter_response['filters']
-                filter_api_success = True
-                print(f"   ✅ SUCCESS: Loaded {len(dynamic_filters)} dynamic filter categories")
-                print(f"   📋 Available categories: {list(dynamic_filters.keys())}")
-                
-                # Debug each category
-                for category, options in dynamic_filters.items():
-                    print(f"     - {category}: {len(options)} options")
-                    if options:
-                        print(f"       Sample: {options[:3]}")
-                    else:
-                        print(f"       (empty)")
-                        
-            elif isinstance(filter_response, dict) and 'error' in filter_response:
-                print(f"   ❌ Filter API returned error: {filter_response.get('error')}")
-                # Check if there are fallback filters in the response
-                if 'filters' in filter_response:
-                    dynamic_filters = filter_response['filters']
-                    filter_api_success = True
-                    print(f"   🔄 Using fallback filters from API response")
-                    
-            else:
-                print(f"   ⚠️ Unexpected filter response format: {filter_response}")
+            dynamic_filters = repository.filters() or {}
+            filter_api_success = bool(dynamic_filters)
+            if filter_api_success:
+                print(f"   ✅ Loaded {len(dynamic_filters)} dynamic filter categories: {list(dynamic_filters.keys())}")
                 
         except Exception as filter_error:
             print(f"   ❌ Error loading dynamic filters: {filter_error}")
@@ -94,51 +102,17 @@ def index():
                 dynamic_filters[category] = []
                 print(f"   ⚠️ Added missing category: {category}")
         
-        # STEP 2: Build API parameters for cases
-        params = {
-            'limit': per_page,
-            'skip': skip
-        }
-        
-        # Add filter parameters if provided
-        if search:
-            params['search'] = search
-        if status:  # Only add status filter if not empty
-            params['status'] = status
-        if case_type:
-            params['case_type'] = case_type
-        if financial_institution:
-            params['financial_institution'] = financial_institution
-        if priority:
-            params['priority'] = priority
-        
-        # Add sorting parameters
-        if sort_by and sort_order:
-            params['sort_by'] = sort_by
-            params['sort_order'] = sort_order
-            print(f"   Added sort params to API: sort_by={sort_by}, sort_order={sort_order}")
-        
-        print(f"   Final API params: {params}")
-        
-        # STEP 3: Make API call to get cases
-        response = APIClient.get('/cases/', params)
-        print(f"   API Response type: {type(response)}")
-        
-        # Handle different response formats
-        if isinstance(response, dict):
-            cases = response.get('items', [])
-            total = response.get('total', 0)
-            total_pages = response.get('pages', 1)
-            has_next = response.get('page', 1) < total_pages
-            has_prev = response.get('page', 1) > 1
+        # STEP 3: Collect the cases
+        cases_page = cases_future.result()
+        cases = cases_page.items
+        total = cases_page.total
+        total_pages = cases_page.total_pages
+        has_next = cases_page.has_next
+        has_prev = cases_page.has_prev
+        if cases_page.paginated:
             print(f"   Got {len(cases)} cases from API")
         else:
-            # Fallback for simple list response
-            cases = response if isinstance(response, list) else []
-            total = len(cases)
-            total_pages = 1
-            has_next = False
-            has_prev = False
+            # Simple list response
             print(f"   Fallback: Got {len(cases)} cases, doing client-side sorting")
             
             # If API doesn't support sorting, do client-side sorting
@@ -272,14 +246,16 @@ def sort_cases_client_side(cases, sort_by, sort_order):
 @require_auth
 def detail(case_id):
     try:
-        case = APIClient.get(f'/cases/{case_id}')
+        case = CaseRepository.for_request().get(case_id)
+        if case is None:
+            flash('Case not found', 'error')
+            return redirect(url_for('cases.index'))
         # Get related loan and account info
-        loan = None
-        account = None
-        if case.get('loan_id'):
-            loan = APIClient.get(f'/loans/{case["loan_id"]}')
-        if case.get('account_id'):
-            account = APIClient.get(f'/accounts/{case["account_id"]}')
+        pending = [
+            LoanRepository.for_request().load(case.get('loan_id')),
+            AccountRepository.for_request().load(case.get('account_id')),
+        ]
+        loan, account = [record.get() for record in pending]
             
     except Exception as e:
         flash(f'Error loading case: {str(e)}', 'error')
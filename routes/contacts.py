@@ -1,7 +1,7 @@
 # routes/contacts.py - Contacts Blueprint
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from utils.auth import require_auth
-from utils.api_client import APIClient
+from utils.repository import ContactRepository, LoanRepository, CaseRepository
 
 contacts_bp = Blueprint('contacts', __name__)
 
@@ -12,21 +12,20 @@ def index():
         search = request.args.get('search', '')
         contact_type = request.args.get('type', '')
         
-        params = {'limit': 100}
-        if search:
-            params['search'] = search
-        if contact_type:
-            params['contact_type'] = contact_type
-        
-        response = APIClient.get('/contacts/', params)
-        contacts = response.get('items', []) if isinstance(response, dict) else response
+        contacts_page = ContactRepository.for_request().list(limit=100, search=search, contact_type=contact_type)
+        contacts = contacts_page.items
+        total = contacts_page.total
         
     except Exception as e:
         flash(f'Error loading contacts: {str(e)}', 'error')
         contacts = []
+        total = 0
     
     return render_template('contacts/index.html', 
                          contacts=contacts,
+                         page=1,
+                         total_pages=1,
+                         total=total,
                          search=search,
                          contact_type=contact_type)
 
@@ -34,13 +33,12 @@ def index():
 @require_auth
 def detail(contact_id):
     try:
-        contact = APIClient.get(f'/contacts/{contact_id}')
+        contact = ContactRepository.for_request().get(contact_id)
+        if contact is None:
+            raise LookupError(f"contact {contact_id} not found")
         # Get related loans and cases
-        loans = APIClient.get('/loans/', {'contact_id': contact_id})
-        cases = APIClient.get('/cases/', {'contact_id': contact_id})
-        
-        loans = loans.get('items', []) if isinstance(loans, dict) else loans
-        cases = cases.get('items', []) if isinstance(cases, dict) else cases
+        loans = LoanRepository.for_request().list(limit=100, contact_id=contact_id).items
+        cases = CaseRepository.for_request().list(limit=100, contact_id=contact_id).items
         
     except Exception as e:
         flash(f'Error loading contact: {str(e)}', 'error')
@@ -2,6 +2,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 import requests
 import os
+from utils.gateway import gateway
+from utils.loader import entity_loader
+from utils.repository import LoanRepository, NotFound, Unauthorized
 from datetime import datetime
 
 loans_bp = Blueprint('loans', __name__, url_prefix='/loans')
@@ -52,7 +55,7 @@ def index():
         params = {k: v for k, v in params.items() if v}
         
         # Fetch loans from FastAPI
-        response = requests.get(f"{FASTAPI_BASE_URL}/api/loans/", headers=headers, params=params)
+        response = gateway.get(f"{FASTAPI_BASE_URL}/api/loans/", headers=headers, params=params)
         
         if response.status_code == 401:
             session.clear()
@@ -81,7 +84,7 @@ def index():
             # Fetch all accounts to create a lookup dictionary
             # Assuming the accounts endpoint can return all accounts without pagination. 
             # If it's paginated, this logic will need to be more complex.
-            accounts_response = requests.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
+            accounts_response = gateway.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
             if accounts_response.status_code == 200:
                 accounts_data = accounts_response.json()
                 # Handle paginated or non-paginated accounts response
@@ -132,8 +135,8 @@ def new():
             return redirect(url_for('auth.login'))
         
         # Load accounts and contacts for dropdowns
-        accounts_response = requests.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
-        contacts_response = requests.get(f"{FASTAPI_BASE_URL}/api/contacts/", headers=headers)
+        accounts_response = gateway.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
+        contacts_response = gateway.get(f"{FASTAPI_BASE_URL}/api/contacts/", headers=headers)
         
         accounts = []
         contacts = []
@@ -182,21 +185,14 @@ def create():
         # Remove None values
         loan_data = {k: v for k, v in loan_data.items() if v is not None and v != ''}
         
-        response = requests.post(
-            f"{FASTAPI_BASE_URL}/api/loans/",
-            headers=headers,
-            json=loan_data
-        )
-        
-        if response.status_code == 401:
-            session.clear()
-            return redirect(url_for('auth.login'))
-        
-        response.raise_for_status()
+        LoanRepository(FASTAPI_BASE_URL, headers).create(loan_data)
         
         flash('Loan created successfully!', 'success')
         return redirect(url_for('loans.index'))
         
+    except Unauthorized:
+        session.clear()
+        return redirect(url_for('auth.login'))
     except requests.RequestException as e:
         flash(f'Error creating loan: {str(e)}', 'error')
         return redirect(url_for('loans.new'))
@@ -217,40 +213,21 @@ def detail(loan_id):
             return redirect(url_for('auth.login'))
         
         # Fetch loan details
-        response = requests.get(f"{FASTAPI_BASE_URL}/api/loans/{loan_id}", headers=headers)
-        
-        if response.status_code == 401:
-            session.clear()
-            return redirect(url_for('auth.login'))
-        elif response.status_code == 404:
+        loan = LoanRepository(FASTAPI_BASE_URL, headers).get(loan_id)
+        if loan is None:
             flash('Loan not found', 'error')
             return redirect(url_for('loans.index'))
         
-        response.raise_for_status()
-        loan = response.json()
-        
-        # Load related data
-        account = None
-        contact = None
-        
-        if loan.get('account_id'):
-            try:
-                account_response = requests.get(f"{FASTAPI_BASE_URL}/api/accounts/{loan['account_id']}", headers=headers)
-                if account_response.status_code == 200:
-                    account = account_response.json()
-            except:
-                pass
-        
-        if loan.get('contact_id'):
-            try:
-                contact_response = requests.get(f"{FASTAPI_BASE_URL}/api/contacts/{loan['contact_id']}", headers=headers)
-                if contact_response.status_code == 200:
-                    contact = contact_response.json()
-            except:
-                pass
+        # Load related data - one batched call per collection
+        loader = entity_loader(FASTAPI_BASE_URL, headers)
+        pending = [loader.load('accounts', loan.get('account_id')), loader.load('contacts', loan.get('contact_id'))]
+        account, contact = [record.get() for record in pending]
         
         return render_template('loans/detail.html', loan=loan, account=account, contact=contact)
         
+    except Unauthorized:
+        session.clear()
+        return redirect(url_for('auth.login'))
     except requests.RequestException as e:
         flash(f'Error loading loan: {str(e)}', 'error')
         return redirect(url_for('loans.index'))
@@ -268,7 +245,7 @@ def edit(loan_id):
             return redirect(url_for('auth.login'))
         
         # Fetch loan details
-        response = requests.get(f"{FASTAPI_BASE_URL}/api/loans/{loan_id}", headers=headers)
+        response = gateway.get(f"{FASTAPI_BASE_URL}/api/loans/{loan_id}", headers=headers)
         
         if response.status_code == 401:
             session.clear()
@@ -281,8 +258,8 @@ def edit(loan_id):
         loan = response.json()
         
         # Load accounts and contacts for dropdowns
-        accounts_response = requests.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
-        contacts_response = requests.get(f"{FASTAPI_BASE_URL}/api/contacts/", headers=headers)
+        accounts_response = gateway.get(f"{FASTAPI_BASE_URL}/api/accounts/", headers=headers)
+        contacts_response = gateway.get(f"{FASTAPI_BASE_URL}/api/contacts/", headers=headers)
         
         accounts = []
         contacts = []
@@ -331,24 +308,17 @@ def update(loan_id):
         # Remove None values
         loan_data = {k: v for k, v in loan_data.items() if v is not None and v != ''}
         
-        response = requests.put(
-            f"{FASTAPI_BASE_URL}/api/loans/{loan_id}",
-            headers=headers,
-            json=loan_data
-        )
-        
-        if response.status_code == 401:
-            session.clear()
-            return redirect(url_for('auth.login'))
-        elif response.status_code == 404:
-            flash('Loan not found', 'error')
-            return redirect(url_for('loans.index'))
-        
-        response.raise_for_status()
+        LoanRepository(FASTAPI_BASE_URL, headers).update(loan_id, loan_data)
         
         flash('Loan updated successfully!', 'success')
         return redirect(url_for('loans.detail', loan_id=loan_id))
         
+    except Unauthorized:
+        session.clear()
+        return redirect(url_for('auth.login'))
+    except NotFound:
+        flash('Loan not found', 'error')
+        return redirect(url_for('loans.index'))
     except requests.RequestException as e:
         flash(f'Error updating loan: {str(e)}', 'error')
         return redirect(url_for('loans.edit', loan_id=loan_id))
@@ -368,20 +338,17 @@ def delete(loan_id):
         if not headers:
             return redirect(url_for('auth.login'))
         
-        response = requests.delete(f"{FASTAPI_BASE_URL}/api/loans/{loan_id}", headers=headers)
-        
-        if response.status_code == 401:
-            session.clear()
-            return redirect(url_for('auth.login'))
-        elif response.status_code == 404:
-            flash('Loan not found', 'error')
-            return redirect(url_for('loans.index'))
-        
-        response.raise_for_status()
+        LoanRepository(FASTAPI_BASE_URL, headers).delete(loan_id)
         
         flash('Loan deleted successfully!', 'success')
         return redirect(url_for('loans.index'))
         
+    except Unauthorized:
+        session.clear()
+        return redirect(url_for('auth.login'))
+    except NotFound:
+        flash('Loan not found', 'error')
+        return redirect(url_for('loans.index'))
     except requests.RequestException as e:
         flash(f'Error deleting loan: {str(e)}', 'error')
         return redirect(url_for('loans.detail', loan_id=loan_id))
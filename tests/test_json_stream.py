@@ -0,0 +1,49 @@
+# tests/test_json_stream.py - Streamed JSON rows match json.loads wherever the chunks are cut
+import json
+
+import pytest
+
+from utils.json_stream import iter_json_items
+
+PAYLOADS = [
+    b'[1.5, -2, 3e5, 4.25E-2, 0, 17]',
+    b'[1, 22, 333]',
+    b'{"total": 12.5, "items": [{"id": 1, "balance": 1.5e3}, {"id": 22, "balance": -0.75}]}',
+    b'{"page": 1, "ok": true, "skip": null, "items": [true, false, null, "a,b]"]}',
+    '{"items": [{"name": "Zo\u00eb \\"Q\\"", "city": "Montr\u00e9al \u2013 \u00e9t\u00e9"}]}'.encode(),
+    '[{"note": "caf\u00e9 \U0001f697 \\u00e9", "n": 1}]'.encode(),
+    b'{"data": [1, 2], "items": [[1, [2, {"a": [3]}]], {}]}',
+    b' \n [ ] ',
+    b'{"total": 0, "items": []}',
+    b'{"total": 3}',
+]
+
+
+def expected_rows(payload):
+    data = json.loads(payload)
+    return data if isinstance(data, list) else data.get('items', [])
+
+
+def two_chunk_splits(payload):
+    for cut in range(1, len(payload)):
+        yield [payload[:cut], payload[cut:]]
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_rows_survive_every_two_chunk_split(payload):
+    expected = expected_rows(payload)
+    for chunks in two_chunk_splits(payload):
+        assert list(iter_json_items(chunks)) == expected, chunks
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_rows_survive_one_byte_chunks(payload):
+    chunks = [payload[i:i + 1] for i in range(len(payload))]
+    assert list(iter_json_items(chunks)) == expected_rows(payload)
+
+
+@pytest.mark.parametrize('payload', [b'[1, 2', b'[1 2]', b'{"items": [1,, 2]}', b'{"items" [1]}'])
+def test_malformed_payload_raises_value_error(payload):
+    for chunks in two_chunk_splits(payload):
+        with pytest.raises(ValueError):
+            list(iter_json_items(chunks))
@@ -1,7 +1,7 @@
 # utils/api_client.py - API Client for FastAPI Backend
-import requests
 from flask import current_app, session
 from utils.auth import get_auth_headers
+from utils.gateway import gateway
 
 class APIClient:
     @staticmethod
@@ -11,7 +11,7 @@ class APIClient:
         headers = get_auth_headers()
         headers['Content-Type'] = 'application/json'
         
-        response = requests.request(
+        response = gateway.request(
             method=method,
             url=url,
             json=data,
@@ -1,21 +1,81 @@
 # utils/auth.py - Enhanced Authentication Utilities with Admin Features
 from functools import wraps
-from flask import session, redirect, url_for, request, current_app, flash, jsonify
+from flask import session, redirect, url_for, request, current_app, flash, jsonify, has_request_context
 import requests
 import logging
+import hashlib
+import base64
+import json
+import time
+from utils.gateway import gateway
+from utils.concurrency import gather
 
 logger = logging.getLogger(__name__)
 
+def _token_hash(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _token_expiry(token):
+    """Read the 'exp' claim of a JWT access token without verifying it (None if absent)"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+def is_token_verified(token):
+    """Check whether this session already verified the token and the result is still fresh"""
+    cached = session.get('token_verification')
+    if not cached or cached.get('token_hash') != _token_hash(token):
+        return False
+    return cached.get('expires_at', 0) > time.time()
+
+def remember_verified_token(token):
+    """Cache a successful verification, bounded by the TTL and the token's own expiry"""
+    ttl = current_app.config.get('AUTH_VERIFY_CACHE_TTL', 0)
+    if ttl <= 0:
+        return
+    expires_at = time.time() + ttl
+    token_exp = _token_expiry(token)
+    if token_exp is not None:
+        expires_at = min(expires_at, token_exp)
+    session['token_verification'] = {'token_hash': _token_hash(token), 'expires_at': expires_at}
+
+def forget_verified_token():
+    """Drop the cached verification so the next request re-checks the token"""
+    session.pop('token_verification', None)
+
+@gateway.on_unauthorized
+def _revoke_verified_token(response):
+    # Any 401 from the backend means the token was revoked or expired early
+    if has_request_context():
+        forget_verified_token()
+
+@gateway.role_scope_resolver
+def _session_role_scope():
+    # Role-shared backend reads are only pooled for signed-in users of the current request
+    # whose roles are known; before login has stored them (or for a user with none) every
+    # read stays per token, so one user's response is never handed to another
+    if has_request_context() and 'access_token' in session:
+        return get_role_scope() or None
+    return None
+
 def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'access_token' not in session:
             return redirect(url_for('auth.login'))
         
+        access_token = session['access_token']
+        if is_token_verified(access_token):
+            return f(*args, **kwargs)
+        
         # Verify token is still valid
         try:
-            headers = {'Authorization': f"Bearer {session['access_token']}"}
-            response = requests.get(f"{current_app.config['FASTAPI_BASE_URL']}/api/auth/verify-token", headers=headers)
+            headers = {'Authorization': f"Bearer {access_token}"}
+            response = gateway.get(f"{current_app.config['FASTAPI_BASE_URL']}/api/auth/verify-token", headers=headers)
             if response.status_code != 200:
                 session.clear()
                 return redirect(url_for('auth.login'))
@@ -23,6 +83,7 @@ def require_auth(f):
             session.clear()
             return redirect(url_for('auth.login'))
         
+        remember_verified_token(access_token)
         return f(*args, **kwargs)
     return decorated_function
 
@@ -43,34 +104,11 @@ def require_admin(f):
         if session_admin or any(role.lower() in ['admin', 'administrator', 'system_admin'] for role in session_roles):
             return f(*args, **kwargs)
         
-        # Enhanced fallback: Check admin access with new verify endpoint
-        headers = {'Authorization': f'Bearer {session["access_token"]}'}
-        try:
-            # Try the new verify-access endpoint first (if available)
-            response = requests.get(f'{current_app.config["FASTAPI_BASE_URL"]}/api/admin/verify-access', headers=headers, timeout=10)
-            if response.status_code == 200:
-                admin_data = response.json()
-                if admin_data.get('success') and admin_data.get('capabilities', {}).get('is_admin'):
-                    # Update session with admin info for future requests
-                    session['user_info']['is_admin'] = True
-                    session['user_info']['admin_capabilities'] = admin_data.get('capabilities', {})
-                    session['user_info']['user_roles'] = admin_data.get('user', {}).get('roles', [])
-                    return f(*args, **kwargs)
-            
-            # Fallback to original stats endpoint check
-            response = requests.get(f'{current_app.config["FASTAPI_BASE_URL"]}/api/admin/stats', headers=headers, timeout=10)
-            if response.status_code == 200:
-                # Update session with admin flag for future requests
-                session['user_info']['is_admin'] = True
-                return f(*args, **kwargs)
-            else:
-                flash('Admin access required.', 'error')
-                return redirect(url_for('dashboard'))
-                
-        except requests.RequestException as e:
-            logger.error(f"Error verifying admin access: {e}")
-            flash('Unable to verify admin access.', 'error')
+        # The status resolved at login is trusted until it expires; only then is it re-queried
+        if admin_status_is_fresh() or not refresh_admin_status():
+            flash('Admin access required.', 'error')
             return redirect(url_for('dashboard'))
+        return f(*args, **kwargs)
         
     return decorated_function
 
@@ -89,14 +127,31 @@ def require_admin_permission(permission_name):
     return decorator
 
 def check_admin_access(access_token):
-    """Enhanced admin access check with capabilities"""
+    """Enhanced admin access check with capabilities.
+
+    The verify-access endpoint and the older stats/roles fallbacks are probed
+    in parallel; verify-access wins when it answers.
+    """
     headers = {'Authorization': f'Bearer {access_token}'}
+    base_url = current_app.config["FASTAPI_BASE_URL"]
+    
+    def probe(endpoint):
+        try:
+            return gateway.get(f'{base_url}/api/admin/{endpoint}', headers=headers, timeout=10)
+        except requests.RequestException as e:
+            logger.error(f"Error checking admin access via {endpoint}: {e}")
+            return None
+    
+    verify_response, stats_response, roles_response = gather(
+        lambda: probe('verify-access'),
+        lambda: probe('stats'),
+        lambda: probe('roles'),
+    )
     
     try:
-        # Try the new verify-access endpoint first (if available)
-        response = requests.get(f'{current_app.config["FASTAPI_BASE_URL"]}/api/admin/verify-access', headers=headers, timeout=10)
-        if response.status_code == 200:
-            admin_data = response.json()
+        # Prefer the new verify-access endpoint (if available)
+        if verify_response is not None and verify_response.status_code == 200:
+            admin_data = verify_response.json()
             return {
                 'is_admin': admin_data.get('success', False) and admin_data.get('capabilities', {}).get('is_admin', False),
                 'user_roles': admin_data.get('user', {}).get('roles', []),
@@ -105,14 +160,11 @@ def check_admin_access(access_token):
             }
         
         # Fallback to original method
-        response = requests.get(f'{current_app.config["FASTAPI_BASE_URL"]}/api/admin/stats', headers=headers, timeout=10)
-        is_admin = response.status_code == 200
+        is_admin = stats_response is not None and stats_response.status_code == 200
         
         # Get user roles for additional checking
-        roles_response = requests.get(f'{current_app.config["FASTAPI_BASE_URL"]}/api/admin/roles', headers=headers, timeout=10)
         user_roles = []
-        
-        if roles_response.status_code == 200:
+        if roles_response is not None and roles_response.status_code == 200:
             roles_data = roles_response.json()
             user_roles = roles_data.get('user_roles', [])
             # Additional admin check based on roles
@@ -125,7 +177,7 @@ def check_admin_access(access_token):
             'admin_level': 'full' if is_admin else 'none'
         }
         
-    except requests.RequestException as e:
+    except ValueError as e:
         logger.error(f"Error checking admin access: {e}")
         return {
             'is_admin': False,
@@ -134,6 +186,35 @@ def check_admin_access(access_token):
             'admin_level': 'none'
         }
 
+def store_admin_status(admin_info):
+    """Save a resolved admin status in the session, trusted until ADMIN_STATUS_TTL expires"""
+    user_info = session.get('user_info', {})
+    user_info.update({
+        'is_admin': admin_info['is_admin'],
+        'user_roles': admin_info['user_roles'],
+        'admin_capabilities': admin_info['admin_capabilities'],
+        'admin_level': admin_info['admin_level'],
+        'admin_checked_until': time.time() + current_app.config['ADMIN_STATUS_TTL']
+    })
+    session['user_info'] = user_info
+
+def admin_status_is_fresh():
+    """True while the admin status resolved at login (or last refresh) is still trusted"""
+    user_info = session.get('user_info') or {}
+    return user_info.get('admin_checked_until', 0) > time.time()
+
+def resolve_admin_status():
+    """Resolve admin capabilities once for a freshly logged-in session.
+
+    Flags the login response already granted are kept; the probes can only add to them.
+    """
+    user_info = session.get('user_info', {})
+    admin_info = check_admin_access(session['access_token'])
+    admin_info['is_admin'] = admin_info['is_admin'] or bool(user_info.get('is_admin'))
+    admin_info['user_roles'] = admin_info['user_roles'] or user_info.get('user_roles', [])
+    store_admin_status(admin_info)
+    return admin_info['is_admin']
+
 def handle_successful_login(user_data, access_token):
     """Enhanced login handler with admin capability checking"""
     session['access_token'] = access_token
@@ -148,10 +229,7 @@ def handle_successful_login(user_data, access_token):
     
     # Enhanced admin access check
     admin_info = check_admin_access(access_token)
-    session['user_info']['is_admin'] = admin_info['is_admin']
-    session['user_info']['user_roles'] = admin_info['user_roles']
-    session['user_info']['admin_capabilities'] = admin_info['admin_capabilities']
-    session['user_info']['admin_level'] = admin_info['admin_level']
+    store_admin_status(admin_info)
     
     logger.info(f"User {user_data.get('username')} logged in with admin status: {admin_info['is_admin']}")
 
@@ -170,15 +248,15 @@ def make_api_request(endpoint, method='GET', data=None, timeout=30):
     
     try:
         if method == 'GET':
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = gateway.get(url, headers=headers, timeout=timeout)
         elif method == 'POST':
-            response = requests.post(url, headers=headers, json=data, timeout=timeout)
+            response = gateway.post(url, headers=headers, json=data, timeout=timeout)
         elif method == 'PUT':
-            response = requests.put(url, headers=headers, json=data, timeout=timeout)
+            response = gateway.put(url, headers=headers, json=data, timeout=timeout)
         elif method == 'DELETE':
-            response = requests.delete(url, headers=headers, timeout=timeout)
+            response = gateway.delete(url, headers=headers, timeout=timeout)
         elif method == 'PATCH':
-            response = requests.patch(url, headers=headers, json=data, timeout=timeout)
+            response = gateway.patch(url, headers=headers, json=data, timeout=timeout)
         else:
             raise ValueError(f"Unsupported method: {method}")
         
@@ -211,6 +289,19 @@ def get_user_roles():
     user_info = get_user_info()
     return user_info.get('user_roles', []) if user_info else []
 
+def get_role_scope():
+    """Current user's roles as a hashable key for data shared between users with the same roles"""
+    return tuple(sorted({str(role).lower() for role in get_user_roles()}))
+
+def get_cache_scope():
+    """Key for app-side caches of backend data: ('roles', roles) when the user's roles are known,
+    otherwise ('token', hash of the access token), the same fallback the gateway uses"""
+    role_scope = _session_role_scope()
+    if role_scope is not None:
+        return ('roles', role_scope)
+    token = session.get('access_token') if has_request_context() else None
+    return ('token', _token_hash(token) if token else None)
+
 def get_admin_capabilities():
     """Get current user's admin capabilities"""
     user_info = get_user_info()
@@ -235,7 +326,7 @@ def get_admin_level():
     return user_info.get('admin_level', 'none') if user_info else 'none'
 
 def refresh_admin_status():
-    """Refresh admin status from API (useful after role changes)"""
+    """Refresh admin status from API (useful after role changes) - the only path that re-queries it"""
     if 'access_token' not in session:
         return False
         
@@ -243,16 +334,9 @@ def refresh_admin_status():
         admin_info = check_admin_access(session['access_token'])
         
         # Update session
-        user_info = session.get('user_info', {})
-        user_info.update({
-            'is_admin': admin_info['is_admin'],
-            'user_roles': admin_info['user_roles'],
-            'admin_capabilities': admin_info['admin_capabilities'],
-            'admin_level': admin_info['admin_level']
-        })
-        session['user_info'] = user_info
+        store_admin_status(admin_info)
         
-        logger.info(f"Refreshed admin status for user: {user_info.get('username')} - Admin: {admin_info['is_admin']}")
+        logger.info(f"Refreshed admin status for user: {session['user_info'].get('username')} - Admin: {admin_info['is_admin']}")
         return admin_info['is_admin']
         
     except Exception as e:
@@ -0,0 +1,151 @@
+# utils/batch.py - Fetch a collection for many accounts in as few backend calls as possible
+import time
+import threading
+import logging
+
+import requests
+
+from config import Config
+from utils.gateway import gateway
+from utils.concurrency import gather
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the backend rejects a filter parameter, rather than failing this once
+FILTER_REFUSED_STATUSES = (400, 422)
+
+
+class UnsupportedFilters:
+    """Collections whose backend refused or ignored a multi-id filter.
+
+    Each is remembered for ``BATCH_UNSUPPORTED_TTL`` seconds, after which the
+    batched call is tried again, so a backend that gains the filter (or was
+    misjudged) is picked up without a restart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until = {}
+
+    def __contains__(self, name):
+        return self._until.get(name, 0) > time.time()
+
+    def add(self, name):
+        with self._lock:
+            self._until[name] = time.time() + Config.BATCH_UNSUPPORTED_TTL
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+
+
+# Collections to send straight to the per-account fallback
+_unsupported = UnsupportedFilters()
+
+
+def _items(data):
+    if isinstance(data, dict):
+        return data.get('items', [])
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _fetch_chunk(url, headers, chunk, params, per_account, timeout):
+    """One filtered call for a chunk of accounts, following pages if the backend caps the limit.
+
+    Returns None when the backend does not honour ``account_ids`` (400/422, or rows for
+    accounts outside the chunk), so the caller can fall back. Any other failure raises.
+    """
+    wanted = {str(account_id) for account_id in chunk}
+    limit = per_account * len(chunk)
+    rows = []
+    skip = 0
+    while True:
+        response = gateway.get(
+            url,
+            headers=headers,
+            params={**params, 'account_ids': ','.join(str(a) for a in chunk), 'skip': skip, 'limit': limit},
+            timeout=timeout
+        )
+        if response.status_code in FILTER_REFUSED_STATUSES:
+            return None
+        response.raise_for_status()
+        data = response.json()
+        page = _items(data)
+        if any(str(row.get('account_id')) not in wanted for row in page):
+            return None
+        rows.extend(page)
+        total = data.get('total') if isinstance(data, dict) else None
+        if not page or total is None or len(rows) >= total:
+            return rows
+        skip += len(page)
+
+
+def _fetch_one(url, headers, account_id, params, per_account, timeout):
+    try:
+        response = gateway.get(
+            url,
+            headers=headers,
+            params={**params, 'account_id': account_id, 'limit': per_account},
+            timeout=timeout
+        )
+        if response.status_code == 200:
+            return _items(response.json())
+        if response.status_code != 404:
+            logger.warning(f"Account {account_id} lookup returned {response.status_code}")
+    except requests.RequestException as e:
+        logger.warning(f"Account {account_id} lookup failed: {e}")
+    return []
+
+
+def fetch_for_accounts(base_url, path, headers, account_ids, params=None, per_account=50, timeout=8):
+    """Fetch rows of ``path`` (e.g. ``/api/loans/``) belonging to any of ``account_ids``.
+
+    Accounts are sent ``BATCH_CHUNK_SIZE`` at a time through the ``account_ids``
+    filter. If the backend does not support that filter the accounts are
+    fetched one by one in parallel instead, and the collection is remembered
+    for ``BATCH_UNSUPPORTED_TTL`` seconds so later pages go straight to the
+    parallel fallback. A chunk that fails for any other reason (timeout, 5xx)
+    falls back on its own without flagging the collection.
+    """
+    account_ids = list(dict.fromkeys(a for a in account_ids if a))
+    if not account_ids:
+        return []
+
+    url = f"{base_url}{path}"
+    params = dict(params or {})
+    rows = []
+    pending = account_ids
+
+    if path not in _unsupported:
+        pending = []
+        chunks = list(_chunks(account_ids, Config.BATCH_CHUNK_SIZE))
+        for position, chunk in enumerate(chunks):
+            try:
+                chunk_rows = _fetch_chunk(url, headers, chunk, params, per_account, timeout)
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Batched {path} lookup failed: {e}")
+                pending.extend(chunk)
+                continue
+            if chunk_rows is None:
+                # The filter itself was refused - send this and every remaining chunk to the fallback
+                _unsupported.add(path)
+                logger.info(f"{path} does not support account_ids - using parallel per-account lookups")
+                for remaining in chunks[position:]:
+                    pending.extend(remaining)
+                break
+            rows.extend(chunk_rows)
+
+    if pending:
+        for account_rows in gather(*[
+            (lambda account_id=account_id: _fetch_one(url, headers, account_id, params, per_account, timeout))
+            for account_id in pending
+        ]):
+            rows.extend(account_rows)
+    return rows
@@ -0,0 +1,85 @@
+# utils/cache_tags.py - Which cached backend reads a backend write makes stale
+from urllib.parse import urlsplit
+
+# Backend collections whose records the app reads and writes
+ENTITY_COLLECTIONS = ('accounts', 'contacts', 'loans', 'assets', 'cases')
+
+# Record fields that point at a record of another collection
+FOREIGN_KEYS = {
+    'account_id': 'accounts',
+    'contact_id': 'contacts',
+    'loan_id': 'loans',
+    'asset_id': 'assets',
+    'case_id': 'cases',
+}
+
+# Writes outside the entity collections that change data read elsewhere
+# (path prefix -> tags evicted)
+WRITE_DEPENDENCIES = {
+    '/api/admin/filters': ('cases/filters',),
+}
+
+
+def _segments(url):
+    path = urlsplit(url).path
+    if not path.startswith('/api/'):
+        return []
+    return [segment for segment in path[len('/api/'):].split('/') if segment]
+
+
+def _reference_tags(record):
+    return {
+        f"{FOREIGN_KEYS[name]}:{value}" for name, value in record.items()
+        if name in FOREIGN_KEYS and value not in (None, '')
+    }
+
+
+def read_tags(url):
+    """Tags for a cached GET of ``url``.
+
+    ``/api/loans/5`` is tagged ``loans:5``. Lists, searches and stats of a
+    collection are tagged with the collection name (``loans``, plus e.g.
+    ``cases/filters`` for named sub-resources), and so are the panels of a
+    detail page however they are addressed: ``/api/loans/?account_id=3`` and
+    ``/api/accounts/3/loans`` are both tagged ``loans``.
+    """
+    segments = _segments(url)
+    if not segments:
+        return set()
+    collection, rest = segments[0], segments[1:]
+    if not rest:
+        return {collection}
+    if rest[0].isdigit():
+        if len(rest) > 1 and rest[1] in ENTITY_COLLECTIONS:
+            return {rest[1]}
+        return {f"{collection}:{rest[0]}"}
+    return {collection, f"{collection}/{rest[0]}"}
+
+
+def write_tags(url, *records):
+    """Tags to evict after a create/update/delete sent to ``url``.
+
+    A write to a record evicts its own detail, every list of its collection
+    (which covers filtered panels such as an account's loans), and the
+    details of the records it references in the request or response body
+    (``account_id``, ``contact_id``, ...). Returns None for writes these
+    rules do not describe.
+    """
+    path = urlsplit(url).path
+    tags = set()
+    for prefix, dependent in WRITE_DEPENDENCIES.items():
+        if path.startswith(prefix):
+            tags.update(dependent)
+
+    segments = _segments(url)
+    if not segments or segments[0] not in ENTITY_COLLECTIONS:
+        return tags or None
+
+    collection, rest = segments[0], segments[1:]
+    tags.add(collection)
+    if rest and rest[0].isdigit():
+        tags.add(f"{collection}:{rest[0]}")
+    for record in records:
+        if isinstance(record, dict):
+            tags |= _reference_tags(record)
+    return tags
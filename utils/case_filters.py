@@ -0,0 +1,109 @@
+# utils/case_filters.py - Cached case filter categories, invalidated by the admin filter routes
+import os
+import copy
+import time
+import uuid
+import threading
+import logging
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class VersionStamp:
+    """A version string kept in a small file so every worker process sees a bump.
+
+    Readers compare the stamp they cached against the file on each
+    lookup (one tiny read); ``bump`` writes a fresh value atomically.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def path(self):
+        return os.path.join(Config.CACHE_STAMP_DIR, f"{self.name}.version")
+
+    def read(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def bump(self):
+        # Created 0700 like the rest of BACKEND_CACHE_DIR, where the stamps live by default
+        os.makedirs(os.path.dirname(Config.CACHE_STAMP_DIR) or '.', mode=0o700, exist_ok=True)
+        os.makedirs(Config.CACHE_STAMP_DIR, mode=0o700, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.path)
+
+
+class CaseFilterCache:
+    """Filter categories for the cases page, held in-process.
+
+    A cached copy is used while its version stamp matches the shared stamp
+    and it is younger than ``CASE_FILTERS_TTL`` (a safety net for changes
+    made outside this app). The admin filter routes call ``invalidate`` after
+    a successful change, which drops this worker's copy and bumps the stamp
+    for the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = VersionStamp('case_filters')
+        self._filters = None
+        self._version = None
+        self._loaded_at = 0
+
+    def get(self, loader):
+        """Filter categories (a fresh copy), calling ``loader`` when the cache is cold or outdated.
+
+        ``loader`` returns the categories dict, or something falsy when the
+        backend had none to give; falsy results are not cached.
+        """
+        version = self._stamp.read()
+        with self._lock:
+            if (self._filters is not None and self._version == version
+                    and time.time() - self._loaded_at <= Config.CASE_FILTERS_TTL):
+                return copy.deepcopy(self._filters)
+
+        filters = loader()
+        if filters:
+            with self._lock:
+                self._filters = copy.deepcopy(filters)
+                self._version = version
+                self._loaded_at = time.time()
+        return filters
+
+    def export(self):
+        """The cached categories with their version and load time, or None"""
+        with self._lock:
+            if self._filters is None:
+                return None
+            return {'filters': copy.deepcopy(self._filters), 'version': self._version, 'loaded_at': self._loaded_at}
+
+    def restore(self, state):
+        """Load snapshot categories; ``get`` still checks them against the current stamp and TTL"""
+        if not state:
+            return 0
+        with self._lock:
+            if self._filters is None:
+                self._filters = state['filters']
+                self._version = state['version']
+                self._loaded_at = state['loaded_at']
+        return 1
+
+    def invalidate(self):
+        with self._lock:
+            self._filters = None
+        try:
+            self._stamp.bump()
+        except OSError as e:
+            logger.warning(f"Could not bump case filter version stamp: {e}")
+
+
+case_filter_cache = CaseFilterCache()
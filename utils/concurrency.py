@@ -0,0 +1,117 @@
+# utils/concurrency.py - Run a request's independent backend calls side by side
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import requests
+from flask import current_app, request as flask_request, copy_current_request_context, has_request_context
+
+from config import Config
+
+# WSGI environ key holding the request's executor; the environ is shared with the
+# copied request contexts used by worker threads, unlike flask.g
+EXECUTOR_ENVIRON_KEY = 'concurrency.executor'
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# Set while a pool thread runs a submitted call
+_worker = threading.local()
+
+
+def _shared_pool():
+    """Process-wide worker pool (rebuilt after a fork, like the gateway session)"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ThreadPoolExecutor(
+                    max_workers=Config.BACKEND_CONCURRENCY_WORKERS,
+                    thread_name_prefix='backend-call'
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def _run_inline(fn, *args, **kwargs):
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+class RequestExecutor:
+    """Submits one request's calls to the shared pool, at most ``max_in_flight`` at a time.
+
+    Each call runs inside a copy of the current request context, so ``session``,
+    ``request`` and ``current_app`` behave as they do in the view. Once the cap
+    is reached ``submit`` waits for a running call to finish, which keeps a
+    single page from flooding the backend.
+
+    A call submitted from a pool thread (a call that fans out again) runs
+    inline in that thread instead: a pool thread waiting on work queued behind
+    it in the same pool, or on a slot its own caller holds, would never wake.
+    """
+
+    def __init__(self, max_in_flight, timeout=None):
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self.timeout = timeout
+
+    def submit(self, fn, *args, **kwargs):
+        if getattr(_worker, 'active', False):
+            return _run_inline(fn, *args, **kwargs)
+        if has_request_context():
+            fn = copy_current_request_context(fn)
+
+        def run():
+            _worker.active = True
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _worker.active = False
+
+        self._slots.acquire()
+        try:
+            future = _shared_pool().submit(run)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def gather(self, *calls, timeout=None):
+        """Run zero-argument callables together and return their results in order.
+
+        The first exception raised by any call is re-raised once all have
+        finished. Calls still running after ``timeout`` seconds (the
+        executor's, by default ``REQUEST_GATHER_TIMEOUT``) raise
+        ``requests.Timeout``; those not yet started are cancelled.
+        """
+        futures = [self.submit(call) for call in calls]
+        timeout = timeout or self.timeout or Config.REQUEST_GATHER_TIMEOUT
+        _, pending = wait(futures, timeout=timeout)
+        if pending:
+            for future in pending:
+                future.cancel()
+            raise requests.Timeout(f"{len(pending)} of {len(futures)} backend calls still running after {timeout:g}s")
+        return [future.result() for future in futures]
+
+
+def request_executor():
+    """Executor for the current request, created on first use and shared with its worker threads"""
+    if not has_request_context():
+        return RequestExecutor(Config.REQUEST_CONCURRENCY, Config.REQUEST_GATHER_TIMEOUT)
+    executor = flask_request.environ.get(EXECUTOR_ENVIRON_KEY)
+    if executor is None:
+        executor = flask_request.environ.setdefault(EXECUTOR_ENVIRON_KEY, RequestExecutor(
+            current_app.config['REQUEST_CONCURRENCY'], current_app.config['REQUEST_GATHER_TIMEOUT']
+        ))
+    return executor
+
+
+def gather(*calls, timeout=None):
+    """Run independent backend calls for the current request concurrently"""
+    return request_executor().gather(*calls, timeout=timeout)
@@ -0,0 +1,563 @@
+# utils/gateway.py - Pooled keep-alive client shared by every call to the FastAPI backend
+import os
+import time
+import threading
+import logging
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import has_request_context, request as flask_request
+
+from config import Config
+from utils.response_cache import ResponseCache
+from utils.cache_tags import read_tags, write_tags
+from utils.shared_cache import CACHE_STORES, SQLiteInvalidationLog
+
+logger = logging.getLogger(__name__)
+
+# Settings read from the Flask config (falling back to config.Config)
+GATEWAY_SETTINGS = (
+    'BACKEND_POOL_CONNECTIONS',
+    'BACKEND_POOL_MAXSIZE',
+    'BACKEND_POOL_BLOCK',
+    'BACKEND_STREAM_POOL_MAXSIZE',
+    'BACKEND_MAX_RETRIES',
+    'BACKEND_DEFAULT_TIMEOUT',
+    'BACKEND_REQUEST_MEMO',
+    'BACKEND_COALESCE_GETS',
+    'BACKEND_ROLE_SHARED_PATHS',
+    'BACKEND_RESPONSE_CACHE',
+    'BACKEND_CACHE_MAX_BYTES',
+    'BACKEND_CACHE_DEFAULT_TTL',
+    'BACKEND_CACHE_TTLS',
+    'BACKEND_CACHE_L2',
+    'BACKEND_CACHE_L2_PATH',
+    'BACKEND_CACHE_L2_MAX_BYTES',
+    'BACKEND_CACHE_SYNC_PATH',
+    'BACKEND_STALE_IF_ERROR',
+    'BACKEND_STALE_BUDGET',
+)
+
+# WSGI environ key holding the per-request GET memo; the environ is shared with
+# the copied request contexts used by worker threads, unlike flask.g
+MEMO_ENVIRON_KEY = 'backend_gateway.memo'
+# WSGI environ key holding the age in seconds of the oldest stale response the request used
+STALE_ENVIRON_KEY = 'backend_gateway.stale'
+
+
+def normalized_url(url, params=None):
+    """URL with params merged into the query string and the query sorted"""
+    prepared = requests.Request('GET', url, params=params).prepare().url
+    parts = urlsplit(prepared)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+class _Flight:
+    """One GET in progress: the first caller fetches, identical callers wait for its result"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class BackendGateway:
+    """Process-wide HTTP client with a bounded keep-alive connection pool.
+
+    Exposes the same call signature as the ``requests`` module functions
+    (``get``, ``post``, ``put``, ``patch``, ``delete``, ``request``) so call
+    sites only swap ``requests.get(...)`` for ``gateway.get(...)``. Errors are
+    still raised as ``requests.RequestException`` subclasses.
+
+    Streamed requests go through a second session whose pool never blocks:
+    once its ``BACKEND_STREAM_POOL_MAXSIZE`` connections are busy, further
+    streams open a connection of their own, and the main pool stays free for
+    everything else however slowly a stream is read.
+    """
+
+    def __init__(self):
+        self._settings = {name: getattr(Config, name) for name in GATEWAY_SETTINGS}
+        self._lock = threading.Lock()
+        self._session = None
+        self._stream_session = None
+        self._pid = None
+        self._unauthorized_handlers = []
+        self._role_scope_resolver = None
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self.coalesced_calls = 0
+        self.response_cache = ResponseCache(
+            self._settings['BACKEND_CACHE_MAX_BYTES'], self._settings['BACKEND_STALE_IF_ERROR']
+        )
+        self._shared_store = None
+        self._invalidation_log = None
+        self._shared_cursor = None
+        self._shared_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read gateway settings from the app config and register the gateway"""
+        for name in GATEWAY_SETTINGS:
+            self._settings[name] = app.config.get(name, self._settings[name])
+        self.response_cache.max_bytes = self._settings['BACKEND_CACHE_MAX_BYTES']
+        self.response_cache.stale_grace = self._settings['BACKEND_STALE_IF_ERROR']
+        with self._lock:
+            self._close_session()
+            self._shared_store = None
+            self._invalidation_log = None
+        app.extensions['backend_gateway'] = self
+
+        @app.after_request
+        def _report_memo_savings(response):
+            saved = self.memo_saved_calls()
+            if saved:
+                logger.info(f"{flask_request.method} {flask_request.path}: request memo saved {saved} backend call(s)")
+            return response
+
+        @app.context_processor
+        def _inject_stale_data_age():
+            # Templates show a 'backend unavailable' notice when the page used stale data
+            return {'stale_data_age': self.stale_data_age()}
+
+    def _build_session(self, label, pool_maxsize, pool_block):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._settings['BACKEND_POOL_CONNECTIONS'],
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=self._settings['BACKEND_MAX_RETRIES'],
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # The session is shared by every user - never let backend cookies leak between them
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        logger.info(
+            f"Backend {label} pool ready (pid={os.getpid()}, "
+            f"hosts={self._settings['BACKEND_POOL_CONNECTIONS']}, "
+            f"per_host={pool_maxsize}, block={pool_block})"
+        )
+        return session
+
+    def _close_session(self):
+        if self._session is not None and self._pid == os.getpid():
+            self._session.close()
+            self._stream_session.close()
+        self._session = None
+        self._stream_session = None
+        self._pid = None
+
+    def _ensure_sessions(self):
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    # Never reuse sockets inherited from a parent worker process
+                    self._session = self._build_session(
+                        'connection', self._settings['BACKEND_POOL_MAXSIZE'], self._settings['BACKEND_POOL_BLOCK']
+                    )
+                    self._stream_session = self._build_session(
+                        'stream', self._settings['BACKEND_STREAM_POOL_MAXSIZE'], False
+                    )
+                    self._pid = pid
+
+    @property
+    def session(self):
+        """Pooled session for the current process (rebuilt after a fork)"""
+        self._ensure_sessions()
+        return self._session
+
+    @property
+    def stream_session(self):
+        """Session for streamed responses, on its own non-blocking pool"""
+        self._ensure_sessions()
+        return self._stream_session
+
+    def on_unauthorized(self, handler):
+        """Register a callback run with any backend response that comes back 401"""
+        self._unauthorized_handlers.append(handler)
+        return handler
+
+    def role_scope_resolver(self, resolver):
+        """Register a callback returning the current user's role scope (or None when unknown).
+
+        GETs under ``BACKEND_ROLE_SHARED_PATHS`` are coalesced and cached once
+        for all users with the same role scope; every other GET is only shared
+        per access token.
+        """
+        self._role_scope_resolver = resolver
+        return resolver
+
+    def auth_scope(self, url, headers=None):
+        """Who a GET's response may be shared with: ('roles', scope) or ('token', Authorization)"""
+        authorization = (headers or {}).get('Authorization')
+        if self._role_scope_resolver is not None and authorization:
+            path = urlsplit(url).path
+            if any(path.startswith(prefix) for prefix in self._settings['BACKEND_ROLE_SHARED_PATHS']):
+                role_scope = self._role_scope_resolver()
+                if role_scope is not None:
+                    return ('roles', role_scope)
+        return ('token', authorization)
+
+    def _request_memo(self):
+        if not self._settings['BACKEND_REQUEST_MEMO'] or not has_request_context():
+            return None
+        memo = flask_request.environ.get(MEMO_ENVIRON_KEY)
+        if memo is None:
+            memo = flask_request.environ.setdefault(
+                MEMO_ENVIRON_KEY, {'lock': threading.Lock(), 'entries': {}, 'saved': 0}
+            )
+        return memo
+
+    def memo_saved_calls(self):
+        """Backend calls the current request avoided by reusing an identical GET"""
+        if not has_request_context():
+            return 0
+        memo = flask_request.environ.get(MEMO_ENVIRON_KEY)
+        return memo['saved'] if memo else 0
+
+    def _check_unauthorized(self, response):
+        if response.status_code == 401:
+            for handler in self._unauthorized_handlers:
+                handler(response)
+        return response
+
+    def _send(self, method, url, **kwargs):
+        # A streamed body is read at the consumer's pace, so it never holds a connection from the main pool
+        session = self.stream_session if kwargs.get('stream') else self.session
+        return self._check_unauthorized(session.request(method, url, **kwargs))
+
+    def _coalesced_get(self, url, kwargs):
+        """GET that joins an identical in-flight GET from any thread in this process.
+
+        Calls are identical when the normalised URL and auth scope match; the
+        waiting callers receive the same response as the caller that sent it.
+        """
+        if not self._settings['BACKEND_COALESCE_GETS']:
+            return self._send('GET', url, **kwargs)
+
+        key = (normalized_url(url, kwargs.get('params')), self.auth_scope(url, kwargs.get('headers')))
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced_calls += 1
+
+        if owner:
+            try:
+                flight.response = self.session.request('GET', url, **kwargs)
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._flights_lock:
+                    self._flights.pop(key, None)
+                flight.done.set()
+        else:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if key[1][0] == 'roles' and flight.response.status_code == 401:
+                # Another user's token was refused - that says nothing about ours
+                return self._send('GET', url, **kwargs)
+        # Every caller runs the 401 handlers in its own request context
+        return self._check_unauthorized(flight.response)
+
+    def cache_ttl(self, url):
+        """Seconds a GET of ``url`` may be reused: the longest matching BACKEND_CACHE_TTLS prefix, else the default"""
+        path = urlsplit(url).path
+        matches = [prefix for prefix in self._settings['BACKEND_CACHE_TTLS'] if path.startswith(prefix)]
+        if matches:
+            return self._settings['BACKEND_CACHE_TTLS'][max(matches, key=len)]
+        return self._settings['BACKEND_CACHE_DEFAULT_TTL']
+
+    def cache_stats(self):
+        """Response cache counters (hits, misses, expired, evictions, ...) plus its current size"""
+        stats = self.response_cache.stats()
+        if self.shared_store is not None:
+            stats['shared'] = self.shared_store.stats()
+        return stats
+
+    @property
+    def shared_store(self):
+        """Second-level response store shared by the worker processes, or None when disabled"""
+        kind = self._settings['BACKEND_CACHE_L2']
+        if not kind or not self._settings['BACKEND_RESPONSE_CACHE']:
+            return None
+        if self._shared_store is None:
+            with self._lock:
+                if self._shared_store is None:
+                    store_class = CACHE_STORES.get(kind)
+                    if store_class is None:
+                        logger.warning(f"Unknown BACKEND_CACHE_L2 store '{kind}' - shared response cache disabled")
+                        self._settings['BACKEND_CACHE_L2'] = ''
+                        return None
+                    self._shared_store = store_class(
+                        self._settings['BACKEND_CACHE_L2_PATH'],
+                        self._settings['BACKEND_CACHE_L2_MAX_BYTES'],
+                        stale_grace=self._settings['BACKEND_STALE_IF_ERROR'],
+                    )
+        return self._shared_store
+
+    @property
+    def invalidation_log(self):
+        """Where writes are logged for the other worker processes, or None when nothing is cached.
+
+        The shared store when ``BACKEND_CACHE_L2`` is set, otherwise a log-only
+        file (``BACKEND_CACHE_SYNC_PATH``): each worker's in-process cache must
+        hear about writes handled by the others either way.
+        """
+        if not self._settings['BACKEND_RESPONSE_CACHE']:
+            return None
+        store = self.shared_store
+        if store is not None:
+            return store
+        if self._invalidation_log is None:
+            with self._lock:
+                if self._invalidation_log is None:
+                    self._invalidation_log = SQLiteInvalidationLog(self._settings['BACKEND_CACHE_SYNC_PATH'])
+        return self._invalidation_log
+
+    def stale_data_age(self):
+        """Age in seconds of the oldest stale response served to the current request, or None"""
+        if not has_request_context():
+            return None
+        return flask_request.environ.get(STALE_ENVIRON_KEY)
+
+    def _stale_copy(self, key, store):
+        if self._settings['BACKEND_STALE_IF_ERROR'] <= 0:
+            return None
+        stale = self.response_cache.get_stale(key)
+        if stale is None and store is not None:
+            stale = store.get_stale(key)
+        return stale
+
+    def _serve_stale(self, url, stale, reason):
+        response, age = stale
+        logger.warning(f"Serving {urlsplit(url).path} from cache (fetched {age:.0f}s ago): {reason}")
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        if has_request_context():
+            environ = flask_request.environ
+            environ[STALE_ENVIRON_KEY] = max(age, environ.get(STALE_ENVIRON_KEY) or 0)
+        return response
+
+    def _within_budget(self, kwargs):
+        """kwargs with the timeout capped at ``BACKEND_STALE_BUDGET`` (a stale copy is waiting)"""
+        budget = self._settings['BACKEND_STALE_BUDGET']
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, tuple):
+            timeout = tuple(budget if part is None else min(part, budget) for part in timeout)
+        else:
+            timeout = budget if timeout is None else min(timeout, budget)
+        return dict(kwargs, timeout=timeout)
+
+    def _sync_shared(self, log):
+        """Replay invalidations other workers logged against this process's cache"""
+        with self._shared_lock:
+            if self._shared_cursor is None:
+                self._shared_cursor = log.cursor()
+                return self._shared_cursor
+            cursor, changes = log.changes_since(self._shared_cursor)
+            if changes is None:
+                self.response_cache.clear()
+            for kind, value in changes or ():
+                if kind == 'tags':
+                    self.response_cache.invalidate_tags(value)
+                else:
+                    self.response_cache.invalidate(lambda key, tags: log.scope_digest(key[0]) == value)
+            self._shared_cursor = cursor
+            return cursor
+
+    def _invalidate_after_write(self, url, kwargs, response):
+        """Evict the cached reads a write may have changed, for every user and every worker.
+
+        The tags come from ``cache_tags.write_tags`` (the written record, its
+        collection's lists and the records named in the request or response
+        body). A write those rules do not describe drops the writer's own
+        cached responses instead. The eviction is logged in
+        ``invalidation_log`` for the other worker processes.
+        """
+        records = [kwargs.get('json'), kwargs.get('data')]
+        if response is not None and not kwargs.get('stream'):
+            try:
+                records.append(response.json())
+            except ValueError:
+                pass
+        log = self.invalidation_log
+        tags = write_tags(url, *records)
+        if tags:
+            evicted = self.response_cache.invalidate_tags(tags)
+            if log is not None:
+                evicted += log.invalidate_tags(tags)
+            logger.debug(f"Write to {urlsplit(url).path} evicted {evicted} cached response(s) tagged {sorted(tags)}")
+            return
+        authorization = (kwargs.get('headers') or {}).get('Authorization')
+        if authorization:
+            scope = ('token', authorization)
+            self.response_cache.invalidate(lambda key, tags: key[0] == scope)
+            if log is not None:
+                log.invalidate_scope(scope)
+
+    def _cached_get(self, url, kwargs):
+        """GET answered from the response cache while the user's copy is fresh.
+
+        Entries are kept per auth scope and normalised URL: per access token,
+        except paths under ``BACKEND_ROLE_SHARED_PATHS``, whose one copy is
+        shared by every user with the same roles. Only 200 responses are
+        stored, for the endpoint's TTL, tagged with the records they depend
+        on (``cache_tags.read_tags``). Calls without an Authorization header
+        are never cached.
+
+        Writes logged by other workers (``invalidation_log``) are replayed
+        first. With ``BACKEND_CACHE_L2`` set, a miss in this process is looked up in
+        the store shared by all workers before going upstream, and fetched
+        responses are written to both tiers with the same expiry.
+
+        When a copy expired less than ``BACKEND_STALE_IF_ERROR`` seconds ago
+        exists, the backend gets ``BACKEND_STALE_BUDGET`` seconds at most; if
+        it fails, times out or answers 5xx, the stale copy is returned with a
+        ``Warning: 110`` header and the request is marked as showing stale
+        data (``stale_data_age``).
+        """
+        authorization = (kwargs.get('headers') or {}).get('Authorization')
+        ttl = self.cache_ttl(url)
+        if not self._settings['BACKEND_RESPONSE_CACHE'] or not authorization or ttl <= 0:
+            return self._coalesced_get(url, kwargs)
+
+        full_url = normalized_url(url, kwargs.get('params'))
+        key = (self.auth_scope(url, kwargs.get('headers')), full_url)
+        tags = read_tags(full_url)
+        store = self.shared_store
+        cursor = self._sync_shared(self.invalidation_log)
+        response = self.response_cache.get(key)
+        if response is not None:
+            return response
+        generation = self.response_cache.generation
+
+        if store is not None:
+            shared = store.get(key)
+            if shared is not None:
+                response, stored_at, expires_at = shared
+                self.response_cache.put(
+                    key, response, expires_at - time.time(), tags=tags, generation=generation, stored_at=stored_at
+                )
+                return response
+
+        stale = self._stale_copy(key, store)
+        if stale is None:
+            response = self._coalesced_get(url, kwargs)
+        else:
+            try:
+                response = self._coalesced_get(url, self._within_budget(kwargs))
+            except requests.RequestException as e:
+                return self._serve_stale(url, stale, e)
+            if response.status_code >= 500:
+                return self._serve_stale(url, stale, f"backend answered {response.status_code}")
+        if response.status_code == 200:
+            self.response_cache.put(key, response, ttl, tags=tags, generation=generation)
+            if store is not None:
+                store.put(key, response, time.time() + ttl, tags=tags, cursor=cursor)
+        return response
+
+    def _memoized_get(self, memo, url, kwargs):
+        headers = kwargs.get('headers') or {}
+        key = (normalized_url(url, kwargs.get('params')), headers.get('Authorization'))
+        with memo['lock']:
+            entry = memo['entries'].get(key)
+            owner = entry is None
+            if owner:
+                entry = memo['entries'][key] = _Flight()
+            else:
+                memo['saved'] += 1
+
+        if owner:
+            try:
+                entry.response = self._cached_get(url, kwargs)
+            except BaseException as e:
+                entry.error = e
+                with memo['lock']:
+                    memo['entries'].pop(key, None)
+                raise
+            finally:
+                entry.done.set()
+            return entry.response
+
+        entry.done.wait()
+        if entry.error is not None:
+            raise entry.error
+        return entry.response
+
+    def request(self, method, url, **kwargs):
+        """Send a backend request.
+
+        Inside a Flask request, identical non-streaming GETs (same URL, params
+        and Authorization) are answered once and shared; any other method
+        clears the request's memo so later reads see the write. Non-streaming
+        GETs are then looked up in the per-user response cache, and finally
+        join an identical GET already in flight in another thread. Any other
+        method evicts the cached responses it makes stale, once it has been
+        sent (or has failed, since it may still have been applied).
+
+        ``cache=False`` keeps a GET out of the memo and both cache tiers (it
+        is still coalesced): for full collection scans, whose pages would
+        only push the entries pages are navigated with out of the caches.
+        """
+        kwargs.setdefault('timeout', self._settings['BACKEND_DEFAULT_TIMEOUT'])
+        is_plain_get = method.upper() == 'GET' and not kwargs.get('stream')
+        if is_plain_get and not kwargs.pop('cache', True):
+            return self._coalesced_get(url, kwargs)
+        kwargs.pop('cache', None)
+        memo = self._request_memo()
+        if memo is not None:
+            if is_plain_get:
+                return self._memoized_get(memo, url, kwargs)
+            with memo['lock']:
+                memo['entries'].clear()
+        if is_plain_get:
+            return self._cached_get(url, kwargs)
+        if method.upper() in ('GET', 'HEAD', 'OPTIONS'):
+            return self._send(method, url, **kwargs)
+        response = None
+        try:
+            response = self._send(method, url, **kwargs)
+        finally:
+            self._invalidate_after_write(url, kwargs, response)
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        return self.request('GET', url, params=params, **kwargs)
+
+    def stream_get(self, url, params=None, **kwargs):
+        """GET whose body is read as it arrives, for ``json_stream.iter_items``.
+
+        A fresh copy already in this worker's response cache is returned
+        instead of calling the backend. A streamed body is never stored,
+        memoised or shared with identical calls, since that would mean
+        buffering it whole.
+        """
+        kwargs.setdefault('timeout', self._settings['BACKEND_DEFAULT_TIMEOUT'])
+        headers = kwargs.get('headers')
+        if self._settings['BACKEND_RESPONSE_CACHE'] and (headers or {}).get('Authorization') and self.cache_ttl(url) > 0:
+            self._sync_shared(self.invalidation_log)
+            cached = self.response_cache.get((self.auth_scope(url, headers), normalized_url(url, params)))
+            if cached is not None:
+                return cached
+        return self._send('GET', url, params=params, stream=True, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('PUT', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request('PATCH', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+gateway = BackendGateway()
@@ -0,0 +1,138 @@
+# utils/json_stream.py - Decode the rows of a large JSON list payload while it downloads
+import json
+import codecs
+
+# Bytes read from the backend per parse step
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+# Characters that may follow a complete JSON value
+_DELIMITERS = ',:]}' + _WHITESPACE
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Text buffer over a byte stream holding at most one chunk plus the value being decoded"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next chunk, dropping what has been consumed; False at the end of the body"""
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            added = self.text.decode(b'', final=True)
+        else:
+            added = self.text.decode(chunk)
+        self.buf = self.buf[self.pos:] + added
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self):
+        while self.pos >= len(self.buf):
+            if not self.fill():
+                raise ValueError('JSON payload ended unexpectedly')
+        return self.buf[self.pos]
+
+    def take(self, expected):
+        if self.peek() != expected:
+            raise ValueError(f"Expected {expected!r} at offset {self.pos} of the JSON payload")
+        self.pos += 1
+
+    def value(self):
+        """The next complete JSON value"""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut by a chunk boundary decodes as its prefix ('1' of '1.5', '1e5'):
+            # only a delimiter after the value, or the end of the body, shows it is whole
+            if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                self.pos = end
+                return value
+            self.fill()
+
+    def array(self):
+        self.skip_whitespace()
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            self.skip_whitespace()
+            yield self.value()
+            self.skip_whitespace()
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            self.take(',')
+
+    def drain(self):
+        # Read the little that follows the rows so the connection can go back to the pool
+        for _ in self.chunks:
+            pass
+
+
+def iter_json_items(chunks, keys=('items',)):
+    """Yield the rows of a JSON payload given as an iterable of byte chunks.
+
+    The payload is either a bare list or an object whose rows are under
+    whichever of ``keys`` comes first; an object without any of them has no
+    rows. Each row is yielded as soon as its bytes have arrived, so only one
+    chunk and one row are held at a time. Malformed or truncated JSON raises
+    ``ValueError``, like ``response.json()``.
+    """
+    reader = _Reader(chunks)
+    reader.skip_whitespace()
+    if reader.peek() == '[':
+        reader.pos += 1
+        yield from reader.array()
+        reader.drain()
+        return
+    reader.take('{')
+    while True:
+        reader.skip_whitespace()
+        if reader.peek() == '}':
+            return
+        key = reader.value()
+        reader.skip_whitespace()
+        reader.take(':')
+        reader.skip_whitespace()
+        if key in keys and reader.peek() == '[':
+            reader.pos += 1
+            yield from reader.array()
+            reader.drain()
+            return
+        reader.value()
+        reader.skip_whitespace()
+        if reader.peek() != '}':
+            reader.take(',')
+
+
+def iter_items(response, keys=('items',), chunk_size=STREAM_CHUNK_SIZE):
+    """Rows of a list response (``gateway.stream_get``) decoded as the body arrives.
+
+    Stopping early closes the response without downloading the rest, which
+    suits filters that keep a handful of rows or give up at the first
+    mismatch. The response is closed however iteration ends.
+    """
+    try:
+        yield from iter_json_items(response.iter_content(chunk_size), keys)
+    finally:
+        response.close()
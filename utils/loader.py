@@ -0,0 +1,164 @@
+# utils/loader.py - Collect the records a page needs by id and fetch each collection in one call
+import threading
+import logging
+
+import requests
+from flask import has_request_context, request as flask_request
+
+from utils.gateway import gateway
+from utils.concurrency import gather
+from utils.batch import FILTER_REFUSED_STATUSES, UnsupportedFilters
+
+logger = logging.getLogger(__name__)
+
+# WSGI environ key holding the request's loaders (shared with worker threads, like the gateway memo)
+LOADER_ENVIRON_KEY = 'entity_loader.loaders'
+
+# Collections whose backend ignored (or rejected) the 'ids' filter - fetched one id at a time
+_unsupported = UnsupportedFilters()
+
+
+def _items(data):
+    if isinstance(data, dict):
+        return data.get('items', [])
+    if isinstance(data, list):
+        return data
+    return []
+
+
+class _Pending:
+    """A record asked for but not necessarily fetched yet; ``get()`` fetches everything queued"""
+
+    def __init__(self, loader, kind, record_id):
+        self._loader = loader
+        self.kind = kind
+        self.record_id = record_id
+
+    def get(self):
+        if not self.record_id:
+            return None
+        return self._loader.fetch(self.kind, self.record_id)
+
+
+class EntityLoader:
+    """Batches lookups of records by id for one user during one request.
+
+    ``load(kind, id)`` only queues the id. The first ``get()`` on any pending
+    record sends everything queued so far: one ``/api/<kind>/?ids=..`` call per
+    collection, the collections side by side. Records are remembered for the
+    rest of the request, so asking again for an id costs nothing. A collection
+    whose backend does not honour ``ids`` falls back to parallel
+    ``/api/<kind>/<id>`` calls, and is remembered for a while so later pages
+    skip the batched attempt. The per-id calls are gathered by the
+    dispatching thread alongside each other, never from inside a batched
+    call's worker.
+    """
+
+    def __init__(self, base_url, headers, timeout=10):
+        self.base_url = base_url
+        self.headers = headers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._queued = {}
+        self._records = {}
+
+    def load(self, kind, record_id):
+        if record_id:
+            with self._lock:
+                if (kind, str(record_id)) not in self._records:
+                    self._queued.setdefault(kind, {})[str(record_id)] = record_id
+        return _Pending(self, kind, record_id)
+
+    def load_many(self, kind, record_ids):
+        return [self.load(kind, record_id) for record_id in record_ids]
+
+    def fetch(self, kind, record_id):
+        """The record, or None when it does not exist or could not be fetched"""
+        key = (kind, str(record_id))
+        with self._lock:
+            if key in self._records:
+                return self._records[key]
+            self._queued.setdefault(kind, {})[str(record_id)] = record_id
+        self.dispatch()
+        with self._lock:
+            return self._records.get(key)
+
+    def dispatch(self):
+        """Fetch every queued id"""
+        with self._lock:
+            queued, self._queued = self._queued, {}
+        if not queued:
+            return
+        batched = [kind for kind, ids in queued.items() if len(ids) > 1 and kind not in _unsupported]
+        results = gather(*[
+            (lambda kind=kind: self._fetch_batch(kind, list(queued[kind].values())))
+            for kind in batched
+        ])
+        fetched = {}
+        for kind, records in zip(batched, results):
+            if records is not None:
+                fetched.update(((kind, record_id), record) for record_id, record in records.items())
+
+        singles = [
+            (kind, record_id) for kind, ids in queued.items() for record_id in ids.values()
+            if (kind, str(record_id)) not in fetched
+        ]
+        for (kind, record_id), record in zip(singles, gather(*[
+            (lambda kind=kind, record_id=record_id: self._fetch_one(kind, record_id)) for kind, record_id in singles
+        ])):
+            fetched[(kind, str(record_id))] = record
+
+        with self._lock:
+            self._records.update(fetched)
+
+    def _fetch_batch(self, kind, record_ids):
+        """{id: record or None} from one ``ids`` call, or None when the backend does not honour the filter"""
+        wanted = {str(record_id) for record_id in record_ids}
+        try:
+            response = gateway.get(
+                f"{self.base_url}/api/{kind}/",
+                headers=self.headers,
+                params={'ids': ','.join(str(record_id) for record_id in record_ids), 'limit': len(record_ids)},
+                timeout=self.timeout
+            )
+            if response.status_code not in FILTER_REFUSED_STATUSES:
+                response.raise_for_status()
+                rows = _items(response.json())
+        except (requests.RequestException, ValueError) as e:
+            # Failed this time - fall back for this page without judging the filter
+            logger.warning(f"Batched {kind} lookup failed: {e}")
+            return None
+
+        if response.status_code in FILTER_REFUSED_STATUSES or any(str(row.get('id')) not in wanted for row in rows):
+            _unsupported.add(kind)
+            logger.info(f"/api/{kind}/ does not support ids - using parallel per-id lookups")
+            return None
+        if not rows:
+            # Nothing matched, or the filter was silently dropped on an empty page - ask per id
+            return None
+        records = {record_id: None for record_id in wanted}
+        records.update((str(row['id']), row) for row in rows)
+        return records
+
+    def _fetch_one(self, kind, record_id):
+        try:
+            response = gateway.get(f"{self.base_url}/api/{kind}/{record_id}", headers=self.headers, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code != 404:
+                logger.warning(f"{kind} {record_id} lookup returned {response.status_code}")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Could not fetch {kind} {record_id}: {e}")
+        return None
+
+
+def entity_loader(base_url, headers):
+    """The current request's loader for this user, created on first use"""
+    if not has_request_context():
+        return EntityLoader(base_url, headers)
+    loaders = flask_request.environ.setdefault(LOADER_ENVIRON_KEY, {})
+    key = (base_url, (headers or {}).get('Authorization'))
+    loader = loaders.get(key)
+    if loader is None:
+        loader = loaders.setdefault(key, EntityLoader(base_url, headers))
+    return loader
@@ -0,0 +1,229 @@
+# utils/loan_index.py - In-process loan index for matching assets to loans by vehicle
+import time
+import threading
+import logging
+
+import requests
+
+from config import Config
+from utils.gateway import gateway
+from utils.pagination import iter_rows
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a failed index build is attempted again
+BUILD_RETRY_SECONDS = 60
+
+
+def normalize_vin(value):
+    return str(value or '').upper().strip()
+
+
+def _loan_vin(loan):
+    return normalize_vin(loan.get('vehicle_vin') or loan.get('VIN'))
+
+
+def score_loan(asset, loan):
+    """Score how well a loan matches an asset; loans scoring 5 or more are accepted.
+
+    VIN match is worth 10, same account 3, then year/make/model 2 each when the
+    account matches, and same contact 2. Returns (score, reasons).
+    """
+    score = 0
+    reasons = []
+
+    asset_vin = normalize_vin(asset.get('VIN') or asset.get('Vin'))
+    loan_vin = _loan_vin(loan)
+    if asset_vin and loan_vin and asset_vin == loan_vin:
+        score += 10
+        reasons.append("VIN")
+
+    asset_account_id = asset.get('account_id')
+    if asset_account_id and loan.get('account_id') == asset_account_id:
+        score += 3
+        reasons.append("Account")
+
+        details = (
+            ('Year', str(asset.get('Year') or '').strip(), str(loan.get('vehicle_year') or loan.get('Year') or '').strip()),
+            ('Make', str(asset.get('Make') or '').upper().strip(), str(loan.get('vehicle_make') or loan.get('Make') or '').upper().strip()),
+            ('Model', str(asset.get('Model') or '').upper().strip(), str(loan.get('vehicle_model') or loan.get('Model') or '').upper().strip()),
+        )
+        for name, asset_value, loan_value in details:
+            if asset_value and loan_value and asset_value == loan_value:
+                score += 2
+                reasons.append(name)
+
+    if asset.get('contact_id') and loan.get('contact_id') == asset.get('contact_id'):
+        score += 2
+        reasons.append("Contact")
+
+    return score, reasons
+
+
+class _ScopeIndex:
+    """Loans visible to one cache scope, keyed by id, normalised VIN and account"""
+
+    def __init__(self):
+        self.loans = {}
+        self.by_vin = {}
+        self.by_account = {}
+        self.built_at = 0
+
+    def add(self, loan):
+        loan_id = loan.get('id')
+        if loan_id is None:
+            return
+        self.remove(loan_id)
+        self.loans[loan_id] = loan
+        vin = _loan_vin(loan)
+        if vin:
+            self.by_vin.setdefault(vin, set()).add(loan_id)
+        if loan.get('account_id'):
+            self.by_account.setdefault(loan['account_id'], set()).add(loan_id)
+
+    def remove(self, loan_id):
+        loan = self.loans.pop(loan_id, None)
+        if loan is None:
+            return
+        for bucket, key in ((self.by_vin, _loan_vin(loan)), (self.by_account, loan.get('account_id'))):
+            ids = bucket.get(key)
+            if ids is not None:
+                ids.discard(loan_id)
+                if not ids:
+                    del bucket[key]
+
+
+class LoanIndex:
+    """Loans indexed by VIN and account, one index per cache scope.
+
+    An index is built on a background thread by paging through
+    ``/api/loans/`` (outside the response cache), started by the first probe
+    for its scope; until it is ready, probes fetch the asset's candidates
+    with filtered VIN and account queries instead. After ``LOAN_INDEX_TTL``
+    seconds the next probe answers from the current index and rebuilds it in
+    the background. Loan writes made through this app are applied
+    immediately with ``upsert``/``discard``.
+
+    Scopes come from ``get_cache_scope``: users with the same roles share an
+    index, users whose roles are unknown get one for their token alone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes = {}
+        self._building = set()
+        self._failed_at = {}
+
+    def _fetch_all(self, base_url, headers):
+        index = _ScopeIndex()
+        for loan in iter_rows(base_url, '/api/loans/', headers, page_size=Config.LOAN_INDEX_PAGE_SIZE, timeout=20):
+            index.add(loan)
+        index.built_at = time.time()
+        logger.info(f"Loan index built with {len(index.loans)} loans")
+        return index
+
+    def _refresh(self, scope, base_url, headers):
+        try:
+            index = self._fetch_all(base_url, headers)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Loan index build failed: {e}")
+            index = None
+        with self._lock:
+            self._building.discard(scope)
+            if index is not None:
+                self._scopes[scope] = index
+                self._failed_at.pop(scope, None)
+            else:
+                self._failed_at[scope] = time.time()
+
+    def _index_for(self, scope, base_url, headers):
+        """The scope's index, or None while it is being built; starts a build when one is due"""
+        now = time.time()
+        with self._lock:
+            index = self._scopes.get(scope)
+            due = index is None or now - index.built_at > Config.LOAN_INDEX_TTL
+            retry_due = now - self._failed_at.get(scope, 0) > BUILD_RETRY_SECONDS
+            if due and retry_due and scope not in self._building:
+                self._building.add(scope)
+                threading.Thread(
+                    target=self._refresh,
+                    args=(scope, base_url, dict(headers)),
+                    daemon=True
+                ).start()
+        return index
+
+    @staticmethod
+    def _probe(asset, base_url, headers):
+        """Candidate loans for one asset from filtered VIN and account queries"""
+        vin = normalize_vin(asset.get('VIN') or asset.get('Vin'))
+        account_id = asset.get('account_id')
+        queries = []
+        if vin:
+            queries.append(({'vehicle_vin': vin}, lambda loan: _loan_vin(loan) == vin))
+        if account_id:
+            queries.append(({'account_id': account_id}, lambda loan: loan.get('account_id') == account_id))
+
+        candidates = {}
+        for params, belongs in queries:
+            response = gateway.get(f"{base_url}/api/loans/", headers=headers, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            # Rows are checked too, in case the backend ignores the filter
+            for loan in (data.get('items', []) if isinstance(data, dict) else data):
+                if isinstance(loan, dict) and loan.get('id') is not None and belongs(loan):
+                    candidates[loan['id']] = loan
+        return list(candidates.values())
+
+    def match(self, asset, base_url, headers, scope):
+        """Loans scoring 5 or more against the asset, as (loan, score, reasons), best first.
+
+        Only loans sharing the asset's VIN or account are scored, taken from
+        the scope's index or, while it is being built, from filtered queries.
+        Returns None when neither could be read.
+        """
+        index = self._index_for(scope, base_url, headers)
+        if index is None:
+            try:
+                candidates = self._probe(asset, base_url, headers)
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Loan lookup for asset {asset.get('id')} failed: {e}")
+                return None
+        else:
+            with self._lock:
+                candidate_ids = set(index.by_vin.get(normalize_vin(asset.get('VIN') or asset.get('Vin')), ()))
+                candidate_ids |= index.by_account.get(asset.get('account_id'), set())
+                candidates = [index.loans[loan_id] for loan_id in candidate_ids if loan_id in index.loans]
+
+        matches = []
+        for loan in candidates:
+            score, reasons = score_loan(asset, loan)
+            if score >= 5:
+                matches.append((loan, score, reasons))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def upsert(self, loan, scope):
+        """Apply a created or updated loan to the writer's index and any index already holding it.
+
+        ``loan`` may be the backend's write response; bodies without a loan are ignored.
+        """
+        if isinstance(loan, requests.Response):
+            try:
+                loan = loan.json()
+            except ValueError:
+                return
+        if not isinstance(loan, dict) or loan.get('id') is None:
+            return
+        with self._lock:
+            for key, index in self._scopes.items():
+                if key == scope or loan['id'] in index.loans:
+                    index.add(loan)
+
+    def discard(self, loan_id):
+        """Drop a deleted loan from every index"""
+        with self._lock:
+            for index in self._scopes.values():
+                index.remove(loan_id)
+
+
+loan_index = LoanIndex()
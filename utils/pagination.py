@@ -0,0 +1,118 @@
+# utils/pagination.py - Walk a backend list endpoint page by page, only as far as the caller reads
+import logging
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from config import Config
+from utils.gateway import gateway
+from utils.concurrency import RequestExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def _page(data):
+    """(rows, total or None) from a paginated dict or a bare list"""
+    if isinstance(data, dict):
+        return data.get('items', []), data.get('total')
+    return (data if isinstance(data, list) else []), None
+
+
+def _first_ids(rows):
+    return [row.get('id') for row in rows[:3] if isinstance(row, dict)]
+
+
+def _fetch_page(url, headers, params, skip, limit, timeout):
+    # Scan pages bypass the response cache - they are rarely read twice and would evict everything else
+    response = gateway.get(
+        url, headers=headers, params={**params, 'skip': skip, 'limit': limit}, timeout=timeout, cache=False
+    )
+    response.raise_for_status()
+    return _page(response.json())
+
+
+def iter_rows(base_url, path, headers, params=None, page_size=None, timeout=10, prefetch=None, ordered=True):
+    """Lazily yield every row of ``path`` (e.g. ``/api/loans/``) matching ``params``.
+
+    Pages of ``page_size`` rows (``BACKEND_PAGE_SIZE`` by default) are
+    requested with skip/limit as the consumer iterates, so stopping early
+    (``break``, ``next()``, ``islice``) stops the fetching. Iteration ends at
+    the backend's ``total``. Without one, the first page's size is taken as
+    the page size the backend really serves (it may cap ``limit``), and the
+    walk ends at the first page shorter than that, or an empty one.
+    Errors are raised as ``requests`` exceptions rather than ending the walk
+    early, so a scan is never silently truncated. Pages are sent with the
+    response cache bypassed, so a scan leaves the cached entries alone.
+
+    Once the first page has reported a ``total``, up to ``prefetch`` further
+    pages (``BACKEND_PAGE_PREFETCH`` by default) are fetched side by side
+    while the caller works through the current one. With ``ordered=False``
+    pages are yielded as they arrive rather than in collection order, for
+    scans that only filter or aggregate. ``prefetch=0`` (or a backend that
+    reports no total) walks one page at a time.
+    """
+    page_size = page_size or Config.BACKEND_PAGE_SIZE
+    prefetch = Config.BACKEND_PAGE_PREFETCH if prefetch is None else prefetch
+    params = dict(params or {})
+    url = f"{base_url}{path}"
+
+    rows, total = _fetch_page(url, headers, params, 0, page_size, timeout)
+    first_ids = _first_ids(rows)
+    yield from rows
+    if not rows or (total is not None and len(rows) >= total):
+        return
+
+    if total is not None and prefetch > 0:
+        # Step by what the backend actually sent - it may cap 'limit' below page_size
+        yield from _prefetch_pages(
+            url, headers, params, len(rows), total, timeout, prefetch, ordered, first_ids, path
+        )
+        return
+
+    skip = step = len(rows)
+    if total is None and step < page_size:
+        # Either the collection ends here or the backend caps 'limit'; only the next page can tell
+        logger.info(f"{path} sent {step} of {page_size} requested rows and no total - reading on in pages of {step}")
+    while True:
+        rows, total = _fetch_page(url, headers, params, skip, page_size, timeout)
+        # A backend that ignores 'skip' keeps sending the first page
+        if rows and _first_ids(rows) == first_ids:
+            logger.warning(f"{path} ignores 'skip' - stopping after {skip} rows")
+            return
+        yield from rows
+        skip += len(rows)
+        if not rows or (total is not None and skip >= total) or (total is None and len(rows) < step):
+            return
+
+
+def _prefetch_pages(url, headers, params, step, total, timeout, prefetch, ordered, first_ids, path):
+    """Rows of the pages after the first, ``prefetch`` requests in flight at a time"""
+    executor = RequestExecutor(prefetch)
+    skips = iter(range(step, total, step))
+    in_flight = deque()
+
+    def fill():
+        while len(in_flight) < prefetch:
+            skip = next(skips, None)
+            if skip is None:
+                return
+            in_flight.append(executor.submit(_fetch_page, url, headers, params, skip, step, timeout))
+
+    try:
+        fill()
+        while in_flight:
+            if ordered:
+                future = in_flight.popleft()
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                in_flight.remove(future)
+            rows, _ = future.result()
+            if rows and _first_ids(rows) == first_ids:
+                logger.warning(f"{path} ignores 'skip' - stopping after the first page")
+                return
+            fill()
+            yield from rows
+    finally:
+        # The caller stopped early or a page failed - drop the pages nobody will read
+        for future in in_flight:
+            future.cancel()
@@ -0,0 +1,75 @@
+# utils/proxy.py - Streaming pass-through of browser API calls to the FastAPI backend
+from flask import Response, request, stream_with_context
+
+from utils.gateway import gateway
+
+# Bytes read from upstream per chunk written to the browser
+PROXY_CHUNK_SIZE = 64 * 1024
+
+# Hop-by-hop headers (RFC 7230 6.1) are per connection and never forwarded; the WSGI
+# server adds its own Server/Date, and backend cookies never reach the app's domain
+_HOP_BY_HOP = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade',
+}
+_DROP_RESPONSE = _HOP_BY_HOP | {'set-cookie', 'server', 'date'}
+
+# Request headers worth passing upstream besides Authorization
+_FORWARD_REQUEST = ('Content-Type', 'Accept', 'If-None-Match', 'If-Modified-Since')
+
+
+class _RequestBody:
+    """Browser request body exposed to requests as a sized file, so it is streamed with its Content-Length"""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def _upstream_body():
+    if request.content_length:
+        return _RequestBody(request.stream, request.content_length)
+    if request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+        return iter(lambda: request.stream.read(PROXY_CHUNK_SIZE), b'')
+    return None
+
+
+def stream_proxy(url, auth_headers):
+    """Forward the current request to ``url`` and stream the backend response back.
+
+    The query string and body go upstream unchanged. Status, headers and body
+    bytes come back in chunks without being decoded, so content encoding
+    (e.g. gzip) passes straight through when the browser accepts it.
+    """
+    headers = dict(auth_headers)
+    for name in _FORWARD_REQUEST:
+        if name in request.headers:
+            headers[name] = request.headers[name]
+    # Only ask for an encoding the browser can read, since the bytes are not re-encoded
+    headers['Accept-Encoding'] = request.headers.get('Accept-Encoding', 'identity')
+
+    if request.query_string:
+        url = f"{url}?{request.query_string.decode('latin-1')}"
+
+    upstream = gateway.request(
+        request.method,
+        url,
+        headers=headers,
+        data=_upstream_body(),
+        stream=True,
+    )
+
+    response_headers = [
+        (name, value) for name, value in upstream.raw.headers.items()
+        if name.lower() not in _DROP_RESPONSE
+    ]
+    body = upstream.raw.stream(PROXY_CHUNK_SIZE, decode_content=False)
+    response = Response(stream_with_context(body), status=upstream.status_code, headers=response_headers)
+    response.call_on_close(upstream.close)
+    return response
@@ -0,0 +1,119 @@
+# utils/reference.py - Shared cache for dropdown lookup lists (financial institutions, asset makes)
+import time
+import threading
+import logging
+
+import requests
+
+from config import Config
+from utils.gateway import gateway
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceCache:
+    """Lookup lists cached per (name, scope) with stale-while-revalidate.
+
+    Within ``REFERENCE_DATA_TTL`` a list is served from memory. Past it, the
+    cached list is still served while one background thread reloads it; only
+    a list older than ``REFERENCE_DATA_MAX_STALE`` (or never loaded) is loaded
+    on the request. A failed reload keeps the previous list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+
+    def _load(self, key, loader):
+        try:
+            value = loader()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Reference data {key[0]} reload failed: {e}")
+            value = None
+        with self._lock:
+            self._refreshing.discard(key)
+            if value is not None:
+                self._entries[key] = (value, time.time())
+            else:
+                cached = self._entries.get(key)
+                value = cached[0] if cached else None
+        return value
+
+    def get(self, name, loader, scope):
+        """Cached value of ``name`` for the scope; ``loader`` is called with no arguments to (re)load it"""
+        key = (name, scope)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                value, loaded_at = cached
+                age = time.time() - loaded_at
+                if age <= Config.REFERENCE_DATA_TTL:
+                    return value
+                if age <= Config.REFERENCE_DATA_MAX_STALE:
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._load, args=(key, loader), daemon=True).start()
+                    return value
+        return self._load(key, loader)
+
+    def export(self):
+        """[(name, scope, value, loaded_at)] of the role scopes, for the warm-start snapshot"""
+        with self._lock:
+            return [
+                (name, scope, value, loaded_at) for (name, scope), (value, loaded_at) in self._entries.items()
+                if scope[0] == 'roles'
+            ]
+
+    def restore(self, entries):
+        """Load snapshot entries still within ``REFERENCE_DATA_MAX_STALE``; returns how many were kept"""
+        now = time.time()
+        kept = 0
+        with self._lock:
+            for name, scope, value, loaded_at in entries:
+                if now - loaded_at <= Config.REFERENCE_DATA_MAX_STALE and (name, scope) not in self._entries:
+                    self._entries[(name, scope)] = (value, loaded_at)
+                    kept += 1
+        return kept
+
+    def invalidate(self, name=None):
+        """Forget one list (for every scope), or everything"""
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    del self._entries[key]
+
+
+reference_cache = ReferenceCache()
+
+
+def _get_json(base_url, headers, path, params=None):
+    response = gateway.get(f"{base_url}{path}", headers=headers, params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def loan_financial_institutions(base_url, headers, scope):
+    """Financial institutions offered in the loans filter dropdown"""
+    def load():
+        return _get_json(base_url, headers, '/api/loans/financial-institutions') or []
+    return reference_cache.get('loans.financial_institutions', load, scope) or []
+
+
+def case_financial_institutions(base_url, headers, scope):
+    """Financial institutions offered in the cases filter dropdown"""
+    def load():
+        return _get_json(base_url, headers, '/api/cases/stats/financial-institutions').get('financial_institutions', [])
+    return reference_cache.get('cases.financial_institutions', load, scope) or []
+
+
+def asset_makes(base_url, headers, scope):
+    """Distinct vehicle makes for the assets filter dropdown, from a 100-asset sample"""
+    def load():
+        data = _get_json(base_url, headers, '/api/assets/', {'skip': 0, 'limit': 100})
+        sample = data.get('items', []) if isinstance(data, dict) else data if isinstance(data, list) else []
+        return sorted(set(
+            asset.get('Make', '') for asset in sample
+            if asset.get('Make') and asset.get('Make') != 'None' and asset.get('Make').strip()
+        ))
+    return reference_cache.get('assets.makes', load, scope) or []
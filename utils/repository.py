@@ -0,0 +1,244 @@
+# utils/repository.py - One place to fetch, normalise and write each backend entity
+import time
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app
+
+from utils.gateway import gateway
+from utils.loader import entity_loader
+from utils.loan_index import loan_index
+from utils.case_filters import case_filter_cache
+from utils.reference import loan_financial_institutions, case_financial_institutions, asset_makes
+from utils.auth import get_auth_headers, get_cache_scope
+
+logger = logging.getLogger(__name__)
+
+# Backend calls slower than this are logged as warnings rather than debug timings
+SLOW_CALL_SECONDS = 2.0
+
+
+class Unauthorized(requests.HTTPError):
+    """The backend refused the session's token (401)"""
+
+
+class NotFound(requests.HTTPError):
+    """The record does not exist (404)"""
+
+
+class Page:
+    """One page of a collection, whichever shape the backend returned it in.
+
+    ``paginated`` is False when the backend sent a bare list, in which case
+    ``total`` is just the number of rows received and sorting or paging the
+    rows is up to the caller.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], total: int, skip: int = 0, limit: Optional[int] = None,
+                 paginated: bool = True):
+        self.items = items
+        self.total = total
+        self.skip = skip
+        self.limit = limit
+        self.paginated = paginated
+
+    @classmethod
+    def from_json(cls, data: Any, skip: int = 0, limit: Optional[int] = None) -> 'Page':
+        if isinstance(data, dict):
+            items = data.get('items', [])
+            return cls(items, data.get('total', len(items)), skip, limit)
+        items = data if isinstance(data, list) else []
+        return cls(items, len(items), skip, limit, paginated=False)
+
+    @property
+    def page(self) -> int:
+        return self.skip // self.limit + 1 if self.limit else 1
+
+    @property
+    def total_pages(self) -> int:
+        if not self.paginated or not self.limit:
+            return 1
+        return max(1, (self.total + self.limit - 1) // self.limit)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class EntityRepository:
+    """Reads and writes one backend collection for one user.
+
+    Every call goes through the gateway (pooling, memo, response cache,
+    coalescing), uses the repository's timeout, and is timed. A 401 raises
+    ``Unauthorized`` and a 404 on a write raises ``NotFound``; both are
+    ``requests.HTTPError`` subclasses, so existing ``except
+    requests.RequestException`` handlers still catch them. Subclasses set
+    ``collection`` and may override ``after_write`` to keep in-process
+    indexes in step with the backend.
+    """
+
+    collection: Optional[str] = None
+    timeout = 10
+
+    def __init__(self, base_url: str, headers: Dict[str, str]):
+        self.base_url = base_url
+        self.headers = headers
+
+    @classmethod
+    def for_request(cls) -> 'EntityRepository':
+        """Repository for the signed-in user of the current request"""
+        return cls(current_app.config['FASTAPI_BASE_URL'], get_auth_headers())
+
+    def _url(self, *parts):
+        return f"{self.base_url}/api/{self.collection}/" + '/'.join(str(part) for part in parts)
+
+    def _call(self, method, url, operation, timeout=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = gateway.request(method, url, headers=self.headers, timeout=timeout or self.timeout, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            log = logger.warning if elapsed > SLOW_CALL_SECONDS else logger.debug
+            log(f"{self.collection}.{operation} took {elapsed * 1000:.0f}ms")
+        if response.status_code == 401:
+            raise Unauthorized(f"{self.collection}.{operation}: session token refused", response=response)
+        return response
+
+    def get(self, entity_id: Any, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The record, or None when it does not exist"""
+        response = self._call('GET', self._url(entity_id), 'get', timeout=timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def list(self, skip: int = 0, limit: int = 50, timeout: Optional[float] = None, **filters: Any) -> Page:
+        """A ``Page`` of records; empty filter values are left out of the query"""
+        params = {name: value for name, value in filters.items() if value not in (None, '')}
+        params.update(skip=skip, limit=limit)
+        response = self._call('GET', self._url(), 'list', timeout=timeout, params=params)
+        response.raise_for_status()
+        return Page.from_json(response.json(), skip, limit)
+
+    def load(self, entity_id: Any):
+        """Queue a lookup to be batched with the request's other lookups; ``.get()`` on the result fetches"""
+        return entity_loader(self.base_url, self.headers).load(self.collection, entity_id)
+
+    def _write(self, method, url, operation, entity_id=None, json=None):
+        response = self._call(method, url, operation, json=json)
+        if response.status_code == 404:
+            raise NotFound(f"{self.collection} {entity_id} not found", response=response)
+        response.raise_for_status()
+        self.after_write(operation, entity_id, response)
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def create(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._write('POST', self._url(), 'create', json=data)
+
+    def update(self, entity_id: Any, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._write('PUT', self._url(entity_id), 'update', entity_id, json=data)
+
+    def delete(self, entity_id: Any) -> Optional[Dict[str, Any]]:
+        return self._write('DELETE', self._url(entity_id), 'delete', entity_id)
+
+    def after_write(self, operation: str, entity_id: Any, response: requests.Response) -> None:
+        """Hook run after a successful create/update/delete"""
+
+
+class AccountRepository(EntityRepository):
+    collection = 'accounts'
+
+
+class ContactRepository(EntityRepository):
+    collection = 'contacts'
+    timeout = 15
+
+
+class LoanRepository(EntityRepository):
+    collection = 'loans'
+
+    def after_write(self, operation: str, entity_id: Any, response: requests.Response) -> None:
+        if operation == 'delete':
+            loan_index.discard(entity_id)
+        else:
+            loan_index.upsert(response, scope=get_cache_scope())
+
+    def financial_institutions(self) -> List[str]:
+        """Institutions for the loans filter dropdown, from the shared reference-data cache"""
+        return loan_financial_institutions(self.base_url, self.headers, get_cache_scope())
+
+
+class AssetRepository(EntityRepository):
+    collection = 'assets'
+    # Asset searches run long on large inventories
+    timeout = 30
+
+    def makes(self) -> List[str]:
+        """Vehicle makes for the assets filter dropdown, from the shared reference-data cache"""
+        return asset_makes(self.base_url, self.headers, get_cache_scope())
+
+
+class CaseRepository(EntityRepository):
+    collection = 'cases'
+    timeout = 15
+
+    def financial_institutions(self) -> List[str]:
+        """Institutions for the cases filter dropdown, from the shared reference-data cache"""
+        return case_financial_institutions(self.base_url, self.headers, get_cache_scope())
+
+    def filters(self) -> Optional[Dict[str, List[str]]]:
+        """Filter categories for the cases page (cached until an admin changes them), or None"""
+        def load():
+            response = self._call('GET', self._url('filters'), 'filters')
+            response.raise_for_status()
+            data = response.json()
+            return data.get('filters') if isinstance(data, dict) else None
+        return case_filter_cache.get(load)
+
+
+class AdminUserRepository(EntityRepository):
+    """Users managed through the admin API.
+
+    The admin API pages by ``page``/``per_page`` and lists users under
+    ``users``, so ``search`` returns its payload as sent rather than a
+    ``Page``. Calls are logged at info level, as admin changes were before.
+    """
+
+    collection = 'admin/users'
+    timeout = 30
+
+    def _url(self, *parts):
+        # The admin routes take no trailing slash
+        return '/'.join([f"{self.base_url}/api/{self.collection}", *(str(part) for part in parts)])
+
+    def _call(self, method, url, operation, timeout=None, **kwargs):
+        response = super()._call(method, url, operation, timeout=timeout, **kwargs)
+        logger.info(f"Admin API: {method} {urlsplit(url).path} - Status: {response.status_code}")
+        return response
+
+    def search(self, page: Optional[int] = None, per_page: Optional[int] = None, **filters: Any) -> Dict[str, Any]:
+        """One page of users (``users``, ``total``, ``page``, ``has_next``, ...); empty filters are left out"""
+        filters.update(page=page, per_page=per_page)
+        params = {name: value for name, value in filters.items() if value not in (None, '')}
+        response = self._call('GET', self._url(), 'search', params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def action(self, user_id: Any, name: str, data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """POST to one of a user's action routes (``reset-password``, ``reset-mfa``, ``unlock``)"""
+        return self._write('POST', self._url(user_id, name), name, user_id, json=data)
@@ -0,0 +1,183 @@
+# utils/resolver.py - Learned URL shapes for related-entity lookups
+import time
+import threading
+import logging
+from contextlib import closing
+
+import requests
+
+from config import Config
+from utils.gateway import gateway
+from utils.json_stream import iter_items
+
+logger = logging.getLogger(__name__)
+
+# Every URL shape the backend has been seen to answer for a relationship, in probe order
+RELATIONSHIP_SHAPES = {
+    'account.contacts': [
+        '/api/contacts/?account_id={id}',
+        '/api/contacts?account_id={id}',
+        '/api/accounts/{id}/contacts',
+        '/api/contacts/by-account/{id}',
+    ],
+    'account.loans': [
+        '/api/loans/?account_id={id}',
+        '/api/loans?account_id={id}',
+        '/api/accounts/{id}/loans',
+        '/api/loans/by-account/{id}',
+    ],
+    'account.assets': [
+        '/api/assets/?account_id={id}',
+        '/api/assets?account_id={id}',
+        '/api/accounts/{id}/assets',
+        '/api/assets/by-account/{id}',
+    ],
+    'account.cases': [
+        '/api/cases/?account_id={id}',
+        '/api/cases?account_id={id}',
+        '/api/accounts/{id}/cases',
+        '/api/cases/by-account/{id}',
+    ],
+    'contact.loans': [
+        '/api/loans/?contact_id={id}',
+        '/api/loans?contact_id={id}',
+        '/api/contacts/{id}/loans',
+    ],
+    'contact.assets': [
+        '/api/assets/?contact_id={id}',
+        '/api/assets?contact_id={id}',
+        '/api/contacts/{id}/assets',
+    ],
+    'contact.cases': [
+        '/api/cases/?contact_id={id}',
+        '/api/cases?contact_id={id}',
+        '/api/contacts/{id}/cases',
+    ],
+}
+
+
+class EndpointResolver:
+    """Remembers which URL shape answers each relationship.
+
+    The first shape that returns 200 is pinned for the relationship and tried
+    first on every later lookup, so a warm resolver issues one request per
+    relationship. A shape the backend has no route for (405, or a 404 with
+    FastAPI's bare "Not Found" detail) is skipped for every entity until the
+    negative cache entry expires. Any other 404, or a payload the caller
+    rejects, only skips the shape for that entity id, since it says more
+    about the entity than about the route; other failures just fall through
+    to the next shape.
+    """
+
+    def __init__(self, negative_ttl=None):
+        self.negative_ttl = Config.ENDPOINT_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self._lock = threading.Lock()
+        self._preferred = {}
+        self._rejected = {}
+
+    def _candidates(self, relation, entity_id):
+        shapes = RELATIONSHIP_SHAPES[relation]
+        now = time.time()
+        with self._lock:
+            preferred = self._preferred.get(relation)
+            usable = [
+                s for s in shapes
+                if self._rejected.get((relation, s, None), 0) <= now
+                and self._rejected.get((relation, s, entity_id), 0) <= now
+            ]
+        if preferred in usable:
+            usable.remove(preferred)
+            usable.insert(0, preferred)
+        return usable
+
+    def _learn(self, relation, shape):
+        with self._lock:
+            if self._preferred.get(relation) != shape:
+                logger.info(f"Resolved {relation} -> {shape}")
+            self._preferred[relation] = shape
+
+    def _reject(self, relation, shape, entity_id=None):
+        """Skip the shape for one entity id, or for all of them when ``entity_id`` is None"""
+        now = time.time()
+        with self._lock:
+            # Per-entity entries accumulate, so expired ones are dropped as new ones come in
+            self._rejected = {key: until for key, until in self._rejected.items() if until > now}
+            self._rejected[(relation, shape, entity_id)] = now + self.negative_ttl
+            if entity_id is None and self._preferred.get(relation) == shape:
+                del self._preferred[relation]
+
+    @staticmethod
+    def _route_missing(response):
+        """Whether a 404 came from the router (FastAPI answers unknown paths with a bare "Not Found")"""
+        try:
+            return response.json().get('detail') == 'Not Found'
+        except (ValueError, AttributeError, requests.RequestException):
+            return False
+
+    @staticmethod
+    def _read_rows(response, accept_row):
+        """The payload's rows, or None as soon as one is rejected (the rest is never downloaded)"""
+        rows = []
+        with closing(iter_items(response, keys=('items', 'data'))) as stream:
+            for row in stream:
+                if not accept_row(row):
+                    return None
+                rows.append(row)
+        return rows
+
+    def fetch(self, relation, base_url, headers, entity_id, timeout=5, accept=None, accept_row=None):
+        """Fetch a relationship through its learned shape, re-probing only on failure.
+
+        ``accept`` may check the decoded payload; a shape whose payload is
+        rejected (e.g. a filter the backend silently ignores) is treated like
+        an entity-level 404. ``accept_row`` does the same one row at a time while the
+        payload streams in, giving up on the shape at the first rejected row,
+        and the rows are returned as a list. Both checks only apply to query
+        shapes (``?account_id=``), the ones a backend can silently ignore;
+        nested paths are taken as they come. Returns the decoded JSON, or None
+        when no shape answered.
+        """
+        for shape in self._candidates(relation, entity_id):
+            url = f"{base_url}{shape.format(id=entity_id)}"
+            is_query = '?' in shape
+            shape_accept = accept if is_query else None
+            shape_accept_row = accept_row if is_query else None
+            try:
+                if shape_accept_row is not None:
+                    response = gateway.stream_get(url, headers=headers, timeout=timeout)
+                else:
+                    response = gateway.get(url, headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                logger.warning(f"{relation} lookup failed on {shape}: {e}")
+                continue
+
+            if response.status_code == 200:
+                try:
+                    data = self._read_rows(response, shape_accept_row) if shape_accept_row is not None else response.json()
+                except requests.RequestException as e:
+                    logger.warning(f"{relation} lookup failed on {shape}: {e}")
+                    continue
+                except ValueError:
+                    self._reject(relation, shape, entity_id)
+                    continue
+                if data is None or (shape_accept is not None and not shape_accept(data)):
+                    self._reject(relation, shape, entity_id)
+                    continue
+                self._learn(relation, shape)
+                return data
+
+            if response.status_code == 401:
+                response.close()
+                return None
+            if response.status_code == 405 or (response.status_code == 404 and self._route_missing(response)):
+                self._reject(relation, shape)
+            elif response.status_code == 404:
+                self._reject(relation, shape, entity_id)
+            else:
+                logger.warning(f"{relation} lookup on {shape} returned {response.status_code}")
+            # Release a streamed error response's connection
+            response.close()
+        return None
+
+
+resolver = EndpointResolver()
@@ -0,0 +1,156 @@
+# utils/response_cache.py - Byte-bounded LRU of backend GET responses with per-endpoint TTLs
+import time
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Rough per-entry bookkeeping cost added to the body size (key, headers, timestamps)
+ENTRY_OVERHEAD_BYTES = 512
+
+
+def snapshot(response):
+    """Detached copy of a fully read response that can be handed out any number of times"""
+    copy = requests.Response()
+    copy.status_code = response.status_code
+    copy.reason = response.reason
+    copy.headers = CaseInsensitiveDict(response.headers)
+    copy.url = response.url
+    copy.encoding = response.encoding
+    copy.request = response.request
+    copy.elapsed = response.elapsed
+    copy._content = response.content
+    copy._content_consumed = True
+    return copy
+
+
+class _Entry:
+    __slots__ = ('response', 'size', 'stored_at', 'expires_at', 'tags')
+
+    def __init__(self, response, size, stored_at, expires_at, tags):
+        self.response = response
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class ResponseCache:
+    """LRU of GET responses whose limit is total bytes, not entry count.
+
+    Keys are opaque tuples chosen by the caller (the gateway uses the auth
+    scope plus the normalised URL). Each entry carries its own expiry, taken
+    from the endpoint's TTL, and a set of tags naming the records it depends
+    on. Hit, miss, expiry and eviction counts are kept for ``stats()``.
+
+    Expired entries are kept for ``stale_grace`` more seconds so
+    ``get_stale`` can still hand them out when the backend fails; they stay
+    subject to the byte limit and to invalidation.
+
+    Every invalidation advances ``generation``; a caller that read the
+    generation before fetching passes it to ``put`` so a response fetched
+    while a write was being applied is never stored.
+    """
+
+    def __init__(self, max_bytes, stale_grace=0):
+        self.max_bytes = max_bytes
+        self.stale_grace = stale_grace
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.generation = 0
+        self._counters = {
+            'hits': 0, 'misses': 0, 'expired': 0, 'stale_hits': 0, 'evictions': 0, 'invalidations': 0, 'stores': 0,
+        }
+
+    def get(self, key):
+        """A fresh copy of the cached response, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if entry.expires_at <= now:
+                if entry.expires_at + self.stale_grace <= now:
+                    self._drop(key)
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return snapshot(entry.response)
+
+    def get_stale(self, key):
+        """(response, seconds since it was fetched) for an entry still inside ``stale_grace``, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at + self.stale_grace <= now:
+                return None
+            self._counters['stale_hits'] += 1
+            return snapshot(entry.response), max(0, now - entry.stored_at)
+
+    def put(self, key, response, ttl, tags=(), generation=None, stored_at=None):
+        """Cache ``response`` for ``ttl`` seconds; ``stored_at`` is when it was fetched, if not just now"""
+        if ttl <= 0:
+            return
+        stored = snapshot(response)
+        size = len(stored.content or b'') + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            now = time.time()
+            self._entries[key] = _Entry(stored, size, stored_at or now, now + ttl, frozenset(tags))
+            self._bytes += size
+            self._counters['stores'] += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._counters['evictions'] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def invalidate(self, predicate):
+        """Evict every entry whose key and tags satisfy ``predicate(key, tags)``; returns the count"""
+        with self._lock:
+            self.generation += 1
+            doomed = [key for key, entry in self._entries.items() if predicate(key, entry.tags)]
+            for key in doomed:
+                self._drop(key)
+            self._counters['invalidations'] += len(doomed)
+        return len(doomed)
+
+    def invalidate_tags(self, tags):
+        """Evict every entry carrying any of ``tags``, whoever it was cached for"""
+        tags = frozenset(tags)
+        return self.invalidate(lambda key, entry_tags: not tags.isdisjoint(entry_tags))
+
+    def items(self, predicate=None):
+        """(key, response, stored_at, expires_at, tags) for live entries matching ``predicate(key)``, most recently used first"""
+        now = time.time()
+        with self._lock:
+            entries = [
+                (key, entry) for key, entry in reversed(self._entries.items())
+                if entry.expires_at > now and (predicate is None or predicate(key))
+            ]
+        return [
+            (key, snapshot(entry.response), entry.stored_at, entry.expires_at, entry.tags) for key, entry in entries
+        ]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
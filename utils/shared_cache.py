@@ -0,0 +1,367 @@
+# utils/shared_cache.py - Response cache tier shared by every worker process on this host
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Invalidation log rows kept for workers that have not synced yet; a worker
+# whose cursor falls behind the pruned log clears its whole in-process cache
+INVALIDATION_LOG_SECONDS = 24 * 3600
+# Puts between sweeps of expired rows and the size limit
+PRUNE_EVERY = 200
+
+_LOG_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS invalidations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tags TEXT,
+        scope TEXT,
+        created_at REAL NOT NULL
+    )""",
+)
+
+_SCHEMA = _LOG_SCHEMA + (
+    """CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        scope TEXT NOT NULL,
+        tags TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        reason TEXT,
+        url TEXT,
+        encoding TEXT,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        stored_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)",
+    "CREATE INDEX IF NOT EXISTS responses_stored ON responses (stored_at)",
+    """CREATE TABLE IF NOT EXISTS response_tags (
+        tag TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (tag, key)
+    )""",
+)
+
+
+def _digest(value):
+    # Keys and scopes contain access tokens - only their hashes are written to disk
+    return hashlib.sha256(json.dumps(value, separators=(',', ':')).encode()).hexdigest()
+
+
+def encode_response(response):
+    """Columns stored for a fully read response"""
+    return {
+        'status': response.status_code,
+        'reason': response.reason,
+        'url': response.url,
+        'encoding': response.encoding,
+        'headers': json.dumps(dict(response.headers)),
+        'body': response.content or b'',
+    }
+
+
+def decode_response(row):
+    """A detached ``requests.Response`` rebuilt from stored columns"""
+    response = requests.Response()
+    response.status_code = row['status']
+    response.reason = row['reason']
+    response.url = row['url']
+    response.encoding = row['encoding']
+    response.headers = CaseInsensitiveDict(json.loads(row['headers']))
+    response._content = bytes(row['body'])
+    response._content_consumed = True
+    return response
+
+
+class SQLiteInvalidationLog:
+    """Log of response cache invalidations in a local SQLite file (WAL mode).
+
+    Every worker process on the host opens the same file. A write handled by
+    one worker appends the tags (or auth scope) it made stale, and each
+    worker replays the entries logged since its cursor (``changes_since``)
+    against its in-process cache before answering from it, so a write evicts
+    the copies held by all of them. Only tag names and scope hashes are
+    written; no response data is kept.
+    """
+
+    schema = _LOG_SCHEMA
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._logged = 0
+        self._counters = {'errors': 0}
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Cache files may hold user data - keep them private to the app's user
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in self.schema:
+            connection.execute(statement)
+        return connection
+
+    @property
+    def connection(self):
+        """This thread's connection (reopened after a fork)"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def _guard(self, action, default=None):
+        try:
+            return action()
+        except sqlite3.Error as e:
+            self._counters['errors'] += 1
+            logger.warning(f"Shared response cache unavailable: {e}")
+            return default
+
+    def cursor(self):
+        """Id of the latest invalidation, to pass back to ``changes_since`` (and ``put``)"""
+        def read():
+            row = self.connection.execute('SELECT MAX(id) FROM invalidations').fetchone()
+            return row[0] or 0
+        return self._guard(read, 0)
+
+    def _log(self, connection, tags=None, scope=None):
+        connection.execute(
+            'INSERT INTO invalidations (tags, scope, created_at) VALUES (?, ?, ?)',
+            (json.dumps(tags) if tags is not None else None, scope, time.time())
+        )
+
+    def _write_invalidation(self, delete, tags=None, scope=None):
+        """Run ``delete(connection)`` and log the invalidation in one transaction; the rows deleted"""
+        def write():
+            connection = self.connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                count = delete(connection)
+                self._log(connection, tags, scope)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            return count
+        count = self._guard(write, 0)
+        self._logged += 1
+        if self._logged % PRUNE_EVERY == 0:
+            self._guard(self.prune)
+        return count
+
+    def invalidate_tags(self, tags):
+        """Log an invalidation of ``tags`` for the other workers"""
+        return self._write_invalidation(lambda connection: 0, tags=sorted(tags))
+
+    def invalidate_scope(self, scope):
+        """Log an invalidation of everything cached for ``scope``"""
+        return self._write_invalidation(lambda connection: 0, scope=_digest(scope))
+
+    def changes_since(self, cursor):
+        """(new cursor, invalidations) logged after ``cursor``.
+
+        Each invalidation is ``('tags', tags)`` or ``('scope', scope_digest)``;
+        ``invalidations`` is None when the log no longer reaches back to
+        ``cursor`` and the caller must assume everything changed.
+        """
+        def read():
+            connection = self.connection
+            rows = connection.execute(
+                'SELECT id, tags, scope FROM invalidations WHERE id > ? ORDER BY id', (cursor,)
+            ).fetchall()
+            if not rows:
+                return cursor, []
+            oldest = connection.execute('SELECT MIN(id) FROM invalidations').fetchone()[0]
+            if cursor and oldest > cursor + 1:
+                return rows[-1]['id'], None
+            changes = [
+                ('tags', json.loads(row['tags'])) if row['tags'] is not None else ('scope', row['scope'])
+                for row in rows
+            ]
+            return rows[-1]['id'], changes
+        return self._guard(read, (cursor, []))
+
+    @staticmethod
+    def scope_digest(scope):
+        return _digest(scope)
+
+    def _prune_log(self, connection, now):
+        # Keep the newest log row so MAX(id) never goes backwards
+        connection.execute(
+            'DELETE FROM invalidations WHERE created_at < ? AND id < (SELECT MAX(id) FROM invalidations)',
+            (now - INVALIDATION_LOG_SECONDS,)
+        )
+
+    def prune(self):
+        """Drop log rows older than ``INVALIDATION_LOG_SECONDS``"""
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._prune_log(connection, time.time())
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def stats(self):
+        return dict(self._counters, path=self.path)
+
+
+class SQLiteResponseStore(SQLiteInvalidationLog):
+    """Second-level response cache in a local SQLite file (WAL mode).
+
+    Every worker process on the host opens the same file, so a response
+    fetched by one worker is a hit for the others. Entries keep the absolute
+    expiry and tags they were stored with. Invalidations delete matching rows
+    as they are logged, so the file doubles as the workers' invalidation log.
+    Expired rows are kept ``stale_grace`` seconds for ``get_stale``.
+    """
+
+    schema = _SCHEMA
+
+    def __init__(self, path, max_bytes, stale_grace=0):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.stale_grace = stale_grace
+        self._puts = 0
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'errors': 0}
+
+    def get(self, key):
+        """(response, stored_at, expires_at) for a live entry, or None"""
+        def read():
+            return self.connection.execute(
+                'SELECT * FROM responses WHERE key = ? AND expires_at > ?', (_digest(key), time.time())
+            ).fetchone()
+        row = self._guard(read)
+        if row is None:
+            self._counters['misses'] += 1
+            return None
+        self._counters['hits'] += 1
+        return decode_response(row), row['stored_at'], row['expires_at']
+
+    def get_stale(self, key):
+        """(response, seconds since it was stored) for an entry still inside ``stale_grace``, or None"""
+        now = time.time()
+
+        def read():
+            return self.connection.execute(
+                'SELECT * FROM responses WHERE key = ? AND expires_at > ?', (_digest(key), now - self.stale_grace)
+            ).fetchone()
+        row = self._guard(read)
+        if row is None:
+            return None
+        return decode_response(row), max(0, now - row['stored_at'])
+
+    def put(self, key, response, expires_at, tags=(), cursor=None):
+        """Store a response unless an invalidation was logged after ``cursor``"""
+        columns = encode_response(response)
+        digest = _digest(key)
+        size = len(columns['body'])
+        if size > self.max_bytes:
+            return
+
+        def write():
+            connection = self.connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if cursor is not None:
+                    latest = connection.execute('SELECT MAX(id) FROM invalidations').fetchone()[0] or 0
+                    if latest != cursor:
+                        connection.execute('ROLLBACK')
+                        return
+                connection.execute('DELETE FROM response_tags WHERE key = ?', (digest,))
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses (key, scope, tags, status, reason, url, encoding, headers, '
+                    'body, size, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (digest, _digest(key[0]), json.dumps(sorted(tags)), columns['status'], columns['reason'],
+                     columns['url'], columns['encoding'], columns['headers'], columns['body'], size,
+                     time.time(), expires_at)
+                )
+                connection.executemany(
+                    'INSERT OR IGNORE INTO response_tags (tag, key) VALUES (?, ?)', [(tag, digest) for tag in tags]
+                )
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            self._counters['stores'] += 1
+
+        self._guard(write)
+        self._puts += 1
+        if self._puts % PRUNE_EVERY == 0:
+            self._guard(self.prune)
+
+    def _delete_keys(self, connection, where, args):
+        keys = [row[0] for row in connection.execute(f'SELECT key FROM responses WHERE {where}', args)]
+        connection.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in keys])
+        connection.executemany('DELETE FROM response_tags WHERE key = ?', [(key,) for key in keys])
+        return len(keys)
+
+    def invalidate_tags(self, tags):
+        """Delete entries carrying any of ``tags`` and log the invalidation for the other workers"""
+        tags = sorted(tags)
+        marks = ','.join('?' * len(tags))
+        return self._write_invalidation(
+            lambda connection: self._delete_keys(
+                connection, f'key IN (SELECT key FROM response_tags WHERE tag IN ({marks}))', tags
+            ),
+            tags=tags
+        )
+
+    def invalidate_scope(self, scope):
+        """Delete every entry cached for ``scope`` and log the invalidation"""
+        digest = _digest(scope)
+        return self._write_invalidation(
+            lambda connection: self._delete_keys(connection, 'scope = ?', (digest,)), scope=digest
+        )
+
+    def prune(self):
+        """Drop rows past their stale grace, old log rows, and the oldest rows beyond ``max_bytes``"""
+        connection = self.connection
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._delete_keys(connection, 'expires_at <= ?', (now - self.stale_grace,))
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed = []
+                for row in connection.execute('SELECT key, size FROM responses ORDER BY stored_at'):
+                    if excess <= 0:
+                        break
+                    doomed.append((row['key'],))
+                    excess -= row['size']
+                connection.executemany('DELETE FROM responses WHERE key = ?', doomed)
+                connection.executemany('DELETE FROM response_tags WHERE key = ?', doomed)
+            self._prune_log(connection, now)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def stats(self):
+        def read():
+            row = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            return {'entries': row[0], 'bytes': row[1]}
+        return dict(self._counters, **(self._guard(read, {}) or {}), max_bytes=self.max_bytes, path=self.path)
+
+
+# Second-level stores selectable with BACKEND_CACHE_L2
+CACHE_STORES = {
+    'sqlite': SQLiteResponseStore,
+}
@@ -0,0 +1,147 @@
+# utils/stats.py - Cached dashboard counters built from count-only backend queries
+import time
+import threading
+import logging
+
+import requests
+
+from config import Config
+from utils.gateway import gateway
+
+logger = logging.getLogger(__name__)
+
+# Dashboard counter -> (collection, filter the rows must match)
+DASHBOARD_COUNTERS = {
+    'total_accounts': ('/api/accounts/', {}),
+    'total_contacts': ('/api/contacts/', {}),
+    'active_loans': ('/api/loans/', {'loan_status': 'Active'}),
+    'open_cases': ('/api/cases/', {'status': 'Open'}),
+}
+
+# Upper bound for collections whose backend does not report 'total'
+FALLBACK_LIMIT = 1000
+
+# Rows fetched with a filtered total to check the backend applied the filter
+FILTER_SAMPLE_SIZE = 25
+
+
+def _rows(data):
+    if isinstance(data, dict):
+        return data.get('items', [])
+    return data if isinstance(data, list) else []
+
+
+def _matches(row, filters):
+    # 'loan_status' is the loans query parameter for the row's 'status' field
+    return all(row.get('status' if key.endswith('status') else key) == value for key, value in filters.items())
+
+
+def _page(base_url, headers, path, params, limit):
+    """(rows, total or None) of the first ``limit`` rows matching ``params``"""
+    response = gateway.get(f"{base_url}{path}", headers=headers, params={**params, 'skip': 0, 'limit': limit}, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    total = data.get('total') if isinstance(data, dict) else None
+    return _rows(data), (int(total) if total is not None else None)
+
+
+def _filtered_total(base_url, headers, path, filters):
+    """The backend's total for ``filters``, or None when it cannot be trusted.
+
+    A sample of ``FILTER_SAMPLE_SIZE`` rows must all match. When the sample
+    does not cover the whole result, the total must also be below the
+    unfiltered one - a backend that ignores the filter reports the
+    collection's size, and a few matching rows at the top do not show it.
+    """
+    rows, total = _page(base_url, headers, path, filters, FILTER_SAMPLE_SIZE if filters else 1)
+    if total is None or len(rows) < min(total, 1) or not all(_matches(row, filters) for row in rows):
+        return None
+    if not filters or total <= len(rows):
+        return total
+    _, unfiltered = _page(base_url, headers, path, {}, 1)
+    return total if unfiltered is not None and total < unfiltered else None
+
+
+def count_rows(base_url, headers, path, filters=None):
+    """Count rows of a collection matching ``filters`` from the backend's total.
+
+    If the backend reports no total or the filter check is inconclusive,
+    falls back to counting a ``FALLBACK_LIMIT`` page locally, which is how
+    the dashboard counted before.
+    """
+    filters = filters or {}
+    total = _filtered_total(base_url, headers, path, filters)
+    if total is not None:
+        return total
+
+    logger.info(f"{path} gave no usable total - counting up to {FALLBACK_LIMIT} rows")
+    response = gateway.get(f"{base_url}{path}", headers=headers, params={'limit': FALLBACK_LIMIT}, timeout=10)
+    response.raise_for_status()
+    return len([row for row in _rows(response.json()) if _matches(row, filters)])
+
+
+class DashboardStats:
+    """Dashboard counters cached per scope (see ``get_cache_scope``).
+
+    A cold scope is counted on the request; once older than
+    ``DASHBOARD_STATS_TTL`` the cached counters keep being served while a
+    background thread recounts them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._refreshing = set()
+
+    def _collect(self, base_url, headers):
+        return {
+            name: count_rows(base_url, headers, path, filters)
+            for name, (path, filters) in DASHBOARD_COUNTERS.items()
+        }
+
+    def _refresh(self, scope, base_url, headers):
+        try:
+            stats = self._collect(base_url, headers)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Dashboard stats refresh failed: {e}")
+            stats = None
+        with self._lock:
+            self._refreshing.discard(scope)
+            if stats is not None:
+                self._cache[scope] = (stats, time.time())
+        return stats
+
+    def export(self):
+        """[(scope, stats, counted_at)] of the role scopes, for the warm-start snapshot"""
+        with self._lock:
+            return [
+                (scope, dict(stats), counted_at) for scope, (stats, counted_at) in self._cache.items()
+                if scope[0] == 'roles'
+            ]
+
+    def restore(self, entries):
+        """Load snapshot counters; ones past their TTL are recounted in the background on first use"""
+        with self._lock:
+            for scope, stats, counted_at in entries:
+                self._cache.setdefault(scope, (stats, counted_at))
+        return len(entries)
+
+    def get(self, base_url, headers, scope):
+        """Counters for the scope, or None when they could not be counted"""
+        with self._lock:
+            cached = self._cache.get(scope)
+            if cached is not None:
+                stats, counted_at = cached
+                if time.time() - counted_at > Config.DASHBOARD_STATS_TTL and scope not in self._refreshing:
+                    self._refreshing.add(scope)
+                    threading.Thread(
+                        target=self._refresh,
+                        args=(scope, base_url, dict(headers)),
+                        daemon=True
+                    ).start()
+                return dict(stats)
+        stats = self._refresh(scope, base_url, headers)
+        return dict(stats) if stats is not None else None
+
+
+dashboard_stats = DashboardStats()
@@ -0,0 +1,147 @@
+# utils/warm_cache.py - Snapshot of shared cache entries kept across restarts
+import os
+import json
+import time
+import base64
+import atexit
+import logging
+
+from utils.gateway import gateway
+from utils.shared_cache import encode_response, decode_response
+from utils.reference import reference_cache
+from utils.stats import dashboard_stats
+from utils.case_filters import case_filter_cache
+
+logger = logging.getLogger(__name__)
+
+# Most body bytes of shared backend responses written to the snapshot
+SNAPSHOT_RESPONSE_BYTES = 8 * 1024 * 1024
+
+
+def _tuples(value):
+    """JSON turns the tuples used in cache keys into lists - turn them back"""
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    return value
+
+
+def _dump_responses():
+    # Only entries shared by a role scope; per-token entries belong to one user's session
+    entries, total = [], 0
+    for key, response, stored_at, expires_at, tags in gateway.response_cache.items(lambda key: key[0][0] == 'roles'):
+        columns = encode_response(response)
+        total += len(columns['body'])
+        if total > SNAPSHOT_RESPONSE_BYTES:
+            break
+        columns['body'] = base64.b64encode(columns['body']).decode('ascii')
+        entries.append({
+            'key': key, 'response': columns, 'stored_at': stored_at, 'expires_at': expires_at, 'tags': sorted(tags)
+        })
+    return entries
+
+
+def _load_responses(entries):
+    now, kept = time.time(), 0
+    for entry in entries:
+        if entry['expires_at'] <= now:
+            continue
+        columns = dict(entry['response'], body=base64.b64decode(entry['response']['body']))
+        gateway.response_cache.put(
+            _tuples(entry['key']), decode_response(columns), entry['expires_at'] - now, tags=entry['tags'],
+            stored_at=entry.get('stored_at')
+        )
+        kept += 1
+    return kept
+
+
+def _load_reference(entries):
+    return reference_cache.restore([(name, _tuples(scope), value, loaded_at) for name, scope, value, loaded_at in entries])
+
+
+def _load_dashboard(entries):
+    return dashboard_stats.restore([(_tuples(scope), stats, counted_at) for scope, stats, counted_at in entries])
+
+
+# Snapshot section -> (dump, load); load returns how many entries it kept
+SECTIONS = {
+    'responses': (_dump_responses, _load_responses),
+    'reference': (reference_cache.export, _load_reference),
+    'dashboard': (dashboard_stats.export, _load_dashboard),
+    'case_filters': (case_filter_cache.export, case_filter_cache.restore),
+}
+
+
+class WarmCache:
+    """Writes the caches' non-user-specific entries to a file at shutdown and reloads them at startup.
+
+    Covers role-shared backend responses, dropdown reference data, dashboard
+    counters and case filters. Each cache applies its own freshness rules on
+    reload, so expired responses are skipped and stale lists are refreshed
+    in the background as usual; a snapshot older than ``WARM_CACHE_MAX_AGE``
+    is ignored altogether.
+
+    Per-token responses are left out of the snapshot (the opt-in
+    ``BACKEND_CACHE_L2`` store is what persists those). Role-shared entries
+    are still business data that any process able to read the file would
+    restore, so the file lives in the private ``BACKEND_CACHE_DIR`` (0700)
+    and is written 0600.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.max_age = 0
+        self._registered = False
+
+    def init_app(self, app):
+        """Reload the snapshot and save a new one when the process exits"""
+        if not app.config['WARM_CACHE_ENABLED']:
+            return
+        self.path = app.config['WARM_CACHE_PATH']
+        self.max_age = app.config['WARM_CACHE_MAX_AGE']
+        self.restore()
+        if not self._registered:
+            # Runs on a normal interpreter exit, which includes a worker's graceful shutdown
+            atexit.register(self.save)
+            self._registered = True
+
+    def save(self):
+        sections = {}
+        for name, (dump, _) in SECTIONS.items():
+            try:
+                sections[name] = dump()
+            except Exception as e:
+                logger.warning(f"Warm cache section {name} not saved: {e}")
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', mode=0o700, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': time.time(), 'sections': sections}, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write warm cache snapshot: {e}")
+
+    def restore(self):
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable warm cache snapshot: {e}")
+            return
+        age = time.time() - snapshot.get('saved_at', 0)
+        if age > self.max_age:
+            logger.info(f"Warm cache snapshot is {age:.0f}s old - starting cold")
+            return
+        for name, (_, load) in SECTIONS.items():
+            if name not in snapshot.get('sections', {}):
+                continue
+            try:
+                kept = load(snapshot['sections'][name])
+                logger.info(f"Warm cache: restored {kept} {name} entries")
+            except Exception as e:
+                logger.warning(f"Warm cache section {name} not restored: {e}")
+
+
+warm_cache = WarmCache()